@@ -0,0 +1,108 @@
+"""
+Minimal in-process ASGI client: drives an app without sockets, HTTP parsing or threads,
+so benchmarks measure the application and middleware cost only.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+
+class AsgiResponse:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def header(self, name: str) -> Optional[str]:
+        key = name.lower().encode("latin-1")
+        for header_name, value in self.headers:
+            if header_name.lower() == key:
+                return value.decode("latin-1")
+        return None
+
+
+def build_scope(method: str, path: str, headers: Optional[Dict[str, str]] = None,
+                query_string: str = "", state: Optional[dict] = None) -> dict:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("latin-1"),
+        "root_path": "",
+        "query_string": query_string.encode("latin-1"),
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 80),
+    }
+    if state is not None:
+        scope["state"] = state
+    return scope
+
+
+async def call(app, method: str, path: str, headers: Optional[Dict[str, str]] = None,
+               query_string: str = "", body: bytes = b"", body_chunks: Optional[Iterable[bytes]] = None,
+               state: Optional[dict] = None) -> AsgiResponse:
+    scope = build_scope(method, path, headers, query_string, state)
+    chunks = list(body_chunks) if body_chunks is not None else [body]
+    status = 500
+    response_headers: List[Tuple[bytes, bytes]] = []
+    response_body = bytearray()
+    disconnected = asyncio.Event()
+
+    async def receive() -> dict:
+        if chunks:
+            chunk = chunks.pop(0)
+            return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+        # Like a real server, only report a disconnect once the client goes away
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = list(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            response_body.extend(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+    return AsgiResponse(status, response_headers, bytes(response_body))
+
+
+@asynccontextmanager
+async def lifespan(app, state: Optional[dict] = None) -> AsyncIterator[dict]:
+    """
+    Run the app's startup and shutdown around the block, like a server does.
+
+    Yields the lifespan state; pass it as `state` to `call` for apps that use it.
+    """
+    state = state if state is not None else {}
+    scope = {"type": "lifespan", "asgi": {"version": "3.0", "spec_version": "2.0"}, "state": state}
+    events: asyncio.Queue = asyncio.Queue()
+    replies: asyncio.Queue = asyncio.Queue()
+    await events.put({"type": "lifespan.startup"})
+
+    async def receive() -> dict:
+        return await events.get()
+
+    async def send(message: dict) -> None:
+        await replies.put(message)
+
+    task = asyncio.get_running_loop().create_task(app(scope, receive, send))
+    reply = await replies.get()
+    if reply["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Application startup failed: {reply.get('message', '')}")
+    try:
+        yield state
+    finally:
+        await events.put({"type": "lifespan.shutdown"})
+        await replies.get()
+        await task
@@ -0,0 +1,70 @@
+"""
+Compare a service benchmark result file against a stored baseline.
+
+A scenario regresses when one of its latency percentiles grows, or its throughput drops,
+by more than `--tolerance` (a fraction, or the scenario's own `tolerance` when that is
+wider), or when it answers with unexpected statuses.
+Only compare results recorded on the same machine with the same parameters.
+
+    python benchmarks/compare_results.py results.json baseline.json [--tolerance 0.15]
+
+Exits with status 1 when a scenario regressed.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+PERCENTILES = ("p50", "p95", "p99")
+
+
+def load_results(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> Tuple[List[str], List[str]]:
+    """Return (report lines, regressions)"""
+    lines: List[str] = []
+    regressions: List[str] = []
+    header = f"{'scenario':<28}{'metric':>8}{'baseline':>12}{'current':>12}{'change':>10}"
+    lines.append(header)
+    lines.append("-" * len(header))
+    for name, result in current["scenarios"].items():
+        if result.get("errors"):
+            regressions.append(f"{name}: {result['errors']} unexpected responses {result['statuses']}")
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            lines.append(f"{name:<28}{'(new)':>8}")
+            continue
+        limit = max(tolerance, result.get("tolerance", 0.0))
+        metrics = [(p, base["latency_ms"][p], result["latency_ms"][p], True) for p in PERCENTILES]
+        metrics.append(("rps", base["rps"], result["rps"], False))
+        for metric, before, after, lower_is_better in metrics:
+            change = (after - before) / before if before else 0.0
+            worse = change > limit if lower_is_better else change < -limit
+            flag = "  REGRESSED" if worse else ""
+            lines.append(f"{name:<28}{metric:>8}{before:>12,.3f}{after:>12,.3f}{change:>+9.1%}{flag}")
+            if worse:
+                regressions.append(f"{name}: {metric} {before:,.3f} -> {after:,.3f} ({change:+.1%})")
+    for name in baseline.get("scenarios", {}):
+        if name not in current["scenarios"]:
+            lines.append(f"{name:<28}{'(gone)':>8}")
+    return lines, regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("current")
+    parser.add_argument("baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+    lines, regressions = compare(load_results(args.current), load_results(args.baseline), args.tolerance)
+    print("\n".join(lines))
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Closed-loop load generator on top of the in-process ASGI client.
+
+`concurrency` workers share one request counter and each sends its next request as soon
+as the previous one is answered, like that many keep-alive clients would. Every request
+is timed individually, so the result carries the latency distribution (p50/p95/p99) next
+to the throughput of the whole run.
+"""
+import asyncio
+import gc
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import asgi_driver
+
+
+class RequestSpec(NamedTuple):
+    method: str
+    path: str
+    headers: Optional[Dict[str, str]] = None
+    query_string: str = ""
+    body: bytes = b""
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class LoadResult:
+    def __init__(self, name: str, concurrency: int, latencies: List[float], elapsed: float,
+                 statuses: Dict[int, int], expected_status: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+        self.statuses = statuses
+        self.expected_status = expected_status
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def errors(self) -> int:
+        return sum(count for status, count in self.statuses.items() if status != self.expected_status)
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        def ms(value: float) -> float:
+            return round(value * 1000, 4)
+
+        return {
+            "requests": self.requests,
+            "concurrency": self.concurrency,
+            "elapsed_s": round(self.elapsed, 4),
+            "rps": round(self.rps, 1),
+            "latency_ms": {
+                "p50": ms(percentile(self.latencies, 0.50)),
+                "p95": ms(percentile(self.latencies, 0.95)),
+                "p99": ms(percentile(self.latencies, 0.99)),
+                "max": ms(self.latencies[-1] if self.latencies else 0.0),
+                "mean": ms(sum(self.latencies) / len(self.latencies) if self.latencies else 0.0),
+            },
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "errors": self.errors,
+        }
+
+
+async def run_load(name: str, app, request_for: Callable[[int], RequestSpec], requests: int, concurrency: int = 1,
+                   warmup: int = 0, expected_status: int = 200,
+                   before_each: Optional[Callable[[], Awaitable[None]]] = None) -> LoadResult:
+    """
+    Send `requests` requests built by `request_for(index)` through `app`.
+
+    `warmup` requests (indexes `0` to `warmup - 1`) are sent first and not recorded, the
+    recorded ones follow with the next indexes. `before_each` runs before every recorded
+    request, outside of its timing (e.g. to empty a cache for cold scenarios).
+    """
+    for index in range(warmup):
+        spec = request_for(index)
+        await asgi_driver.call(app, spec.method, spec.path, spec.headers, spec.query_string, spec.body)
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    next_index = warmup
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < warmup + requests:
+            index = next_index
+            next_index += 1
+            spec = request_for(index)
+            if before_each is not None:
+                await before_each()
+            started = time.perf_counter()
+            response = await asgi_driver.call(app, spec.method, spec.path, spec.headers, spec.query_string, spec.body)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+
+    # Collections triggered by the previous scenario's garbage must not land in this one
+    gc.collect()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    return LoadResult(name, concurrency, latencies, elapsed, statuses, expected_status)
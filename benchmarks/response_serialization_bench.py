@@ -0,0 +1,107 @@
+"""
+Per-route throughput of the response serialization.
+
+"before" rebuilds the original routes (plain `User` class returned inside a dict, no
+response model, so FastAPI walks the result with `jsonable_encoder`); "after" mounts the
+template's typed routers with the app-wide default response class from `create_app()`.
+Both apps authenticate the same token against the stub IdP, so after the first request
+the verified-token cache answers and the difference is the serialization.
+
+    python benchmarks/response_serialization_bench.py [--iterations 20000]
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import asgi_driver
+from stub_idp import StubIdentityProvider
+from template_env import BENCH_CLIENT_ID, BENCH_TENANT_ID, use_fastapi_template
+from token_minter import mint_token
+
+ROUTES = {
+    "healthcheck": "/api/v1/healthcheck/",
+    "secure (paginated)": "/api/v1/secure/",
+}
+QUERY = "page=2&page_size=50&filters=status:eq:open&filters=owner:eq:me&sort_by=-created"
+ROLES = ["ROLE_USER", "ROLE_CONTRIBUTOR", "ROLE_MEMBER"]
+
+
+def build_apps(idp: StubIdentityProvider):
+    use_fastapi_template(aad_instance=idp.aad_instance)
+    from fastapi import APIRouter, Depends, FastAPI, Query
+    from src.authorization.azure_authorization import authorize
+    from src.features.services.health_service.api.v1.service.api_router import health_service_api_router
+    from src.features.services.secure_service.api.v1.service.api_router import secure_service_api_router
+    from src.web.responses import default_response_class
+
+    class LegacyUser:
+        def __init__(self, id, name='', preferred_username='', roles=None):
+            self.id = id
+            self.name = name
+            self.preferred_username = preferred_username
+            self.roles = roles if roles is not None else []
+
+    def get_legacy_user(token_user=Depends(authorize)) -> LegacyUser:
+        return LegacyUser(token_user.id, token_user.name, token_user.preferred_username, list(token_user.roles))
+
+    before = FastAPI()
+    legacy_router = APIRouter()
+
+    @legacy_router.get("/healthcheck/")
+    async def healthcheck():
+        return {"status": "healthy"}
+
+    @legacy_router.get("/secure/")
+    async def get_all_paginated(
+        page: int = Query(1), page_size: int = Query(20),
+        filters: List[str] = Query([]), sort_by: List[str] = Query([]),
+        user=Depends(get_legacy_user)
+    ):
+        return {"message": "Hello, World!", "page": page, "page_size": page_size,
+                "filters": filters, "sort_by": sort_by, "user": user}
+
+    before.include_router(legacy_router, prefix="/api/v1")
+
+    after = FastAPI(default_response_class=default_response_class())
+    after.include_router(health_service_api_router, prefix="/api/v1")
+    after.include_router(secure_service_api_router, prefix="/api/v1")
+    return {"before": before, "after": after}
+
+
+async def measure(app, path: str, headers: dict, iterations: int) -> float:
+    query = QUERY if "secure" in path else ""
+    for _ in range(500):
+        response = await asgi_driver.call(app, "GET", path, headers, query_string=query)
+        assert response.status == 200, (response.status, response.body)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await asgi_driver.call(app, "GET", path, headers, query_string=query)
+    return iterations / (time.perf_counter() - started)
+
+
+async def run(iterations: int) -> None:
+    with StubIdentityProvider(tenant=BENCH_TENANT_ID) as idp:
+        apps = build_apps(idp)
+        token = mint_token(idp.private_keys[idp.current_kid], idp.current_kid, BENCH_CLIENT_ID, BENCH_TENANT_ID,
+                           claims={"name": "Bench User", "preferred_username": "bench@example.com", "roles": ROLES})
+        headers = {"Authorization": f"Bearer {token}"}
+        await report(apps, headers, iterations)
+
+
+async def report(apps: dict, headers: dict, iterations: int) -> None:
+    bodies = {name: (await asgi_driver.call(app, "GET", ROUTES["secure (paginated)"], headers, query_string=QUERY)).body
+              for name, app in apps.items()}
+    print(f"secure body before: {bodies['before'].decode()}")
+    print(f"secure body after:  {bodies['after'].decode()}")
+    print()
+    print(f"{'route':<22}{'before req/s':>14}{'after req/s':>14}{'speedup':>10}")
+    for route, path in ROUTES.items():
+        rps = {name: await measure(app, path, headers, iterations) for name, app in apps.items()}
+        print(f"{route:<22}{rps['before']:>14,.0f}{rps['after']:>14,.0f}{rps['after'] / rps['before']:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    asyncio.run(run(parser.parse_args().iterations))
@@ -0,0 +1,226 @@
+"""
+Reproducible latency and throughput suite of the generated services, fully offline.
+
+Drives the complete apps (middleware, lifespan, routers) in-process through the load
+driver and reports p50/p95/p99 latency and requests per second per scenario:
+
+    fastapi.healthcheck          GET /api/v1/healthcheck/
+    fastapi.secure_warm          GET /api/v1/secure/, one token: verified-token cache hits
+    fastapi.secure_cold_token    GET /api/v1/secure/, a new token per request: full validation
+                                 against the cached signing keys
+    fastapi.secure_cold_keys     GET /api/v1/secure/ with the key and token caches emptied
+                                 before every request: JWKS fetch from the stub IdP plus full
+                                 validation, sent one at a time (first request after a start)
+    bff.api_config               GET /api/config with the X-API-Key header
+    bff.config_json              GET /config.json
+
+Tokens are signed by the local token minter and the keys served by the stub IdP. Both
+templates ship a top level `src` package, so each template runs in its own subprocess,
+`--repeat` times; the recorded figures are the medians of those runs.
+
+    python benchmarks/service_bench.py --output results.json
+    python benchmarks/service_bench.py --output current.json --baseline results.json
+
+With `--baseline` the run is compared with `compare_results.py` and the exit status is 1
+when a scenario regressed.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES = ("fastapi", "bff")
+SECURE_QUERY = "page=2&page_size=50&filters=status:eq:open&filters=owner:eq:me&sort_by=-created"
+ROLES = ["ROLE_USER", "ROLE_CONTRIBUTOR", "ROLE_MEMBER"]
+# Scenarios whose tail follows the OS scheduler (a loopback HTTP fetch per request) get a
+# wider regression tolerance than `--tolerance`
+TOLERANCES = {"fastapi.secure_cold_keys": 0.5}
+
+
+async def fastapi_scenarios(args) -> List:
+    from load_driver import RequestSpec, run_load
+    from stub_idp import StubIdentityProvider
+    from template_env import BENCH_CLIENT_ID, BENCH_TENANT_ID, use_fastapi_template
+    from token_minter import mint_token
+
+    with StubIdentityProvider(tenant=BENCH_TENANT_ID) as idp, tempfile.TemporaryDirectory() as state_dir:
+        # A private shared-state directory and no cross-process cache: cold means cold
+        use_fastapi_template(aad_instance=idp.aad_instance, AUTH_SHARED_CACHE="off", SHARED_STATE_DIR=state_dir,
+                             LOG_LEVEL="WARNING")
+        import asgi_driver
+        from src.authorization.azure_authorization import authorize
+        from src.main import app
+
+        private_key, kid = idp.private_keys[idp.current_kid], idp.current_kid
+
+        def mint() -> str:
+            return mint_token(private_key, kid, BENCH_CLIENT_ID, BENCH_TENANT_ID, claims={"roles": ROLES})
+
+        def secure(token: str) -> RequestSpec:
+            return RequestSpec("GET", "/api/v1/secure/", {"Authorization": f"Bearer {token}"}, SECURE_QUERY)
+
+        warm_token = mint()
+        cold_tokens = [mint() for _ in range(args.warmup + args.cold_requests)]
+
+        async def forget_keys() -> None:
+            manager = authorize.key_manager
+            manager._keys = {}
+            manager._unknown_kids.clear()
+            manager._last_attempt = 0.0
+            authorize.token_cache.clear()
+
+        results = []
+        async with asgi_driver.lifespan(app):
+            results.append(await run_load(
+                "fastapi.healthcheck", app, lambda i: RequestSpec("GET", "/api/v1/healthcheck/"),
+                args.requests, args.concurrency, args.warmup))
+            results.append(await run_load(
+                "fastapi.secure_warm", app, lambda i: secure(warm_token),
+                args.requests, args.concurrency, args.warmup))
+            results.append(await run_load(
+                "fastapi.secure_cold_token", app, lambda i: secure(cold_tokens[i]),
+                args.cold_requests, args.concurrency, args.warmup))
+            fetches = idp.jwks_requests
+            results.append(await run_load(
+                "fastapi.secure_cold_keys", app, lambda i: secure(cold_tokens[i]),
+                args.cold_requests, 1, args.warmup, before_each=forget_keys))
+            # Every recorded request must have paid for a JWKS fetch, or the scenario is not cold
+            assert idp.jwks_requests - fetches >= args.cold_requests, "the JWKS was not fetched per request"
+        return results
+
+
+async def bff_scenarios(args) -> List:
+    from load_driver import RequestSpec, run_load
+    from template_env import use_bff_backend
+
+    api_key = "bench-api-key"
+    use_bff_backend(api_key=api_key)
+    import asgi_driver
+    from src.main import app
+
+    async with asgi_driver.lifespan(app):
+        return [
+            await run_load("bff.api_config", app, lambda i: RequestSpec("GET", "/api/config", {"X-API-Key": api_key}),
+                           args.requests, args.concurrency, args.warmup),
+            await run_load("bff.config_json", app, lambda i: RequestSpec("GET", "/config.json"),
+                           args.requests, args.concurrency, args.warmup),
+        ]
+
+
+def run_child(args) -> None:
+    """Run one template's scenarios and write their results to `--child-output`"""
+    scenarios = fastapi_scenarios if args.child == "fastapi" else bff_scenarios
+    results = asyncio.run(scenarios(args))
+    with open(args.child_output, "w", encoding="utf-8") as f:
+        json.dump({result.name: dict(result.as_dict(), **({"tolerance": TOLERANCES[result.name]}
+                                                          if result.name in TOLERANCES else {}))
+                   for result in results}, f)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _median_of_runs(runs: List[Dict]) -> Dict:
+    """One scenario result out of several runs: the median of every latency figure and rate"""
+    merged = dict(runs[len(runs) // 2])
+    merged["rps"] = statistics.median(run["rps"] for run in runs)
+    merged["latency_ms"] = {key: statistics.median(run["latency_ms"][key] for run in runs)
+                            for key in merged["latency_ms"]}
+    statuses: Dict[str, int] = {}
+    for run in runs:
+        for status, count in run["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+    merged["statuses"] = statuses
+    merged["errors"] = sum(run["errors"] for run in runs)
+    merged["runs"] = len(runs)
+    return merged
+
+
+def run_suite(args) -> Dict:
+    runs: Dict[str, List[Dict]] = {}
+    for _ in range(args.repeat):
+        for template in args.templates:
+            with tempfile.TemporaryDirectory() as directory:
+                output = os.path.join(directory, "results.json")
+                command = [sys.executable, os.path.abspath(__file__), "--child", template, "--child-output", output,
+                           "--requests", str(args.requests), "--cold-requests", str(args.cold_requests),
+                           "--concurrency", str(args.concurrency), "--warmup", str(args.warmup)]
+                subprocess.run(command, check=True, cwd=BENCH_DIR)
+                with open(output, "r", encoding="utf-8") as f:
+                    for name, result in json.load(f).items():
+                        runs.setdefault(name, []).append(result)
+    scenarios = {name: _median_of_runs(results) for name, results in runs.items()}
+    return {
+        "meta": {
+            "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "parameters": {"requests": args.requests, "cold_requests": args.cold_requests,
+                           "concurrency": args.concurrency, "warmup": args.warmup, "repeat": args.repeat},
+        },
+        "scenarios": scenarios,
+    }
+
+
+def print_results(results: Dict) -> None:
+    print(f"{'scenario':<28}{'requests':>9}{'conc':>6}{'req/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'errors':>8}")
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        print(f"{name:<28}{result['requests']:>9}{result['concurrency']:>6}{result['rps']:>11,.0f}"
+              f"{latency['p50']:>10.3f}{latency['p95']:>10.3f}{latency['p99']:>10.3f}{result['errors']:>8}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="recorded requests per warm scenario")
+    parser.add_argument("--cold-requests", type=int, default=1000, help="recorded requests per cold scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per template, the median of each figure is kept")
+    parser.add_argument("--templates", nargs="+", choices=TEMPLATES, default=list(TEMPLATES))
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with this stored result file")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--child", choices=TEMPLATES, help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    results = run_suite(args)
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        from compare_results import compare, load_results
+        lines, regressions = compare(results, load_results(args.baseline), args.tolerance)
+        print()
+        print("\n".join(lines))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Local stand-in for the Entra ID OpenID metadata and JWKS endpoints.
+
+Runs a stdlib HTTP server on a background thread so the key manager and the
+authorization dependency can be exercised without network access:
+
+    with StubIdentityProvider() as idp:
+        manager = JwksKeyManager(idp.metadata_url)
+        ...
+        idp.rotate()          # publish a new signing key, drop the oldest
+        idp.fail = True       # answer 503 to simulate an unreachable IdP
+"""
+import base64
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def _b64url_uint(value: int) -> str:
+    raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def generate_signing_key(kid: str = None):
+    """Return (kid, private_key, public_jwk) for a fresh 2048 bit RSA key"""
+    kid = kid or uuid.uuid4().hex
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    numbers = private_key.public_key().public_numbers()
+    jwk = {
+        "kty": "RSA",
+        "use": "sig",
+        "alg": "RS256",
+        "kid": kid,
+        "n": _b64url_uint(numbers.n),
+        "e": _b64url_uint(numbers.e),
+    }
+    return kid, private_key, jwk
+
+
+class StubIdentityProvider:
+    def __init__(self, tenant: str = "stub-tenant", host: str = "127.0.0.1", port: int = 0, key_count: int = 1):
+        self.tenant = tenant
+        self.fail = False
+        self.latency = 0.0
+        self.metadata_requests = 0
+        self.jwks_requests = 0
+        self.private_keys: Dict[str, object] = {}
+        self._jwks: List[dict] = []
+        self._lock = threading.Lock()
+        for _ in range(key_count):
+            self.add_key()
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def aad_instance(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def metadata_url(self) -> str:
+        return f"{self.aad_instance}/{self.tenant}/v2.0/.well-known/openid-configuration"
+
+    @property
+    def jwks_url(self) -> str:
+        return f"{self.aad_instance}/{self.tenant}/discovery/v2.0/keys"
+
+    @property
+    def current_kid(self) -> str:
+        return self._jwks[-1]["kid"]
+
+    def add_key(self, kid: str = None) -> str:
+        kid, private_key, jwk = generate_signing_key(kid)
+        with self._lock:
+            self.private_keys[kid] = private_key
+            self._jwks.append(jwk)
+        return kid
+
+    def rotate(self) -> str:
+        """Publish a new key and retire the oldest one"""
+        kid = self.add_key()
+        with self._lock:
+            retired = self._jwks.pop(0)
+            self.private_keys.pop(retired["kid"], None)
+        return kid
+
+    def jwks(self) -> dict:
+        with self._lock:
+            return {"keys": list(self._jwks)}
+
+    def _handler_class(self):
+        idp = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if idp.latency:
+                    time.sleep(idp.latency)
+                if self.path.endswith("/.well-known/openid-configuration"):
+                    idp.metadata_requests += 1
+                    body = {"issuer": f"{idp.aad_instance}/{idp.tenant}/v2.0", "jwks_uri": idp.jwks_url}
+                elif self.path.endswith("/discovery/v2.0/keys"):
+                    idp.jwks_requests += 1
+                    body = idp.jwks()
+                else:
+                    self.send_error(404)
+                    return
+                if idp.fail:
+                    self.send_error(503)
+                    return
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubIdentityProvider":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubIdentityProvider":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    with StubIdentityProvider(port=8765) as idp:
+        print(f"AAD_INSTANCE={idp.aad_instance}")
+        print(f"ENTRA_TENANT_ID={idp.tenant}")
+        print(f"Serving {idp.metadata_url}, press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,80 @@
+"""
+Local stand-in for an OpenTelemetry collector's OTLP/HTTP receiver.
+
+Accepts `POST /v1/traces` (protobuf or JSON), counts requests and payload bytes and
+answers 200, so TRACING_EXPORTER=otlp can be exercised without a collector:
+
+    python benchmarks/stub_otlp_collector.py --port 4318
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOtlpCollector:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.requests = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/traces"
+
+    def _handler_class(self):
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                if self.path != "/v1/traces":
+                    self.send_error(404)
+                    return
+                with collector._lock:
+                    collector.requests += 1
+                    collector.bytes_received += length
+                self.send_response(200)
+                self.send_header("Content-Type", self.headers.get("Content-Type", "application/x-protobuf"))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubOtlpCollector":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubOtlpCollector":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=4318)
+    with StubOtlpCollector(port=parser.parse_args().port) as collector:
+        print(f"TRACING_OTLP_ENDPOINT={collector.endpoint}")
+        try:
+            while True:
+                time.sleep(5)
+                print(f"requests={collector.requests} bytes={collector.bytes_received}")
+        except KeyboardInterrupt:
+            pass
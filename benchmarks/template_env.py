@@ -0,0 +1,53 @@
+"""
+Makes a template importable from the benchmarks with a complete, offline environment.
+
+Both templates ship their code as a top level `src` package, so only one of them can be
+imported per process.
+"""
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FASTAPI_TEMPLATE = os.path.join(REPO_ROOT, "mz-template-fastapi", "mz-template-fastapi")
+BFF_BACKEND = os.path.join(REPO_ROOT, "mz-template-react-fastapi-bff", "mz-template-react-fastapi-bff", "backend")
+
+BENCH_CLIENT_ID = "bench-client-id"
+BENCH_TENANT_ID = "bench-tenant"
+
+
+def use_fastapi_template(aad_instance: str = "http://127.0.0.1:9", **overrides) -> str:
+    env = {
+        "DATABASE_URL": "",
+        "STORAGE_ACCOUNT_URL": "",
+        "ENTRA_TENANT_ID": BENCH_TENANT_ID,
+        "ENTRA_CLIENT_ID": BENCH_CLIENT_ID,
+        "ENTRA_SCOPE": "access_as_user",
+        "AAD_INSTANCE": aad_instance,
+        # The limiter still runs on every request, it just never rejects one
+        "RATE_LIMIT_DEFAULT": "1000000/s",
+    }
+    env.update(overrides)
+    for name, value in env.items():
+        os.environ.setdefault(name, value)
+    return _add_path(FASTAPI_TEMPLATE)
+
+
+def use_bff_backend(api_key: str = "bench-api-key", **overrides) -> str:
+    env = {
+        "API_KEY": api_key,
+        "ENTRA_CLIENT_ID": BENCH_CLIENT_ID,
+        "ENTRA_SCOPE": "api://bench/access_as_user",
+        "RATE_LIMIT_DEFAULT": "1000000/s",
+    }
+    env.update(overrides)
+    for name, value in env.items():
+        os.environ.setdefault(name, value)
+    return _add_path(BFF_BACKEND)
+
+
+def _add_path(path: str) -> str:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    # Static mounts are resolved relative to the working directory
+    os.chdir(path)
+    return path
@@ -0,0 +1,44 @@
+"""
+Local RS256 access token minter, signs Entra ID shaped tokens with the stub IdP keys.
+"""
+import base64
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def mint_token(private_key, kid: str, audience: str, tenant_id: str, lifetime: int = 3600,
+               claims: Optional[Dict[str, Any]] = None) -> str:
+    now = int(time.time())
+    payload = {
+        "aud": audience,
+        "iss": f"https://login.microsoftonline.com/{tenant_id}/v2.0",
+        "iat": now,
+        "nbf": now,
+        "exp": now + lifetime,
+        "sub": uuid.uuid4().hex,
+        "oid": str(uuid.uuid4()),
+        "tid": tenant_id,
+        "name": "Benchmark User",
+        "preferred_username": "benchmark@example.com",
+        "roles": ["ROLE_USER"],
+        "scp": "access_as_user",
+    }
+    payload.update(claims or {})
+    header = {"alg": "RS256", "typ": "JWT", "kid": kid}
+
+    signing_input = (
+        _b64url(json.dumps(header, separators=(",", ":")).encode("utf-8"))
+        + "."
+        + _b64url(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    )
+    signature = private_key.sign(signing_input.encode("ascii"), padding.PKCS1v15(), hashes.SHA256())
+    return f"{signing_input}.{_b64url(signature)}"
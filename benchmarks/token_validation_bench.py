@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of the per-request bearer token validation cost.
+
+Compares the original AzureADAuthorization path (python-jose decoding the unverified
+claims and header separately, then re-parsing the PEM key on every jwt.decode) with the
+parse-once TokenValidator path, with and without the verified-token cache.
+
+    python benchmarks/token_validation_bench.py [--iterations 2000]
+"""
+import argparse
+import asyncio
+import base64
+import time
+
+import rsa
+from jose import jwt
+
+from stub_idp import StubIdentityProvider
+from template_env import BENCH_CLIENT_ID, BENCH_TENANT_ID, use_fastapi_template
+from token_minter import mint_token
+
+LEGACY_OPTIONS = {
+    'require_aud': True, 'require_exp': True, 'require_iss': True, 'require_iat': True,
+    'require_nbf': True, 'require_sub': True, 'verify_aud': True, 'verify_exp': True,
+    'verify_iat': True, 'verify_iss': True, 'verify_nbf': True, 'verify_sub': True,
+}
+
+
+def _legacy_pem(jwk: dict) -> bytes:
+    def decode(value: str) -> int:
+        return int.from_bytes(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)), "big")
+    return rsa.PublicKey(decode(jwk['n']), decode(jwk['e'])).save_pkcs1()
+
+
+def legacy_validate(token: str, pem_keys: dict, check_scopes_and_roles: bool) -> dict:
+    """The validation steps performed per request before the parse-once pipeline"""
+    claims = jwt.get_unverified_claims(token)
+    assert claims.get('aud') == BENCH_CLIENT_ID or claims.get('tid') == BENCH_TENANT_ID
+    if check_scopes_and_roles:
+        jwt.get_unverified_claims(token).get('scp', '').split(' ')
+        jwt.get_unverified_claims(token).get('roles')
+    kid = jwt.get_unverified_header(token)['kid']
+    return jwt.decode(token=token, key=pem_keys[kid], algorithms=["RS256"], audience=BENCH_CLIENT_ID,
+                      options=LEGACY_OPTIONS)
+
+
+def _report(name: str, iterations: int, elapsed: float, baseline: float = None) -> float:
+    per_call = elapsed / iterations * 1e6
+    speedup = f"  ({baseline / per_call:5.1f}x)" if baseline else ""
+    print(f"{name:<48} {per_call:10.1f} us/request{speedup}")
+    return per_call
+
+
+async def run(iterations: int) -> None:
+    with StubIdentityProvider(tenant=BENCH_TENANT_ID) as idp:
+        use_fastapi_template(aad_instance=idp.aad_instance)
+        from starlette.requests import Request
+        from src.authorization.azure_authorization import AzureADAuthorization
+        from src.authorization.token_cache import VerifiedTokenCache
+
+        kid = idp.current_kid
+        token = mint_token(idp.private_keys[kid], kid, BENCH_CLIENT_ID, BENCH_TENANT_ID)
+        pem_keys = {jwk['kid']: _legacy_pem(jwk) for jwk in idp.jwks()['keys']}
+        request = Request({'type': 'http', 'headers': [(b'authorization', f'Bearer {token}'.encode())]})
+
+        uncached = AzureADAuthorization(token_cache=VerifiedTokenCache(max_size=0))
+        cached = AzureADAuthorization(key_manager=uncached.key_manager)
+        await uncached.key_manager.refresh()
+
+        legacy_base = None
+        for check in (False, True):
+            label = "legacy python-jose" + (" + scope/role checks" if check else "")
+            started = time.perf_counter()
+            for _ in range(iterations):
+                legacy_validate(token, pem_keys, check)
+            legacy = _report(label, iterations, time.perf_counter() - started)
+            legacy_base = legacy_base or legacy
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await uncached(request)
+        _report("parse-once validator (cache disabled)", iterations, time.perf_counter() - started, legacy_base)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            await cached(request)
+        _report("parse-once validator + verified-token cache", iterations, time.perf_counter() - started,
+                legacy_base)
+
+        await uncached.key_manager.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    asyncio.run(run(parser.parse_args().iterations))
@@ -0,0 +1,76 @@
+"""
+Per-request overhead of the trace id middleware.
+
+Compares a bare FastAPI app, the original `@app.middleware("http")` hook (Starlette
+BaseHTTPMiddleware) and the pure ASGI TraceContextMiddleware.
+
+    python benchmarks/trace_middleware_bench.py [--iterations 20000]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import asgi_driver
+from template_env import use_fastapi_template
+
+
+def build_apps():
+    use_fastapi_template()
+    from fastapi import FastAPI, Request
+    from src.observability.trace_context import trace_id_var
+    from src.observability.trace_middleware import TraceContextMiddleware
+
+    def base_app() -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/ping")
+        async def ping():
+            return {"status": "ok", "trace_id": trace_id_var.get()}
+
+        return app
+
+    bare = base_app()
+
+    legacy = base_app()
+
+    @legacy.middleware("http")
+    async def add_trace_id(request: Request, call_next):
+        trace_id = request.headers.get("X-Trace-ID", str(uuid.uuid4()))
+        request.state.trace_id = trace_id
+        trace_id_var.set(trace_id)
+        return await call_next(request)
+
+    asgi = base_app()
+    asgi.add_middleware(TraceContextMiddleware)
+    return {"no middleware": bare, "@app.middleware(\"http\") hook": legacy, "TraceContextMiddleware": asgi}
+
+
+async def measure(app, iterations: int, headers: dict) -> float:
+    for _ in range(200):
+        await asgi_driver.call(app, "GET", "/ping", headers)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await asgi_driver.call(app, "GET", "/ping", headers)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def run(iterations: int) -> None:
+    apps = build_apps()
+    scenarios = {
+        "no upstream id": {},
+        "traceparent": {"traceparent": "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"},
+    }
+    for scenario, headers in scenarios.items():
+        print(f"\n{scenario}")
+        baseline = None
+        for name, app in apps.items():
+            per_request = await measure(app, iterations, headers)
+            baseline = baseline if baseline is not None else per_request
+            print(f"  {name:<34} {per_request:8.1f} us/request  (+{per_request - baseline:6.1f} us)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    asyncio.run(run(parser.parse_args().iterations))
@@ -0,0 +1,38 @@
+"""
+python -m src [--host 0.0.0.0] [--port 80] [--workers N]
+    Serve the app: a gunicorn master preloads it and forks uvicorn workers (plain uvicorn
+    where gunicorn cannot run). Without --workers or SERVER_WORKERS, the worker count is
+    sized from the container's CPU and memory limits.
+
+python -m src --profile-startup [--profile-path /api/v1/healthcheck/live]
+    Start one worker in a fresh interpreter, serve a single request and report the time
+    spent in the imports (per package and per module), each app construction and
+    lifespan step, and the request itself.
+"""
+import argparse
+import sys
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m src", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=80)
+    parser.add_argument("--workers", type=int, help="worker processes (default: SERVER_WORKERS, or sized from the limits)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report the import and initialization time of one worker, then exit")
+    parser.add_argument("--profile-path", help="route requested by --profile-startup (default: the liveness probe)")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        from .config import get_app_config
+        from .observability.startup import profile_startup
+        path = args.profile_path or f"{get_app_config().settings.api_v1_str}/healthcheck/live"
+        return profile_startup(path)
+
+    from .server import run
+    return run(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+from .limits import AdaptiveLimit, parse_group_limits
+from .middleware import DEFAULT_GROUP, AdmissionControlMiddleware
+
+__all__ = ["AdaptiveLimit", "parse_group_limits", "DEFAULT_GROUP", "AdmissionControlMiddleware"]
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque
+
+from ..config.parsers import parse_group_limits  # noqa: F401 - re-exported
+
+# Statuses that mean "the service is overloaded" as much as a slow response does
+_OVERLOAD_STATUSES = frozenset((503, 504))
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit of one route group, adapted to its latency (AIMD).
+
+    The limit starts at `max_limit`. A response slower than `latency_target` (time to the
+    response start), or a 503/504, multiplies it by `backoff`, at most once per
+    `latency_target` so one burst of slow responses counts once. A fast response grows it
+    by 1/limit while at least half of it is in use, i.e. by about one per round of
+    requests. Requests over the limit wait in a FIFO of `queue_size`.
+    """
+
+    def __init__(self, name: str, max_limit: int, min_limit: int, queue_size: int, latency_target: float,
+                 backoff: float = 0.75):
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min(min_limit, max_limit)
+        self.queue_size = queue_size
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._next_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def queue_full(self) -> bool:
+        return len(self._waiters) >= self.queue_size
+
+    def try_acquire(self) -> bool:
+        """Take a slot at once, never past requests already waiting"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return True
+        return False
+
+    async def acquire(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a slot; False when none was handed over in time"""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            # A slot handed over as the timeout fired (Python 3.12+ no longer returns it) is given back
+            self._give_back(waiter)
+            return False
+        except asyncio.CancelledError:
+            # The client went away; give back a slot handed over in the meantime
+            self._give_back(waiter)
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def _give_back(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            self.in_flight -= 1
+            self._wake()
+
+    def release(self, latency: float, status_code: int) -> None:
+        """Give back a slot and adapt the limit to the request's latency and status"""
+        if latency > self.latency_target or status_code in _OVERLOAD_STATUSES:
+            now = time.monotonic()
+            if now >= self._next_decrease:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._next_decrease = now + self.latency_target
+        elif self.in_flight * 2 >= self.limit:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.in_flight += 1
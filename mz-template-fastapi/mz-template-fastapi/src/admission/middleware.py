@@ -0,0 +1,120 @@
+import json
+import time
+from typing import Dict, Optional, Set
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .limits import AdaptiveLimit, parse_group_limits
+from ..config import get_app_config
+from ..observability.metrics import ADMISSION_CONCURRENCY_LIMIT, ADMISSION_QUEUED, ADMISSION_REJECTIONS
+
+DEFAULT_GROUP = "default"
+
+
+class AdmissionControlMiddleware:
+    """
+    Pure ASGI middleware bounding the requests a worker serves at once, per route group.
+
+    The group of `/api/v1/<group>/...` is its feature (`secure`, `files`, `jobs`), anything
+    else goes to `default`; groups in ADMISSION_EXEMPT (the health and metrics routes) are
+    never held back. Each group has an `AdaptiveLimit`: requests over it wait in a short
+    queue, and once the queue is full or the wait is over the request is answered `503`
+    with `Retry-After` without reaching the app. A slow dependency thus only lowers the
+    limit of the groups that use it, and the worker keeps answering the others.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        app_config = get_app_config()
+        self.api_prefix = app_config.settings.api_v1_str.rstrip("/") + "/"
+        self.exempt = set(app_config.settings.admission_exempt)
+        self.max_concurrency = app_config.settings.admission_max_concurrency
+        self.min_concurrency = app_config.settings.admission_min_concurrency
+        self.group_limits = parse_group_limits(app_config.settings.admission_limits)
+        self.queue_size = app_config.settings.admission_queue_size
+        self.queue_timeout = app_config.settings.admission_queue_timeout
+        self.latency_target = app_config.settings.admission_latency_target
+        self.limits: Dict[str, AdaptiveLimit] = {}
+        self._groups: Optional[Set[str]] = None
+        self._rejection_headers = [
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(app_config.settings.admission_retry_after).encode("latin-1")),
+        ]
+        self._rejection_body = json.dumps({"detail": "Server overloaded, retry later."}).encode("utf-8")
+
+    def _route_groups(self, scope: Scope) -> Set[str]:
+        # The first path segment of every API route, so unknown paths cannot add groups
+        groups = set()
+        for route in getattr(getattr(scope.get("app"), "router", None), "routes", ()):
+            path = getattr(route, "path", "")
+            if path.startswith(self.api_prefix):
+                groups.add(path[len(self.api_prefix):].split("/", 1)[0])
+        return groups
+
+    def _group(self, scope: Scope) -> Optional[str]:
+        path = scope["path"]
+        if not path.startswith(self.api_prefix):
+            return DEFAULT_GROUP
+        segment = path[len(self.api_prefix):].split("/", 1)[0]
+        if segment in self.exempt:
+            return None
+        if self._groups is None:
+            self._groups = self._route_groups(scope)
+        return segment if segment in self._groups else DEFAULT_GROUP
+
+    def _limit(self, group: str) -> AdaptiveLimit:
+        limit = self.limits.get(group)
+        if limit is None:
+            max_limit, latency_target = self.group_limits.get(group, (None, None))
+            limit = AdaptiveLimit(group, max_limit or self.max_concurrency, self.min_concurrency, self.queue_size,
+                                  latency_target or self.latency_target)
+            self.limits[group] = limit
+            ADMISSION_CONCURRENCY_LIMIT.set(limit.limit, group)
+        return limit
+
+    async def _reject(self, send: Send, group: str, reason: str) -> None:
+        ADMISSION_REJECTIONS.inc(group, reason)
+        await send({"type": "http.response.start", "status": 503, "headers": self._rejection_headers})
+        await send({"type": "http.response.body", "body": self._rejection_body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        group = self._group(scope)
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._limit(group)
+        if not limit.try_acquire():
+            if limit.queue_full():
+                await self._reject(send, group, "queue_full")
+                return
+            ADMISSION_QUEUED.inc(group)
+            try:
+                admitted = await limit.acquire(self.queue_timeout)
+            finally:
+                ADMISSION_QUEUED.dec(group)
+            if not admitted:
+                await self._reject(send, group, "queue_timeout")
+                return
+
+        started = time.perf_counter()
+        latency = None
+        status_code = 500
+
+        async def send_with_latency(message: Message) -> None:
+            nonlocal latency, status_code
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - started
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_latency)
+        finally:
+            previous = limit.limit
+            limit.release(latency if latency is not None else time.perf_counter() - started, status_code)
+            if limit.limit != previous:
+                ADMISSION_CONCURRENCY_LIMIT.set(limit.limit, group)
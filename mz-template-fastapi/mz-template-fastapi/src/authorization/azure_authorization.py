@@ -1,55 +1,195 @@
-import base64
+import asyncio
+import hashlib
 import logging
-import requests
-import rsa
-from typing import Any, Dict, Mapping, Optional, Union
+import os
+from typing import Any, Mapping, Optional
 from fastapi import HTTPException, Request, status
 from fastapi.security import OAuth2AuthorizationCodeBearer
-from jose import jwt
-from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+from pydantic import ValidationError
 
+from .key_manager import JwksKeyManager
 from .models.user import User
-from ..config import get_app_config
+from .token_cache import VerifiedTokenCache
+from .token_validator import ParsedToken, TokenValidationError, TokenValidator
+from .verification_executor import SignatureVerificationExecutor, VerificationPoolSaturated
+from ..config import LazilyConfigured, Settings, configured_attribute, get_app_config
+from ..observability.metrics import AUTH_FAILURES, AUTH_TOKEN_CACHE_LOOKUPS, registry
+from ..shared import SharedSlotTable, SharedSnapshot, get_shared_state_dir, shared_memory_supported
 
 
 log = logging.getLogger()
 
-app_config = get_app_config()
-entra_aad_instance = app_config.get_aad_instance()
-entra_tenant_id = app_config.get_entra_tenant_id()
-entra_scope = app_config.get_scope_name()
-entra_client_id = app_config.get_entra_client_id()
-role_contributor = app_config.get_app_contributor_role()
-role_user = app_config.get_app_user_role()
-role_member = app_config.get_app_member_role()
-role_admin = app_config.get_app_admin_role()
+# Settings applied again, without a restart, when AppConfig reloads
+_RELOADED_SETTINGS = ('aad_instance', 'entra_tenant_id', 'entra_client_id', 'entra_scope', 'scope_name')
+
 
 class InvalidAuthorization(HTTPException):
     def __init__(self, detail: Any = None) -> None:
+        AUTH_FAILURES.inc(type(self).__name__)
         super().__init__(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail, headers={"WWW-Authenticate": "Bearer"})
 
 
-class AzureADAuthorization(OAuth2AuthorizationCodeBearer):
-    aad_jwt_keys_cache: dict = {}
-
-    def __init__(self, aad_instance: str = entra_aad_instance, aad_tenant: str = entra_tenant_id, auto_error: bool = True):
+class AuthorizationUnavailable(HTTPException):
+    def __init__(self, detail: Any = None, retry_after: int = 1) -> None:
+        AUTH_FAILURES.inc(type(self).__name__)
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+def _shared_state_path(name: str) -> Optional[str]:
+    """
+    Path of a file in the shared state directory, None when the shared auth cache is disabled
+    """
+    app_config = get_app_config()
+    if app_config.settings.auth_shared_cache not in ('jwks', 'all') or not shared_memory_supported():
+        return None
+    try:
+        return os.path.join(get_shared_state_dir(app_config.settings.shared_state_dir), name)
+    except OSError as e:
+        log.warning(f"Shared auth cache disabled, unable to use the shared state directory: {e}")
+        return None
+
+
+def _build_shared_snapshot(metadata_url: str) -> Optional[SharedSnapshot]:
+    """
+    JWKS snapshot shared by every worker process of the host
+    """
+    digest = hashlib.sha256(metadata_url.encode('utf-8')).hexdigest()[:16]
+    path = _shared_state_path(f"jwks-{digest}.json")
+    if path is None:
+        return None
+    try:
+        return SharedSnapshot(path)
+    except OSError as e:
+        log.warning(f"Shared JWKS snapshot disabled: {e}")
+        return None
+
+
+def _build_shared_token_table(metadata_url: str, audience: str) -> Optional[SharedSlotTable]:
+    """
+    Verified-token table shared by every worker process of the host.
+    The table is per audience, tokens verified for another one are never shared.
+    """
+    app_config = get_app_config()
+    if app_config.settings.auth_shared_cache != 'all':
+        return None
+    digest = hashlib.sha256(f"{metadata_url}\0{audience}".encode('utf-8')).hexdigest()[:16]
+    path = _shared_state_path(f"verified-tokens-{digest}.bin")
+    if path is None:
+        return None
+    try:
+        return SharedSlotTable(path, slots=app_config.settings.auth_shared_token_slots)
+    except OSError as e:
+        log.warning(f"Shared token cache disabled: {e}")
+        return None
+
+
+class AzureADAuthorization(LazilyConfigured, OAuth2AuthorizationCodeBearer):
+    """
+    Entra ID bearer token dependency.
+
+    Construction only records the arguments: the settings, caches, key manager and
+    verification pool are built from AppConfig on first use (the first request, the
+    OpenAPI document or a readiness check), so importing the module reads no
+    configuration and the module level `authorize` costs nothing until the app runs.
+
+    When a settings reload changes the tenant, client ID or scope, the validator and the
+    verified-token cache are rebuilt; the signing keys are kept unless the tenant changed.
+    """
+    model = configured_attribute()
+    base_auth_url = configured_attribute()
+    token_cache = configured_attribute()
+    key_manager = configured_attribute()
+    validator = configured_attribute()
+    verifier = configured_attribute()
+
+    def __init__(self, aad_instance: Optional[str] = None, aad_tenant: Optional[str] = None, auto_error: bool = True,
+                 token_cache: Optional[VerifiedTokenCache] = None, key_manager: Optional[JwksKeyManager] = None,
+                 verifier: Optional[SignatureVerificationExecutor] = None):
         self.scopes = [""]
         self.roles = [""]
-        self.base_auth_url: str = f"{aad_instance}/{aad_tenant}"
+        self.scheme_name = "oauth2"
+        self.auto_error = auto_error
+        self._aad_instance = aad_instance
+        self._aad_tenant = aad_tenant
+        self._token_cache = token_cache
+        self._key_manager = key_manager
+        self._verifier = verifier
+
+    def _configure(self) -> None:
+        app_config = get_app_config()
+        aad_instance = self._aad_instance if self._aad_instance is not None else app_config.settings.aad_instance
+        aad_tenant = self._aad_tenant if self._aad_tenant is not None else app_config.settings.entra_tenant_id
+        self.base_auth_url = f"{aad_instance}/{aad_tenant}"
+        metadata_url = f"{self.base_auth_url}/v2.0/.well-known/openid-configuration"
+        # A reload with the same tenant keeps the signing keys already fetched
+        previous_key_manager = self.__dict__.get('key_manager')
+        if previous_key_manager is not None and previous_key_manager.metadata_url != metadata_url:
+            previous_key_manager = None
+        # The shared files are only mapped for the cache and key manager actually built here
+        self.token_cache = self._token_cache if self._token_cache is not None else VerifiedTokenCache(
+            max_size=app_config.settings.auth_token_cache_size,
+            shared=_build_shared_token_table(metadata_url, app_config.settings.entra_client_id),
+            user_factory=self._get_user_from_token)
+        self.key_manager = self._key_manager or previous_key_manager or JwksKeyManager(
+            metadata_url=metadata_url,
+            refresh_interval=app_config.settings.auth_jwks_refresh_interval,
+            negative_ttl=app_config.settings.auth_jwks_negative_ttl,
+            min_refresh_interval=app_config.settings.auth_jwks_min_refresh_interval,
+            request_timeout=app_config.settings.auth_jwks_request_timeout,
+            shared_snapshot=_build_shared_snapshot(metadata_url))
+        self.validator = TokenValidator(
+            audience=app_config.settings.entra_client_id,
+            tenant_id=app_config.settings.entra_tenant_id,
+            required_scopes=self.scopes,
+            required_roles=self.roles)
+        if 'verifier' not in self.__dict__:
+            self.verifier = self._verifier if self._verifier is not None else SignatureVerificationExecutor(
+                mode=app_config.settings.auth_verify_mode,
+                max_workers=app_config.settings.auth_verify_workers,
+                max_pending=app_config.settings.auth_verify_max_pending)
         super(AzureADAuthorization, self).__init__(
             authorizationUrl=f"{self.base_auth_url}/oauth2/v2.0/authorize",
             tokenUrl=f"{self.base_auth_url}/oauth2/v2.0/token",
             refreshUrl=f"{self.base_auth_url}/oauth2/v2.0/token",
             scheme_name="oauth2",
-            scopes={ entra_scope: 'Access API as user'},
-            auto_error=auto_error
+            scopes={app_config.settings.scope_name: 'Access API as user'},
+            auto_error=self.auto_error
         )
 
+    def _reload(self, previous: Settings, settings: Settings) -> None:
+        if all(getattr(previous, name) == getattr(settings, name) for name in _RELOADED_SETTINGS):
+            return
+        key_manager = self.key_manager
+        self._configure()
+        if self.key_manager is not key_manager:
+            self._close_later(key_manager)
+        log.info(f"Authorization reconfigured for {self.base_auth_url}, verified tokens dropped")
+
+    @staticmethod
+    def _close_later(key_manager: JwksKeyManager) -> None:
+        try:
+            asyncio.get_running_loop().create_task(key_manager.aclose())
+        except RuntimeError:
+            pass  # No event loop (the gunicorn master): nothing of it is running
+
     async def __call__(self, request: Request) -> User:
         token: str = await super(AzureADAuthorization, self).__call__(request) or ''
-        self._validate_token_aud(token)
-        decoded_token = self._decode_token(token)
-        return self._get_user_from_token(decoded_token)
+
+        # Repeat tokens were already fully validated, skip straight to the cached user
+        cached = self.token_cache.get(token)
+        if cached is not None:
+            return cached.user
+
+        # Split and decode the token once, every check below works on the parsed token
+        parsed_token = self._parse_token(token)
+        self._validate_token_aud(parsed_token)
+        self._validate_token_scopes(parsed_token)
+        self._validate_token_roles(parsed_token)
+        key = await self._get_token_key(parsed_token)
+        decoded_token = await self._decode_token(parsed_token, key)
+        user = self._get_user_from_token(decoded_token)
+        self.token_cache.put(token, decoded_token, user)
+        return user
 
     @staticmethod
     def _get_user_from_token(decoded_token: Mapping) -> User:
@@ -59,170 +199,101 @@ class AzureADAuthorization(OAuth2AuthorizationCodeBearer):
             logging.debug(e)
             raise InvalidAuthorization(detail='Unable to extract user details from token')
 
-        return User(
-            id=user_id,
-            name=decoded_token.get('name', ''),
-            preferred_username=decoded_token.get('preferred_username', ''),
-            roles=decoded_token.get('roles', [])
-        )
+        try:
+            return User(
+                id=user_id,
+                name=decoded_token.get('name', ''),
+                preferred_username=decoded_token.get('preferred_username', ''),
+                roles=decoded_token.get('roles', [])
+            )
+        except ValidationError as e:
+            # Signed, but with claims of the wrong type, e.g. `"roles": null`
+            logging.debug(e)
+            raise InvalidAuthorization(detail='Unable to extract user details from token')
 
-    @staticmethod
-    def _get_validation_options() -> Dict[str, bool]:
-        return {
-            'require_aud': True,
-            'require_exp': True,
-            'require_iss': True,
-            'require_iat': True,
-            'require_nbf': True,
-            'require_sub': True,
-            'verify_aud': True,
-            'verify_exp': True,
-            'verify_iat': True,
-            'verify_iss': True,
-            'verify_nbf': True,
-            'verify_sub': True,
-        }
-
-    def _validate_token_scopes(self, token: str):
+    def _parse_token(self, token: str) -> ParsedToken:
+        try:
+            return self.validator.parse(token)
+        except TokenValidationError as e:
+            log.debug(f'Malformed token: {e.detail}')
+            raise InvalidAuthorization(e.detail)
+
+    def _validate_token_scopes(self, parsed_token: ParsedToken):
         """
         Validate that the requested scopes are in the tokens claims
         """
         try:
-            claims = jwt.get_unverified_claims(token) or {}
-        except Exception as e:
-            log.debug(f'Malformed token: {token}, {e}')
-            raise InvalidAuthorization('Malformed token received')
+            self.validator.validate_scopes(parsed_token)
+        except TokenValidationError as e:
+            raise InvalidAuthorization(e.detail)
 
-        try:
-            token_scopes = claims.get('scp', '').split(' ')
-        except:
-            log.debug(f'Malformed scopes')
-            raise InvalidAuthorization('Malformed scopes')
-
-        for scope in self.scopes:
-            if scope not in token_scopes:
-                raise InvalidAuthorization('Missing a required scope')
-    
-    def _validate_token_roles(self, token: str):
+    def _validate_token_roles(self, parsed_token: ParsedToken):
         """
         Validate that the requested roles are in the tokens claims
         """
         try:
-            claims = jwt.get_unverified_claims(token) or {}
-        except Exception as e:
-            log.debug(f'Malformed token: {token}, {e}')
-            raise InvalidAuthorization('Malformed token received')
+            self.validator.validate_roles(parsed_token)
+        except TokenValidationError as e:
+            raise InvalidAuthorization(e.detail)
 
-        try:
-            token_roles = claims.get('roles')
-        except:
-            log.debug(f'Malformed roles')
-            raise InvalidAuthorization('Malformed roles')
-
-        for role in self.roles:
-            if role not in token_roles:
-                raise InvalidAuthorization('Missing a required role')
-    
-    def _validate_token_aud(self, token: str):
+    def _validate_token_aud(self, parsed_token: ParsedToken):
         """
         Validate that the requested aud are in the tokens claims
         """
         try:
-            claims = jwt.get_unverified_claims(token) or {}
-        except Exception as e:
-            log.debug(f'Malformed token: {token}, {e}')
-            raise InvalidAuthorization('Malformed token received')
+            self.validator.validate_aud(parsed_token)
+        except TokenValidationError as e:
+            raise InvalidAuthorization(e.detail)
+
+    async def _get_token_key(self, parsed_token: ParsedToken) -> Any:
+        key_id = parsed_token.key_id
+        if not key_id or not isinstance(key_id, str):
+            raise InvalidAuthorization("The token does not contain a valid 'kid' in its header.")
+
+        # Get the corresponding key from the key manager
+        key = await self.key_manager.get_key(key_id)
+        if not key:
+            raise InvalidAuthorization("Unable to retrieve the key for token validation.")
+        return key
 
+    async def _decode_token(self, parsed_token: ParsedToken, key: Any) -> Mapping:
         try:
-            token_aud = claims.get('aud')
-            token_tid = claims.get('tid')
-        except:
-            log.debug(f'Malformed aud')
-            raise InvalidAuthorization('Malformed aud')
+            # Cheap claim checks first, so expired tokens never reach the signature verification
+            self.validator.validate_claims(parsed_token)
+            await self.verifier.verify(self.validator, parsed_token, key)
+            return parsed_token.claims
 
-        if token_aud not in entra_client_id and token_tid not in entra_tenant_id:
-                raise InvalidAuthorization('Missing a required aud')
+        # Too many verifications already queued, shed the request instead of growing the backlog
+        except VerificationPoolSaturated as e:
+            log.debug(f"Rejecting token validation: {e}")
+            raise AuthorizationUnavailable("Token validation is temporarily overloaded, retry shortly.")
 
-    @staticmethod
-    def _get_key_id(token: str) -> Optional[str]:
-        headers = jwt.get_unverified_header(token)
-        return headers['kid'] if headers and 'kid' in headers else None
-
-    @staticmethod
-    def _ensure_b64padding(key: str) -> str:
-        """
-        The base64 encoded keys are not always correctly padded, so pad with the right number of =
-        """
-        key = key.encode('utf-8')
-        missing_padding = len(key) % 4
-        for _ in range(missing_padding):
-            key = key + b'='
-        return key
-
-    def _cache_aad_keys(self) -> None:
-        """
-        Cache all AAD JWT keys - so we don't have to make a web call each auth request
-        """
-        response = requests.get(f"{self.base_auth_url}/v2.0/.well-known/openid-configuration")
-        aad_metadata = response.json() if response.ok else None
-        jwks_uri = aad_metadata['jwks_uri'] if aad_metadata and 'jwks_uri' in aad_metadata else None
-        if jwks_uri:
-            response = requests.get(jwks_uri)
-            keys = response.json() if response.ok else None
-            if keys and 'keys' in keys:
-                for key in keys['keys']:
-                    n = int.from_bytes(base64.urlsafe_b64decode(self._ensure_b64padding(key['n'])), "big")
-                    e = int.from_bytes(base64.urlsafe_b64decode(self._ensure_b64padding(key['e'])), "big")
-                    pub_key = rsa.PublicKey(n, e)
-                    # Cache the PEM formatted public key.
-                    AzureADAuthorization.aad_jwt_keys_cache[key['kid']] = pub_key.save_pkcs1()
-
-    def _get_token_key(self, key_id: str) -> str:
-        if key_id not in AzureADAuthorization.aad_jwt_keys_cache:
-            self._cache_aad_keys()
-        return AzureADAuthorization.aad_jwt_keys_cache[key_id]
-
-    def _decode_token(self, token: str) -> Mapping:
-        try:
-            # Retrieve the key ID from the token's header
-            key_id = self._get_key_id(token)
-            if not key_id:
-                raise InvalidAuthorization("The token does not contain a valid 'kid' in its header.")
-
-            # Get the corresponding key from the cache
-            key = self._get_token_key(key_id)
-            if not key:
-                raise InvalidAuthorization("Unable to retrieve the key for token validation.")
-
-            # Decode the token with validation options
-            options = self._get_validation_options()
-            return jwt.decode(token=token, key=key, algorithms=["RS256"], audience=entra_client_id, options=options)
-
-        # Handle invalid claims in the token
-        except JWTClaimsError as e:
-            log.debug(f"Invalid token claims: {e}")
-            raise InvalidAuthorization("The token has invalid claims.")
-
-        # Handle expired token signature
-        except ExpiredSignatureError as e:
-            log.debug(f"The token signature has expired: {e}")
-            raise InvalidAuthorization("The token has expired.")
-
-        # Handle specific failure from _get_key_id (e.g., invalid headers)
-        except JWTError as e:
-            if "header" in str(e).lower():
-                log.debug(f"Error decoding token headers: {e}")
-                raise InvalidAuthorization("Error decoding token headers.")
-            else:
-                log.debug(f"Invalid token: {e}")
-                raise InvalidAuthorization("The token is invalid.")
+        except TokenValidationError as e:
+            log.debug(f"Token rejected: {e.detail}")
+            raise InvalidAuthorization(e.detail)
 
         # Catch unexpected errors
         except Exception as e:
             log.debug(f"Unexpected error while decoding token: {e}")
             raise InvalidAuthorization("Unable to decode the token.")
 
-
+    async def aclose(self) -> None:
+        if not self.settings_applied:
+            return
+        await self.key_manager.aclose()
+        self.verifier.shutdown()
 
 
 authorize = AzureADAuthorization()
+
+
+def _collect_token_cache_metrics() -> None:
+    if not authorize.settings_applied:
+        return
+    stats = authorize.token_cache.stats()
+    AUTH_TOKEN_CACHE_LOOKUPS.set_total(stats['hits'], 'hit')
+    AUTH_TOKEN_CACHE_LOOKUPS.set_total(stats['shared_hits'], 'shared_hit')
+    AUTH_TOKEN_CACHE_LOOKUPS.set_total(stats['misses'], 'miss')
+
+
+registry.register_collector(_collect_token_cache_metrics)
@@ -0,0 +1,298 @@
+import asyncio
+import base64
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional
+
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPublicNumbers
+
+from ..observability.metrics import JWKS_FETCHES, JWKS_FETCH_DURATION, JWKS_SHARED_LOADS
+from ..shared import SharedSnapshot
+
+if TYPE_CHECKING:
+    import httpx
+
+
+log = logging.getLogger()
+
+
+def _ensure_b64padding(key: str) -> bytes:
+    """
+    The base64 encoded keys are not always correctly padded, so pad with the right number of =
+    """
+    encoded = key.encode('utf-8')
+    return encoded + b'=' * (-len(encoded) % 4)
+
+
+def parse_jwk(jwk: Mapping) -> RSAPublicKey:
+    """
+    Convert an RSA JWK into a public key object, parsed once at load time and reused by every validation
+    """
+    if jwk.get('kty', 'RSA') != 'RSA':
+        raise ValueError(f"Unsupported key type {jwk.get('kty')}")
+    n = int.from_bytes(base64.urlsafe_b64decode(_ensure_b64padding(jwk['n'])), "big")
+    e = int.from_bytes(base64.urlsafe_b64decode(_ensure_b64padding(jwk['e'])), "big")
+    return RSAPublicNumbers(e, n).public_key()
+
+
+class JwksKeyManager:
+    """
+    Async JWKS cache for the Entra ID signing keys.
+
+    - keys are fetched with a pooled `httpx.AsyncClient`, never blocking the event loop
+    - concurrent misses share one in-flight fetch (single-flight)
+    - unknown kids are negatively cached, and forced fetches are rate limited, so a burst of
+      tokens with forged kids cannot turn into a burst of outbound calls
+    - a background task refreshes the keys before they rotate
+    - when the IdP is unreachable the last known keys keep being served
+    - with a `shared_snapshot`, the JWKS fetched by one worker process warms all the others
+    """
+
+    def __init__(self,
+                 metadata_url: str,
+                 refresh_interval: float = 3600,
+                 negative_ttl: float = 300,
+                 min_refresh_interval: float = 30,
+                 request_timeout: float = 5,
+                 max_unknown_kids: int = 10000,
+                 client: Optional['httpx.AsyncClient'] = None,
+                 shared_snapshot: Optional[SharedSnapshot] = None):
+        self.metadata_url = metadata_url
+        self.refresh_interval = refresh_interval
+        self.negative_ttl = negative_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.request_timeout = request_timeout
+        self.max_unknown_kids = max_unknown_kids
+        self.shared_snapshot = shared_snapshot
+
+        self._client = client
+        self._owns_client = client is None
+        self._keys: Dict[str, RSAPublicKey] = {}
+        self._unknown_kids: Dict[str, float] = {}
+        self._inflight: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_attempt: float = 0.0
+        self.last_success: float = 0.0
+        self._fetched_at: float = 0.0
+        self._force_next = False
+
+        self.fetch_count = 0
+        self.shared_loads = 0
+        self.fetch_errors = 0
+        self.last_fetch_duration = 0.0
+        self.negative_hits = 0
+
+    @property
+    def keys(self) -> Mapping[str, RSAPublicKey]:
+        return self._keys
+
+    def age(self) -> Optional[float]:
+        """Seconds since the keys were last refreshed successfully, None if never"""
+        return time.monotonic() - self.last_success if self.last_success else None
+
+    def _get_client(self) -> 'httpx.AsyncClient':
+        if self._client is None:
+            # Imported by the first fetch, keeping httpx off the startup path
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=self.request_timeout,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=2))
+        return self._client
+
+    async def get_key(self, key_id: str) -> Optional[RSAPublicKey]:
+        self.start()
+
+        key = self._keys.get(key_id)
+        if key is not None:
+            return key
+
+        now = time.monotonic()
+        negative_until = self._unknown_kids.get(key_id)
+        if negative_until is not None:
+            if negative_until > now:
+                self.negative_hits += 1
+                return None
+            del self._unknown_kids[key_id]
+
+        # Only force a fetch if we have not just fetched, otherwise the kid is genuinely unknown
+        if not self._keys or now - self._last_attempt >= self.min_refresh_interval:
+            await self.refresh()
+            key = self._keys.get(key_id)
+            if key is not None:
+                return key
+
+        self._remember_unknown(key_id, now)
+        return None
+
+    def _remember_unknown(self, key_id: str, now: float) -> None:
+        if len(self._unknown_kids) >= self.max_unknown_kids:
+            self._unknown_kids = {kid: until for kid, until in self._unknown_kids.items() if until > now}
+            if len(self._unknown_kids) >= self.max_unknown_kids:
+                return
+        self._unknown_kids[key_id] = now + self.negative_ttl
+
+    async def refresh(self, force: bool = True) -> None:
+        """
+        Fetch the keys, coalescing concurrent callers into a single request.
+
+        A forced refresh (unknown kid) only accepts keys fetched by another worker within
+        `min_refresh_interval`, a scheduled one accepts anything newer than the current keys.
+        """
+        if self._inflight is None:
+            self._force_next = force
+            self._inflight = asyncio.ensure_future(self._refresh_keys())
+            self._inflight.add_done_callback(self._clear_inflight)
+        await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, _: asyncio.Future) -> None:
+        self._inflight = None
+
+    async def _refresh_keys(self) -> bool:
+        self._last_attempt = time.monotonic()
+        if self.shared_snapshot is None:
+            return await self._fetch_keys()
+
+        if self._load_shared():
+            return True
+        if not self.shared_snapshot.try_lock():
+            # Another worker is already fetching, wait for it to publish instead of fetching again
+            deadline = time.monotonic() + self.request_timeout * 2
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                if self._load_shared():
+                    return True
+            return await self._fetch_keys()
+        try:
+            # The lock owner may have published right before we got the lock
+            return self._load_shared() or await self._fetch_keys()
+        finally:
+            self.shared_snapshot.unlock()
+
+    def _load_shared(self) -> bool:
+        try:
+            snapshot = self.shared_snapshot.read()
+            if not snapshot or snapshot['fetched_at'] <= self._fetched_at:
+                return False
+            age = time.time() - snapshot['fetched_at']
+            max_age = self.min_refresh_interval if self._force_next and self._keys else self.refresh_interval
+            if age > max_age:
+                return False
+            keys = self._parse_keys(snapshot['keys'])
+        except Exception as e:
+            log.debug(f"Ignoring shared JWKS snapshot: {e}")
+            return False
+
+        self._install_keys(keys, snapshot['fetched_at'])
+        self.shared_loads += 1
+        JWKS_SHARED_LOADS.inc()
+        return True
+
+    @staticmethod
+    def _parse_keys(jwks: List[Mapping]) -> Dict[str, RSAPublicKey]:
+        keys = {}
+        for jwk in jwks:
+            try:
+                keys[jwk['kid']] = parse_jwk(jwk)
+            except Exception as e:
+                log.debug(f"Skipping unusable JWK {jwk.get('kid')}: {e}")
+        if not keys:
+            raise ValueError('JWKS document does not contain any usable key')
+        return keys
+
+    def _install_keys(self, keys: Dict[str, RSAPublicKey], fetched_at: float) -> None:
+        self._keys = keys
+        self._unknown_kids = {kid: until for kid, until in self._unknown_kids.items() if kid not in keys}
+        self._fetched_at = fetched_at
+        self.last_success = time.monotonic() - max(time.time() - fetched_at, 0)
+
+    async def _fetch_keys(self) -> bool:
+        self.fetch_count += 1
+        started = time.perf_counter()
+        try:
+            if self._client is None:
+                # Importing httpx and loading the CA bundle take a while, keep them off the event loop
+                await asyncio.to_thread(self._get_client)
+            client = self._get_client()
+            response = await client.get(self.metadata_url)
+            response.raise_for_status()
+            jwks_uri = response.json().get('jwks_uri')
+            if not jwks_uri:
+                raise ValueError('OpenID metadata does not contain a jwks_uri')
+
+            response = await client.get(jwks_uri)
+            response.raise_for_status()
+            jwks = response.json().get('keys', [])
+            keys = self._parse_keys(jwks)
+        except Exception as e:
+            self.fetch_errors += 1
+            JWKS_FETCHES.inc('error')
+            if self._keys:
+                log.warning(f"Unable to refresh JWKS, serving {len(self._keys)} stale keys: {e}")
+            else:
+                log.error(f"Unable to fetch JWKS: {e}")
+            return False
+        finally:
+            self.last_fetch_duration = time.perf_counter() - started
+            JWKS_FETCH_DURATION.observe(self.last_fetch_duration)
+
+        JWKS_FETCHES.inc('success')
+        fetched_at = time.time()
+        self._install_keys(keys, fetched_at)
+        if self.shared_snapshot is not None:
+            try:
+                self.shared_snapshot.write({'fetched_at': fetched_at, 'keys': jwks})
+            except Exception as e:
+                log.warning(f"Unable to publish the JWKS to the other workers: {e}")
+        return True
+
+    def start(self) -> None:
+        """
+        Start the background refresher, needs a running event loop
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        retry_delay = self.min_refresh_interval
+        while True:
+            if self.last_success:
+                # Jitter so that several workers do not refresh at the same instant
+                due = self.last_success + self.refresh_interval * random.uniform(0.8, 0.9)
+                await asyncio.sleep(max(due - time.monotonic(), 0))
+            try:
+                await self.refresh(force=False)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.debug(f"Background JWKS refresh failed: {e}")
+            if time.monotonic() - self.last_success > self.refresh_interval * 0.9:
+                # The last refresh failed, retry with a capped backoff instead of waiting a full interval
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.refresh_interval / 4)
+            else:
+                retry_delay = self.min_refresh_interval
+
+    async def aclose(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._refresh_task = None
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'keys': len(self._keys),
+            'unknown_kids': len(self._unknown_kids),
+            'fetch_count': self.fetch_count,
+            'shared_loads': self.shared_loads,
+            'fetch_errors': self.fetch_errors,
+            'negative_hits': self.negative_hits,
+            'last_fetch_duration': self.last_fetch_duration,
+            'age': self.age(),
+        }
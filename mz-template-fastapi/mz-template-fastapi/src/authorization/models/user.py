@@ -1,9 +1,15 @@
 from typing import List
 
+from pydantic import BaseModel, ConfigDict, Field
 
-class User:
-    def __init__(self, id, name='', preferred_username='', roles=None):
-        self.id = id
-        self.name = name
-        self.preferred_username = preferred_username
-        self.roles = roles if roles is not None else []
\ No newline at end of file
+
+class User(BaseModel):
+    """
+    The authenticated caller, built once per verified token and shared by the cache
+    """
+    model_config = ConfigDict(frozen=True)
+
+    id: str
+    name: str = ''
+    preferred_username: str = ''
+    roles: List[str] = Field(default_factory=list)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from .models.user import User
+from ..shared import SharedSlotTable
+
+
+log = logging.getLogger()
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    claims: Mapping
+    user: User
+    expires_at: float
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of already verified bearer tokens.
+
+    Entries are keyed by the SHA-256 digest of the raw token (the token itself is never
+    stored) and expire at the token's own `exp` claim, so a cached result is never served
+    for longer than the token would have been accepted by a full validation.
+
+    With a `shared` slot table, verified claims are also published to the other worker
+    processes of the host, and local misses are looked up there before validating again.
+    """
+
+    def __init__(self, max_size: int = 10000, shared: Optional[SharedSlotTable] = None,
+                 user_factory: Optional[Callable[[Mapping], User]] = None):
+        self.max_size = max_size
+        self.shared = shared if user_factory is not None else None
+        self.user_factory = user_factory
+        self._entries: "OrderedDict[bytes, CachedToken]" = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        if self.max_size <= 0:
+            return None
+
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._get_shared(key)
+            if entry is None:
+                self.misses += 1
+            return entry
+
+        if entry.expires_at <= time.time():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def _get_shared(self, key: bytes) -> Optional[CachedToken]:
+        if self.shared is None:
+            return None
+        try:
+            payload = self.shared.get(key)
+            if payload is None:
+                return None
+            claims = json.loads(payload)
+            entry = CachedToken(claims=claims, user=self.user_factory(claims), expires_at=float(claims['exp']))
+        except Exception as e:
+            log.debug(f"Ignoring unusable shared token cache entry: {e}")
+            return None
+
+        self.shared_hits += 1
+        self._store(key, entry)
+        return entry
+
+    def put(self, token: str, claims: Mapping, user: User) -> None:
+        if self.max_size <= 0:
+            return
+
+        expires_at = claims.get('exp')
+        if not isinstance(expires_at, (int, float)) or expires_at <= time.time():
+            return
+
+        key = self._key(token)
+        self._store(key, CachedToken(claims=claims, user=user, expires_at=float(expires_at)))
+        if self.shared is not None:
+            try:
+                self.shared.put(key, json.dumps(claims, separators=(',', ':')).encode('utf-8'), float(expires_at))
+            except Exception as e:
+                log.debug(f"Unable to publish token to the shared cache: {e}")
+
+    def _store(self, key: bytes, entry: CachedToken) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'shared': self.shared is not None,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': ((self.hits + self.shared_hits) / lookups) if lookups else 0.0,
+        }
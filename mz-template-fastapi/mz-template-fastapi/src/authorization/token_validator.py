@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+import time
+from typing import Any, Iterable, Mapping
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+
+
+class TokenValidationError(Exception):
+    """
+    Raised when a token is rejected, `detail` is safe to return to the client
+    """
+    def __init__(self, detail: str) -> None:
+        super().__init__(detail)
+        self.detail = detail
+
+
+class ParsedToken:
+    """
+    A bearer token split and base64 decoded once, shared by every validation step
+    """
+    __slots__ = ('header', 'claims', 'signing_input', 'signature')
+
+    def __init__(self, header: Mapping, claims: Mapping, signing_input: bytes, signature: bytes):
+        self.header = header
+        self.claims = claims
+        self.signing_input = signing_input
+        self.signature = signature
+
+    @property
+    def key_id(self) -> Any:
+        return self.header.get('kid')
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+class TokenValidator:
+    """
+    Single pass RS256 access token validation.
+
+    The token is parsed once with `parse`, then the cheap claim checks run before the
+    signature is verified against a pre-parsed `RSAPublicKey`. The claim requirements
+    mirror the python-jose options previously used (aud, exp, iss, iat, nbf and sub are
+    all required, with aud, exp and nbf verified).
+    """
+    REQUIRED_CLAIMS = ('aud', 'exp', 'iss', 'iat', 'nbf', 'sub')
+    ALGORITHM = 'RS256'
+
+    def __init__(self, audience: str, tenant_id: str, required_scopes: Iterable[str] = (),
+                 required_roles: Iterable[str] = (), leeway: int = 0):
+        self.audience = audience
+        self.tenant_id = tenant_id
+        self.required_scopes = [scope for scope in required_scopes if scope]
+        self.required_roles = [role for role in required_roles if role]
+        self.leeway = leeway
+        self._padding = padding.PKCS1v15()
+        self._hash = hashes.SHA256()
+
+    @staticmethod
+    def parse(token: str) -> ParsedToken:
+        try:
+            header_segment, claims_segment, signature_segment = token.split('.')
+            header = json.loads(_b64url_decode(header_segment))
+            claims = json.loads(_b64url_decode(claims_segment))
+            signature = _b64url_decode(signature_segment)
+        except (ValueError, TypeError, binascii.Error):
+            raise TokenValidationError('Malformed token received')
+
+        if not isinstance(header, dict):
+            raise TokenValidationError('Error decoding token headers.')
+        if not isinstance(claims, dict):
+            raise TokenValidationError('Malformed token received')
+
+        signing_input = f'{header_segment}.{claims_segment}'.encode('ascii')
+        return ParsedToken(header, claims, signing_input, signature)
+
+    def validate_aud(self, parsed: ParsedToken) -> None:
+        token_aud = parsed.claims.get('aud')
+        token_tid = parsed.claims.get('tid')
+        audiences = token_aud if isinstance(token_aud, list) else [token_aud]
+        if self.audience not in audiences and token_tid != self.tenant_id:
+            raise TokenValidationError('Missing a required aud')
+
+    def validate_scopes(self, parsed: ParsedToken) -> None:
+        if not self.required_scopes:
+            return
+        token_scopes = parsed.claims.get('scp', '')
+        if not isinstance(token_scopes, str):
+            raise TokenValidationError('Malformed scopes')
+        token_scopes = token_scopes.split(' ')
+        for scope in self.required_scopes:
+            if scope not in token_scopes:
+                raise TokenValidationError('Missing a required scope')
+
+    def validate_roles(self, parsed: ParsedToken) -> None:
+        if not self.required_roles:
+            return
+        token_roles = parsed.claims.get('roles')
+        if not isinstance(token_roles, list):
+            raise TokenValidationError('Malformed roles')
+        for role in self.required_roles:
+            if role not in token_roles:
+                raise TokenValidationError('Missing a required role')
+
+    def verify_signature(self, parsed: ParsedToken, key: RSAPublicKey) -> None:
+        if parsed.header.get('alg') != self.ALGORITHM:
+            raise TokenValidationError('The token is invalid.')
+        try:
+            key.verify(parsed.signature, parsed.signing_input, self._padding, self._hash)
+        except InvalidSignature:
+            raise TokenValidationError('The token is invalid.')
+
+    def validate_claims(self, parsed: ParsedToken, now: float = None) -> None:
+        claims = parsed.claims
+        for claim in self.REQUIRED_CLAIMS:
+            if claim not in claims:
+                raise TokenValidationError('The token has invalid claims.')
+
+        now = time.time() if now is None else now
+        exp, nbf, iat = claims['exp'], claims['nbf'], claims['iat']
+        if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in (exp, nbf, iat)):
+            raise TokenValidationError('The token has invalid claims.')
+        if exp < now - self.leeway:
+            raise TokenValidationError('The token has expired.')
+        if nbf > now + self.leeway:
+            raise TokenValidationError('The token has invalid claims.')
+
+        audiences = claims['aud'] if isinstance(claims['aud'], list) else [claims['aud']]
+        if self.audience not in audiences:
+            raise TokenValidationError('The token has invalid claims.')
+        if not isinstance(claims['sub'], str):
+            raise TokenValidationError('The token has invalid claims.')
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+
+from .token_validator import ParsedToken, TokenValidationError, TokenValidator
+from ..observability.metrics import (
+    AUTH_VERIFY_CAPACITY, AUTH_VERIFY_IN_FLIGHT, AUTH_VERIFY_QUEUE_WAIT, AUTH_VERIFY_REJECTIONS)
+
+
+log = logging.getLogger()
+
+MODES = ('inline', 'thread', 'process')
+
+
+class VerificationPoolSaturated(Exception):
+    """
+    Raised when too many signature verifications are already queued
+    """
+
+
+@lru_cache(maxsize=32)
+def _load_public_key(der: bytes) -> RSAPublicKey:
+    return serialization.load_der_public_key(der)
+
+
+def _verify_in_process(der: bytes, signing_input: bytes, signature: bytes, submitted_at: float) -> Tuple[bool, float]:
+    # time.monotonic is system wide on Linux, so the wait can be measured across processes
+    queue_wait = time.monotonic() - submitted_at
+    try:
+        _load_public_key(der).verify(signature, signing_input, padding.PKCS1v15(), hashes.SHA256())
+        return True, queue_wait
+    except InvalidSignature:
+        return False, queue_wait
+
+
+class SignatureVerificationExecutor:
+    """
+    Runs the CPU bound RS256 signature verification off the event loop.
+
+    - `inline` verifies on the event loop (no overhead, the default)
+    - `thread` uses a bounded thread pool
+    - `process` uses a bounded process pool, keys are shipped as DER and parsed once per worker
+
+    At most `max_workers + max_pending` verifications are admitted at once; beyond that
+    `VerificationPoolSaturated` is raised straight away instead of queueing without limit.
+    """
+
+    def __init__(self, mode: str = 'inline', max_workers: int = 2, max_pending: int = 64):
+        if mode not in MODES:
+            raise ValueError(f"Unknown verification mode '{mode}', expected one of {MODES}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self._executor: Optional[Executor] = None
+        self._der_cache: Dict[int, Tuple[RSAPublicKey, bytes]] = {}
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        # Only verifications that went through the pool measured a queue wait
+        self.waits_recorded = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        AUTH_VERIFY_CAPACITY.set(0 if mode == 'inline' else self.max_workers + self.max_pending)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='jwt-verify')
+        return self._executor
+
+    def _key_der(self, key: RSAPublicKey) -> bytes:
+        cached = self._der_cache.get(id(key))
+        if cached is None or cached[0] is not key:
+            if len(self._der_cache) >= 64:
+                self._der_cache.clear()
+            der = key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+            cached = self._der_cache[id(key)] = (key, der)
+        return cached[1]
+
+    def _record_wait(self, queue_wait: float) -> None:
+        self.waits_recorded += 1
+        self.queue_wait_total += queue_wait
+        AUTH_VERIFY_QUEUE_WAIT.observe(queue_wait)
+        if queue_wait > self.queue_wait_max:
+            self.queue_wait_max = queue_wait
+
+    async def verify(self, validator: TokenValidator, parsed_token: ParsedToken, key: RSAPublicKey) -> None:
+        if self.mode == 'inline':
+            validator.verify_signature(parsed_token, key)
+            return
+
+        if self.in_flight >= self.max_workers + self.max_pending:
+            self.rejected += 1
+            AUTH_VERIFY_REJECTIONS.inc()
+            raise VerificationPoolSaturated(f'{self.in_flight} signature verifications already in flight')
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        AUTH_VERIFY_IN_FLIGHT.inc()
+        try:
+            if self.mode == 'process':
+                if parsed_token.header.get('alg') != validator.ALGORITHM:
+                    raise TokenValidationError('The token is invalid.')
+                valid, queue_wait = await loop.run_in_executor(
+                    self._get_executor(), _verify_in_process, self._key_der(key),
+                    parsed_token.signing_input, parsed_token.signature, time.monotonic())
+                self._record_wait(queue_wait)
+                if not valid:
+                    raise TokenValidationError('The token is invalid.')
+            else:
+                submitted_at = time.monotonic()
+
+                def verify_in_thread() -> float:
+                    queue_wait = time.monotonic() - submitted_at
+                    validator.verify_signature(parsed_token, key)
+                    return queue_wait
+
+                try:
+                    queue_wait = await loop.run_in_executor(self._get_executor(), verify_in_thread)
+                except TokenValidationError:
+                    self._record_wait(time.monotonic() - submitted_at)
+                    raise
+                self._record_wait(queue_wait)
+        finally:
+            self.in_flight -= 1
+            AUTH_VERIFY_IN_FLIGHT.dec()
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'waits_recorded': self.waits_recorded,
+            'queue_wait_avg': (self.queue_wait_total / self.waits_recorded) if self.waits_recorded else 0.0,
+            'queue_wait_max': self.queue_wait_max,
+        }
@@ -0,0 +1,5 @@
+from .decorators import VARY_NONE, VARY_ROLES, VARY_USER, cache_key, cache_scope, cached, invalidates
+from .response_cache import CachedResponse, ResponseCache, parse_cache_ttls, response_cache
+
+__all__ = ["VARY_NONE", "VARY_ROLES", "VARY_USER", "cache_key", "cache_scope", "cached", "invalidates",
+           "CachedResponse", "ResponseCache", "parse_cache_ttls", "response_cache"]
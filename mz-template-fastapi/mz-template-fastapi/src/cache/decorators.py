@@ -0,0 +1,180 @@
+import functools
+import hashlib
+import inspect
+from typing import Any, Callable, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from starlette.responses import Response
+
+from .response_cache import CachedResponse, body_etag, response_cache
+from ..authorization.authorize import get_user
+from ..authorization.models.user import User
+from ..web.responses import FastJSONResponse
+
+# What a route's responses vary on, besides the path and the query parameters
+VARY_NONE = "none"
+VARY_USER = "user"
+VARY_ROLES = "roles"
+
+_REQUEST_PARAM = "_cache_request"
+_USER_PARAM = "_cache_user"
+_UNCACHED_HEADERS = frozenset(("content-length", "etag", "cache-control"))
+
+
+def cache_scope(vary: str, user: Optional[User]) -> str:
+    if vary == VARY_USER:
+        return user.id
+    if vary == VARY_ROLES:
+        return ",".join(sorted(user.roles))
+    return ""
+
+
+def cache_key(route: str, request: Request, scope: str) -> bytes:
+    """Digest of the route, the path, the query parameters in a canonical order and the scope"""
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return hashlib.blake2b(f"{route}\0{request.url.path}\0{query}\0{scope}".encode("utf-8"), digest_size=16).digest()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: a compressed response carries the weak form of the same tag
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+async def _serialize(result: Any, request: Request) -> bytes:
+    """
+    The JSON body FastAPI would have sent for `result`: validated and filtered through the
+    route's `response_model` (and its `response_model_*` options) when it declares one
+    """
+    route = request.scope.get("route")
+    field = getattr(route, "response_field", None)
+    if field is None:
+        return FastJSONResponse(jsonable_encoder(result)).body
+    content = await serialize_response(
+        field=field,
+        response_content=result,
+        include=route.response_model_include,
+        exclude=route.response_model_exclude,
+        by_alias=route.response_model_by_alias,
+        exclude_unset=route.response_model_exclude_unset,
+        exclude_defaults=route.response_model_exclude_defaults,
+        exclude_none=route.response_model_exclude_none)
+    return FastJSONResponse(content).body
+
+
+async def _to_entry(result: Any, request: Request, generation: Tuple[int, int], expires_at: float) -> Any:
+    """The rendered, cacheable form of an endpoint's result, or the result itself when it cannot be cached"""
+    if isinstance(result, Response):
+        if result.status_code != 200 or not hasattr(result, "body"):
+            return result  # Errors and streams (exports, downloads) are never cached
+        headers = tuple((name, value) for name, value in result.headers.items() if name not in _UNCACHED_HEADERS)
+        body = bytes(result.body)
+    else:
+        body = await _serialize(result, request)
+        headers = (("content-type", "application/json"),)
+    return CachedResponse(body=body, status_code=200, media_type=None, headers=headers, etag=body_etag(body),
+                          generation=generation, expires_at=expires_at)
+
+
+def _render(entry: CachedResponse, request: Request, result: str) -> Response:
+    headers = {"etag": entry.etag, "cache-control": "private, no-cache", "x-cache": result.upper()}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    headers.update(entry.headers)
+    return Response(content=entry.body, status_code=entry.status_code, headers=headers)
+
+
+def _find_parameter(signature: inspect.Signature, annotation: type) -> Optional[str]:
+    for parameter in signature.parameters.values():
+        if parameter.annotation is annotation:
+            return parameter.name
+    return None
+
+
+def _with_context(endpoint: Callable, need_user: bool,
+                  handler: Callable[[Callable, dict, Request, Optional[User]], Any]) -> Callable:
+    """
+    Wrap `endpoint` so that `handler(endpoint, kwargs, request, user)` runs instead, adding
+    a `Request` and a `get_user` parameter to its signature when it does not have them
+    """
+    signature = inspect.signature(endpoint)
+    request_name = _find_parameter(signature, Request)
+    user_name = _find_parameter(signature, User) if need_user else None
+    extra = []
+    if request_name is None:
+        extra.append(inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+    if need_user and user_name is None:
+        extra.append(inspect.Parameter(_USER_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=User,
+                                       default=Depends(get_user)))
+
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs):
+        request = kwargs[request_name] if request_name else kwargs.pop(_REQUEST_PARAM)
+        user = None
+        if need_user:
+            user = kwargs[user_name] if user_name else kwargs.pop(_USER_PARAM)
+        return await handler(endpoint, kwargs, request, user)
+
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), *extra])
+    return wrapper
+
+
+def cached(route: str, ttl: float = 30.0, vary: str = VARY_USER) -> Callable[[Callable], Callable]:
+    """
+    Cache the responses of a GET endpoint for `ttl` seconds (RESPONSE_CACHE_TTLS overrides
+    it per route), keyed by path, query parameters and, per `vary`, the user or its roles:
+
+        @router.get("/", response_model=PaginatedResponse)
+        @cached("secure", ttl=30)
+        async def get_all_paginated(...)
+
+    The route's dependencies (authentication, rate limits, validation) still run on every
+    request, only the endpoint body is skipped. The result is validated and serialized
+    through the route's `response_model` before it is cached, as FastAPI does for an
+    uncached response. Responses carry a strong ETag and are answered `304` when the
+    client already has them. Only `200` responses are cached, never streams.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        async def handler(endpoint: Callable, kwargs: dict, request: Request, user: Optional[User]) -> Any:
+            ttl_seconds = response_cache.ttl_for(route, ttl)
+            if ttl_seconds <= 0:
+                return await endpoint(**kwargs)
+            scope = cache_scope(vary, user)
+
+            async def compute(generation: Tuple[int, int], expires_at: float) -> Any:
+                return await _to_entry(await endpoint(**kwargs), request, generation, expires_at)
+
+            entry, result = await response_cache.get_or_compute(
+                cache_key(route, request, scope), route, scope, ttl_seconds, compute)
+            if not isinstance(entry, CachedResponse):
+                return entry
+            return _render(entry, request, result)
+
+        return _with_context(endpoint, need_user=vary != VARY_NONE, handler=handler)
+    return decorator
+
+
+def invalidates(route: str, vary: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Invalidate the cached responses of `route` in every worker once the endpoint returns
+    without error: all of them, or with `vary` only those of the caller (its user or roles)
+
+        @router.post("/")
+        @invalidates("secure", vary=VARY_USER)
+        async def create_item(...)
+
+    `response_cache.invalidate(route, scope)` does the same from anywhere else.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        async def handler(endpoint: Callable, kwargs: dict, request: Request, user: Optional[User]) -> Any:
+            result = await endpoint(**kwargs)
+            response_cache.invalidate(route, cache_scope(vary, user) if vary not in (None, VARY_NONE) else None)
+            return result
+
+        return _with_context(endpoint, need_user=vary not in (None, VARY_NONE), handler=handler)
+    return decorator
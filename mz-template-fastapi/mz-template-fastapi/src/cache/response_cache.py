@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+from starlette.responses import Response
+
+from ..config import Settings, get_app_config
+from ..config.parsers import parse_cache_ttls
+from ..observability.metrics import (
+    RESPONSE_CACHE_BYTES, RESPONSE_CACHE_INVALIDATIONS, RESPONSE_CACHE_LOOKUPS, registry)
+from ..shared import SharedCounters, get_shared_state_dir, shared_memory_supported
+
+
+log = logging.getLogger(__name__)
+
+_ALL_SCOPES = "*"
+_RESULTS = ("hit", "miss", "coalesced")
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    status_code: int
+    media_type: Optional[str]
+    headers: Tuple[Tuple[str, str], ...]
+    etag: str
+    generation: Tuple[int, int]
+    expires_at: float
+
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class ResponseCache:
+    """
+    Rendered GET responses per route and key, with a TTL per route and one LRU bounded in
+    bytes for all the routes of the worker.
+
+    Concurrent misses of the same key are coalesced: the first request computes the
+    response, the others wait for it. `invalidate` bumps a generation counter per route
+    (or per route and scope, e.g. a user) kept in shared memory, so an invalidation made
+    by one worker process drops the entries of every worker: each entry remembers the
+    generations it was computed under. The settings are read on first use, and the TTLs
+    follow a settings reload: entries already cached keep the expiry they were stored with.
+    """
+
+    def __init__(self):
+        self.configured = False
+        self.enabled = True
+        self.max_bytes = 0
+        self.max_entry_bytes = 0
+        self.ttls: Dict[str, float] = {}
+        self._entries: "OrderedDict[bytes, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._shared: Optional[SharedCounters] = None
+        self._local_generations: Dict[bytes, int] = {}
+
+    def _configure(self) -> None:
+        app_config = get_app_config()
+        self.enabled = app_config.settings.response_cache_enabled
+        self.max_bytes = app_config.settings.response_cache_max_mb * 1024 * 1024
+        self.max_entry_bytes = app_config.settings.response_cache_max_entry_kb * 1024
+        self.ttls = parse_cache_ttls(app_config.settings.response_cache_ttls)
+        if shared_memory_supported():
+            try:
+                directory = get_shared_state_dir(app_config.settings.shared_state_dir)
+                self._shared = SharedCounters(os.path.join(directory, "response-cache-generations.bin"))
+            except OSError as e:
+                log.warning(f"Response cache invalidations are per worker, unable to use the shared state directory: {e}")
+        app_config.on_reload(self._reload)
+        self.configured = True
+
+    def _reload(self, previous: Settings, settings: Settings) -> None:
+        self.ttls = parse_cache_ttls(settings.response_cache_ttls)
+        self.enabled = settings.response_cache_enabled
+        if not self.enabled:
+            self.clear()
+
+    def ttl_for(self, route: str, default: float) -> float:
+        if not self.configured:
+            self._configure()
+        if not self.enabled:
+            return 0.0
+        return self.ttls.get(route, default)
+
+    @staticmethod
+    def _generation_key(route: str, scope: str) -> bytes:
+        return hashlib.blake2b(f"{route}\0{scope}".encode("utf-8"), digest_size=16).digest()
+
+    def _generation_value(self, key: bytes) -> int:
+        if self._shared is not None:
+            return self._shared.get(key)
+        return self._local_generations.get(key, 0)
+
+    def generation(self, route: str, scope: str) -> Tuple[int, int]:
+        return (self._generation_value(self._generation_key(route, _ALL_SCOPES)),
+                self._generation_value(self._generation_key(route, scope)))
+
+    def invalidate(self, route: str, scope: Optional[str] = None) -> None:
+        """
+        Drop the cached responses of `route` in every worker: all of them, or only those of
+        `scope` (the user id or the roles the route's responses vary on)
+        """
+        if not self.configured:
+            self._configure()
+        key = self._generation_key(route, _ALL_SCOPES if scope is None else scope)
+        if self._shared is not None:
+            self._shared.increment(key)
+        else:
+            self._local_generations[key] = self._local_generations.get(key, 0) + 1
+        self._count(route, "invalidation")
+
+    def clear(self) -> None:
+        """Drop every entry of this worker"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _count(self, route: str, result: str) -> None:
+        self._counts[(route, result)] = self._counts.get((route, result), 0) + 1
+
+    def _lookup(self, key: bytes, generation: Tuple[int, int]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at > time.monotonic() and entry.generation == generation:
+            self._entries.move_to_end(key)
+            return entry
+        self._remove(key)
+        return None
+
+    def _remove(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+    def _store(self, key: bytes, entry: CachedResponse) -> None:
+        if len(entry.body) > self.max_entry_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self._bytes += len(entry.body)
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+
+    async def get_or_compute(
+        self, key: bytes, route: str, scope: str, ttl: float,
+        compute: Callable[[Tuple[int, int], float], Awaitable[Union[CachedResponse, Response]]],
+    ) -> Tuple[Union[CachedResponse, Response], str]:
+        """
+        The cached response of `key`, else the one computed by `compute(generation,
+        expires_at)`, computed once however many requests ask for it at the same time.
+        Returns the response and `hit`, `miss` or `coalesced`; responses that cannot be
+        cached (e.g. streams) are returned as they are and never shared.
+        """
+        generation = self.generation(route, scope)
+        entry = self._lookup(key, generation)
+        if entry is not None:
+            self._count(route, "hit")
+            return entry, "hit"
+
+        while key in self._inflight:
+            future = self._inflight[key]
+            try:
+                entry = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                continue  # The request computing it went away, compute it here instead
+            if entry is None:
+                break  # Not cacheable, every request computes its own
+            self._count(route, "coalesced")
+            return entry, "coalesced"
+
+        self._count(route, "miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute(generation, time.monotonic() + ttl)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved, whether or not a request was waiting for it
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if isinstance(result, CachedResponse):
+            self._store(key, result)
+            future.set_result(result)
+        else:
+            future.set_result(None)
+        return result, "miss"
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Lookups per route and result (`hit`, `miss`, `coalesced`) and invalidations"""
+        stats: Dict[str, Dict[str, int]] = {}
+        for (route, result), count in self._counts.items():
+            stats.setdefault(route, {})[result] = count
+        return stats
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+
+def _collect_response_cache_metrics() -> None:
+    for (route, result), count in response_cache._counts.items():
+        if result in _RESULTS:
+            RESPONSE_CACHE_LOOKUPS.set_total(count, route, result)
+        else:
+            RESPONSE_CACHE_INVALIDATIONS.set_total(count, route)
+    RESPONSE_CACHE_BYTES.set(response_cache.size_bytes)
+
+
+registry.register_collector(_collect_response_cache_metrics)
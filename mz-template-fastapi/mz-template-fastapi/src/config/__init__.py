@@ -1,4 +1,8 @@
 from .appconfig import AppConfig, get_app_config
+from .lazy import LazilyConfigured, configured_attribute
+from .reloader import ConfigReloader, config_reloader
+from .settings import Settings, load_settings
 from .swagger_ui_config import SwaggerUiConfig
 
-__all__ = ["AppConfig", "get_app_config", "SwaggerUiConfig"]
\ No newline at end of file
+__all__ = ["AppConfig", "get_app_config", "LazilyConfigured", "configured_attribute", "ConfigReloader",
+           "config_reloader", "Settings", "load_settings", "SwaggerUiConfig"]
\ No newline at end of file
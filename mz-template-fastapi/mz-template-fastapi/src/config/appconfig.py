@@ -1,4 +1,12 @@
-from .settings import Settings
+import logging
+from typing import Callable, List
+
+from pydantic import ValidationError
+
+from .settings import Settings, default_env_file, load_settings
+
+log = logging.getLogger(__name__)
+
 # Singleton pattern to ensure only one instance of AppConfig is created
 _app_config_instance = None
 
@@ -8,55 +16,97 @@ def get_app_config():
         _app_config_instance = AppConfig()
     return _app_config_instance
 
+def changed_settings(previous: Settings, settings: Settings) -> List[str]:
+    """Names of the variables whose value differs between two snapshots"""
+    return [name.upper() for name in Settings.model_fields if getattr(previous, name) != getattr(settings, name)]
+
 class AppConfig:
+    """
+    Holds the current Settings snapshot: read a value with `get_app_config().settings.<field>`.
+    The getters below are kept for the code written before the snapshot.
+
+    `reload()` builds a new snapshot and swaps it in with one assignment, so a caller sees
+    either the old or the new settings, never a mix of both. The listeners registered with
+    `on_reload` then apply the changes to what was built from the old snapshot.
+    """
+
     def __init__(self):
-        self.settings = Settings()  # Instantiate Settings inside AppConfig
+        self.env_file = default_env_file()
+        self.settings = load_settings(self.env_file)
+        for var in self.settings.missing_required_vars():
+            log.error(f"Environment variable '{var}' was not loaded.")
+        self._listeners: List[Callable[[Settings, Settings], None]] = []
+
+    def on_reload(self, listener: Callable[[Settings, Settings], None]) -> None:
+        """Call `listener(previous, settings)` after every reload that changed a value"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def reload(self) -> bool:
+        """
+        Re-read the environment and the `.env` file. An invalid value keeps the current
+        snapshot in place; returns whether anything changed.
+        """
+        try:
+            settings = load_settings(self.env_file)
+        except ValidationError as e:
+            log.error(f"Settings not reloaded, keeping the current ones: {e}")
+            return False
+        previous = self.settings
+        changed = changed_settings(previous, settings)
+        if not changed:
+            log.info("Settings reloaded, nothing changed")
+            return False
+        self.settings = settings
+        log.info(f"Settings reloaded, changed: {', '.join(changed)}")
+        for listener in list(self._listeners):
+            try:
+                listener(previous, settings)
+            except Exception:
+                log.exception(f"Unable to apply the reloaded settings with {listener.__qualname__}")
+        return True
 
     def get_database_url(self):
-        return self.settings.config.get("DATABASE_URL", "DATABASE_URL Not Set")
+        return self.settings.database_url
 
     def get_storage_url(self):
-        return self.settings.config.get("STORAGE_ACCOUNT_URL", "STORAGE_ACCOUNT_URL Not Set")
-    
+        return self.settings.storage_account_url
+
     def get_storage_account_container_name(self):
-        return self.settings.config.get("STORAGE_ACCOUNT_CONTAINER_NAME", "DEFAULT_DOCUMENT_LOCATION")
-    
+        return self.settings.storage_account_container_name
+
     def get_api_v_str(self):
-        return self.settings.config.get("API_V1_STR", "/api/v1")
-    
+        return self.settings.api_v1_str
+
     def get_project_name(self):
-        return self.settings.config.get("PROJECT_NAME", "FastAPI Project Template")
-    
+        return self.settings.project_name
+
     def get_entra_tenant_id(self):
-        return self.settings.config.get("ENTRA_TENANT_ID", "ENTRA_TENANT_ID Not Set")
-    
+        return self.settings.entra_tenant_id
+
     def get_entra_client_id(self):
-        return self.settings.config.get("ENTRA_CLIENT_ID", "ENTRA_CLIENT_ID Not Set")
+        return self.settings.entra_client_id
 
     def get_entra_scope(self):
-        return self.settings.config.get("ENTRA_SCOPE", "ENTRA_SCOPE Not Set")
+        return self.settings.entra_scope
 
     def get_aad_instance(self):
-        return self.settings.config.get("AAD_INSTANCE", "https://login.microsoftonline.com")
+        return self.settings.aad_instance
 
     def get__api_audience(self):
-        app_client_id = self.get_entra_client_id()
-        return self.settings.config.get("API_AUDIENCE", f"api://{app_client_id}")
-    
+        return self.settings.api_audience
+
     def get_scope_name(self):
-        app_client_id = self.get_entra_client_id()
-        app_client_scope = self.get_entra_scope()
-        return self.settings.config.get("SCOPE_NAME",  f"api://{app_client_id}/{app_client_scope}")
-    
+        return self.settings.scope_name
+
     def get_app_user_role(self):
-        return self.settings.config.get("ROLE_USER",  "DEFAULT_APP_USER")
+        return self.settings.role_user
 
     def get_app_contributor_role(self):
-        return self.settings.config.get("ROLE_CONTRIBUTER",  "DEFAULT_APP_CONTRIBUTER")
-    
+        return self.settings.role_contributer
+
     def get_app_member_role(self):
-        return self.settings.config.get("ROLE_MEMBER",  "DEFAULT_APP_MEMBER")
-    
-    def get_app_admin_role(self):
-        return self.settings.config.get("ROLE_ADMIN",  "DEFAULT_APP_ADMIN")
+        return self.settings.role_member
 
+    def get_app_admin_role(self):
+        return self.settings.role_admin
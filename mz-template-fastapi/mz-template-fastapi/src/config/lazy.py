@@ -0,0 +1,55 @@
+from typing import Any, Optional, Type
+
+from .appconfig import get_app_config
+from .settings import Settings
+
+_UNSET = object()
+
+
+class configured_attribute:
+    """
+    Attribute of a `LazilyConfigured` object set by its `_configure`: the first read
+    configures the object, every later read is a plain instance dictionary lookup
+    """
+
+    def __set_name__(self, owner: Type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Optional['LazilyConfigured'], owner: Type) -> Any:
+        if instance is None:
+            return self
+        value = instance.__dict__.get(self.name, _UNSET)
+        if value is _UNSET:
+            instance.ensure_configured()
+            value = instance.__dict__.get(self.name, _UNSET)
+            if value is _UNSET:
+                raise AttributeError(f"'{owner.__name__}._configure' did not set '{self.name}'")
+        return value
+
+    def __set__(self, instance: 'LazilyConfigured', value: Any) -> None:
+        instance.__dict__[self.name] = value
+
+
+class LazilyConfigured:
+    """
+    Reads its settings from AppConfig on first use instead of at construction, so a module
+    level instance reads no configuration when it is imported.
+
+    `_configure` sets the attributes declared with `configured_attribute`, and reading any
+    of them calls `ensure_configured()` first. Once configured, `_reload` is called with the
+    previous and the new settings on every AppConfig reload.
+    """
+    settings_applied = False
+
+    def ensure_configured(self) -> None:
+        if self.settings_applied:
+            return
+        self._configure()
+        self.settings_applied = True
+        get_app_config().on_reload(self._reload)
+
+    def _configure(self) -> None:
+        raise NotImplementedError
+
+    def _reload(self, previous: Settings, settings: Settings) -> None:
+        pass
@@ -0,0 +1,87 @@
+"""
+Parsers of the structured settings (`secure=20/s:40,files=off`, ...).
+
+A leaf module: Settings validates its values with them when it loads, and the packages
+that use the values parse them again, without either importing the other.
+"""
+import re
+from typing import Dict, NamedTuple, Optional, Tuple
+
+_PERIODS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+_LIMIT = re.compile(r"^(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)?([smh])(?::(\d+))?$")
+
+
+class RateLimit(NamedTuple):
+    rate: float   # tokens added per second
+    burst: float  # bucket capacity: requests allowed back to back
+
+
+def parse_rate_limit(value: str) -> Optional[RateLimit]:
+    """
+    `20/s` -> 20 per second, bursts of 20; `600/5m:50` -> 600 per 5 minutes, bursts of 50;
+    `off` -> None (unlimited)
+    """
+    value = value.strip().lower()
+    if value in ("", "off", "none", "0"):
+        return None
+    match = _LIMIT.match(value)
+    if match is None:
+        raise ValueError(f"Invalid rate limit '{value}', expected e.g. '20/s', '600/5m' or '20/s:40'")
+    requests, periods, unit, burst = match.groups()
+    period = float(periods or 1) * _PERIODS[unit]
+    return RateLimit(rate=float(requests) / period, burst=float(burst) if burst else max(float(requests), 1.0))
+
+
+def parse_rate_limits(value: str) -> Dict[str, Optional[RateLimit]]:
+    """
+    `secure=20/s:40,files=off` -> {"secure": RateLimit(20, 40), "files": None}
+    """
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        route, _, limit = item.partition("=")
+        limits[route.strip()] = parse_rate_limit(limit)
+    return limits
+
+
+def parse_queue_concurrency(value: str) -> Dict[str, int]:
+    """
+    `default=4,reports=1` -> {"default": 4, "reports": 1}
+    """
+    concurrency = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, limit = item.partition("=")
+        concurrency[name.strip()] = max(1, int(limit)) if limit.strip() else 1
+    return concurrency
+
+
+def parse_group_limits(value: str) -> Dict[str, Tuple[Optional[int], Optional[float]]]:
+    """
+    `files=16:30,jobs=8` -> {"files": (16, 30.0), "jobs": (8, None)}: the maximum
+    concurrency of the group and, optionally, its latency target in seconds
+    """
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, spec = item.partition("=")
+        maximum, _, target = spec.partition(":")
+        limits[name.strip()] = (max(1, int(maximum)) if maximum.strip() else None,
+                                float(target) if target.strip() else None)
+    return limits
+
+
+def parse_cache_ttls(value: str) -> Dict[str, float]:
+    """
+    `secure=10,files=0` -> {"secure": 10.0, "files": 0.0}; a TTL of 0 disables the route's cache
+    """
+    ttls = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        route, _, ttl = item.partition("=")
+        ttls[route.strip()] = max(0.0, float(ttl))
+    return ttls
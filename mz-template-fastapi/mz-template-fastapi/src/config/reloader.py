@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import os
+import signal
+from typing import Optional
+
+from .appconfig import get_app_config
+
+log = logging.getLogger(__name__)
+
+
+class ConfigReloader:
+    """
+    Reloads the settings of a worker on SIGHUP and, every CONFIG_WATCH_INTERVAL seconds
+    when it is set, whenever the `.env` file changed. Started by the app lifespan; the
+    workers keep their connections, caches and signing keys across a reload.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._handles_signal = False
+        self._mtime: Optional[int] = None
+
+    def start(self) -> None:
+        """
+        Install the SIGHUP handler and start the file watcher, needs a running event loop
+        """
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, "SIGHUP") and not self._handles_signal:
+            try:
+                loop.add_signal_handler(signal.SIGHUP, self.reload)
+                self._handles_signal = True
+            except (NotImplementedError, RuntimeError, ValueError) as e:
+                # Windows event loops, or a loop running outside the main thread
+                log.debug(f"Settings are not reloaded on SIGHUP: {e}")
+        interval = get_app_config().settings.config_watch_interval
+        if interval > 0 and (self._task is None or self._task.done()):
+            self._mtime = self._env_file_mtime()
+            self._task = loop.create_task(self._watch(interval))
+
+    @staticmethod
+    def reload() -> None:
+        get_app_config().reload()
+
+    @staticmethod
+    def _env_file_mtime() -> Optional[int]:
+        try:
+            return os.stat(get_app_config().env_file).st_mtime_ns
+        except OSError:
+            return None
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            mtime = self._env_file_mtime()
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self.reload()
+
+    async def stop(self) -> None:
+        if self._handles_signal:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+            self._handles_signal = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+
+config_reloader = ConfigReloader()
@@ -1,9 +1,52 @@
-import os
-import logging
-from dotenv import load_dotenv
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
 
-class Settings:
-    REQUIRED_VARS = [
+from dotenv import find_dotenv
+from pydantic import Field, ValidationInfo, field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+from typing_extensions import Annotated
+
+from .parsers import parse_cache_ttls, parse_group_limits, parse_queue_concurrency, parse_rate_limit, parse_rate_limits
+
+# Comma separated values, e.g. TRACING_EXCLUDED_URLS=/healthcheck,/metrics
+CommaSeparated = Annotated[Tuple[str, ...], NoDecode]
+
+
+def _split(value) -> Tuple[str, ...]:
+    if isinstance(value, str):
+        value = value.split(",")
+    return tuple(item.strip() for item in value if item.strip())
+
+
+# Structured settings and their parser
+_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "jobs_queues": parse_queue_concurrency,
+    "rate_limit_default": parse_rate_limit,
+    "rate_limits": parse_rate_limits,
+    "admission_limits": parse_group_limits,
+    "response_cache_ttls": parse_cache_ttls,
+}
+
+
+def default_env_file() -> str:
+    """The `.env` found from this package upwards (as `load_dotenv()` did), else `.env` of the working directory"""
+    return find_dotenv() or ".env"
+
+
+class Settings(BaseSettings):
+    """
+    Immutable, typed snapshot of the environment variables and of the `.env` file.
+
+    Values are parsed and validated once, when the snapshot is built: a malformed value
+    fails the startup instead of the first request reading it, and the derived values
+    (audience, scope name, ...) are computed here rather than by every getter call.
+    AppConfig.reload() replaces the whole snapshot, nothing ever changes one in place.
+    Unset and empty variables take the defaults below.
+    """
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", env_ignore_empty=True,
+                                      extra="ignore", frozen=True)
+
+    REQUIRED_VARS: ClassVar[List[str]] = [
         "DATABASE_URL",
         "STORAGE_ACCOUNT_URL",
         "ENTRA_TENANT_ID",
@@ -12,16 +55,177 @@ class Settings:
         "AAD_INSTANCE"
         ]
 
-    def __init__(self):
-        self.config = {}
-        self.load_env_variables()
+    database_url: str = "DATABASE_URL Not Set"
+    storage_account_url: str = "STORAGE_ACCOUNT_URL Not Set"
+    storage_account_container_name: str = "DEFAULT_DOCUMENT_LOCATION"
+    api_v1_str: str = "/api/v1"
+    project_name: str = "FastAPI Project Template"
+    entra_tenant_id: str = "ENTRA_TENANT_ID Not Set"
+    entra_client_id: str = "ENTRA_CLIENT_ID Not Set"
+    entra_scope: str = "ENTRA_SCOPE Not Set"
+    aad_instance: str = "https://login.microsoftonline.com"
+    # Derived from the client ID and the scope when unset
+    api_audience: str = Field("", validate_default=True)
+    scope_name: str = Field("", validate_default=True)
+    role_user: str = "DEFAULT_APP_USER"
+    role_contributer: str = "DEFAULT_APP_CONTRIBUTER"
+    role_member: str = "DEFAULT_APP_MEMBER"
+    role_admin: str = "DEFAULT_APP_ADMIN"
+
+    config_watch_interval: float = 0.0
+
+    auth_token_cache_size: int = 10000
+    auth_jwks_refresh_interval: float = 3600.0
+    auth_jwks_negative_ttl: float = 300.0
+    auth_jwks_min_refresh_interval: float = 30.0
+    auth_jwks_request_timeout: float = 5.0
+    auth_verify_mode: str = "inline"
+    auth_verify_workers: int = 2
+    auth_verify_max_pending: int = 64
+    auth_shared_cache: str = "jwks"
+    auth_shared_token_slots: int = 4096
+    shared_state_dir: Optional[str] = None
+
+    log_level: str = "INFO"
+    log_queue_size: int = 10000
+    log_batch_size: int = 256
+    service_name: str = Field("", validate_default=True)
+    tracing_exporter: str = "none"
+    tracing_sample_ratio: float = 0.1
+    tracing_excluded_urls: CommaSeparated = ("/healthcheck", "/metrics")
+    tracing_file_path: str = "/data/traces/spans.jsonl"
+    tracing_file_max_bytes: int = 10 * 1024 * 1024
+    tracing_file_backup_count: int = 3
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    metrics_enabled: bool = True
+    metrics_publish_interval: float = 5.0
+    metrics_event_loop_interval: float = 0.5
+
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_pool_acquire_timeout: float = 5.0
+    db_pool_max_inactive_lifetime: float = 300.0
+    db_pool_close_timeout: float = 10.0
+    db_statement_cache_size: int = 256
+    db_command_timeout: float = 30.0
+    pagination_default_page_size: int = 20
+    pagination_max_page_size: int = 100
+    pagination_max_offset: int = 10000
+    export_batch_size: int = 1000
+    export_temp_dir: Optional[str] = None
+
+    storage_account_name: Optional[str] = None
+    storage_account_key: Optional[str] = None
+    storage_account_connection_string: Optional[str] = None
+    storage_block_size: int = 4 * 1024 * 1024
+    storage_max_concurrency: int = 4
+    storage_create_container: bool = False
+
+    jobs_broker: str = "memory"
+    jobs_broker_url: str = "redis://localhost:6379/0"
+    jobs_result_backend: str = Field("", validate_default=True)
+    jobs_queues: str = "default=4"
+    jobs_max_queued: int = 1000
+    jobs_result_ttl: float = 3600.0
+    jobs_shutdown_timeout: float = 10.0
+    jobs_task_modules: CommaSeparated = ("src.features.services.jobs_service.api.v1.service.tasks",)
+
+    health_check_interval: float = 5.0
+    health_check_timeout: float = 2.0
+    health_jwks_max_age: float = 86400.0
+
+    server_workers: int = 0
+    server_workers_per_cpu: float = 1.0
+    server_worker_memory_mb: int = 256
+    server_keepalive: int = 5
+    server_backlog: int = 2048
+    server_graceful_timeout: int = 20
+    server_drain_delay: float = 0.0
+    server_loop: str = "auto"
+    server_http: str = "auto"
+    server_access_log: bool = False
+
+    rate_limit_default: str = "off"
+    rate_limits: str = ""
+    rate_limit_backend: str = "shared"
+    rate_limit_slots: int = 65536
+    rate_limit_max_keys: int = 100000
+
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 64
+    admission_min_concurrency: int = 4
+    admission_limits: str = ""
+    admission_queue_size: int = 32
+    admission_queue_timeout: float = 1.0
+    admission_latency_target: float = 1.0
+    admission_retry_after: int = 1
+    admission_exempt: CommaSeparated = ("healthcheck", "metrics")
+
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    response_cache_enabled: bool = True
+    response_cache_ttls: str = ""
+    response_cache_max_mb: int = 32
+    response_cache_max_entry_kb: int = 1024
+
+    @field_validator("tracing_excluded_urls", "jobs_task_modules", "admission_exempt", mode="before")
+    @classmethod
+    def _split_comma_separated(cls, value):
+        return _split(value)
+
+    @field_validator("jobs_queues", "rate_limit_default", "rate_limits", "admission_limits", "response_cache_ttls")
+    @classmethod
+    def _parseable(cls, value: str, info: ValidationInfo) -> str:
+        # Parsed once more where they are used; a malformed value fails the load, not every request
+        _PARSERS[info.field_name](value)
+        return value
+
+    @field_validator("log_level")
+    @classmethod
+    def _upper(cls, value: str) -> str:
+        return value.upper()
+
+    @field_validator("auth_verify_mode", "auth_shared_cache", "tracing_exporter", "jobs_broker", "server_loop",
+                     "server_http", "rate_limit_backend")
+    @classmethod
+    def _lower(cls, value: str) -> str:
+        return value.lower()
+
+    @field_validator("tracing_sample_ratio")
+    @classmethod
+    def _clamp_ratio(cls, value: float) -> float:
+        return min(max(value, 0.0), 1.0)
+
+    @field_validator("api_audience")
+    @classmethod
+    def _default_api_audience(cls, value: str, info: ValidationInfo) -> str:
+        return value or f"api://{info.data.get('entra_client_id')}"
+
+    @field_validator("scope_name")
+    @classmethod
+    def _default_scope_name(cls, value: str, info: ValidationInfo) -> str:
+        return value or f"api://{info.data.get('entra_client_id')}/{info.data.get('entra_scope')}"
+
+    @field_validator("service_name")
+    @classmethod
+    def _default_service_name(cls, value: str, info: ValidationInfo) -> str:
+        return value or info.data.get("project_name")
+
+    @field_validator("jobs_result_backend")
+    @classmethod
+    def _default_result_backend(cls, value: str, info: ValidationInfo) -> str:
+        return value or info.data.get("jobs_broker_url")
+
+    def missing_required_vars(self) -> List[str]:
+        return [var for var in self.REQUIRED_VARS if var.lower() not in self.model_fields_set]
 
-    def load_env_variables(self):
-        load_dotenv()  # Load environment variables from .env file
 
-        for var in self.REQUIRED_VARS:
-            value = os.getenv(var)
-            if value is None:
-                logging.error(f"Environment variable '{var}' was not loaded.")
-            else:
-                self.config[var] = value
\ No newline at end of file
+def load_settings(env_file: Optional[str] = None) -> Settings:
+    """
+    Build a snapshot from the environment and `env_file`; environment variables win over
+    the file. Raises pydantic's ValidationError, naming every malformed variable.
+    """
+    return Settings(_env_file=env_file or default_env_file())
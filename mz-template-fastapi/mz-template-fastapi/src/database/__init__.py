@@ -0,0 +1,4 @@
+from .dependencies import get_connection
+from .pool import DatabasePool, DatabaseUnavailable, database, normalize_dsn
+
+__all__ = ["DatabasePool", "DatabaseUnavailable", "database", "get_connection", "normalize_dsn"]
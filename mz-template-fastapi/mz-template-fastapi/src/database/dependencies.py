@@ -0,0 +1,13 @@
+from typing import AsyncIterator
+
+import asyncpg
+
+from .pool import database
+
+
+async def get_connection() -> AsyncIterator[asyncpg.Connection]:
+    """
+    Borrow a pooled connection for the duration of the request
+    """
+    async with database.acquire() as connection:
+        yield connection
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import asyncpg
+from fastapi import HTTPException, status
+
+from ..config import LazilyConfigured, Settings, configured_attribute, get_app_config
+from ..observability.metrics import (
+    DB_POOL_ACQUIRE_TIMEOUTS, DB_POOL_ACQUIRE_WAIT, DB_POOL_IN_USE, DB_POOL_MAX_SIZE, DB_POOL_SIZE, DB_POOL_WAITING,
+    registry)
+
+
+log = logging.getLogger(__name__)
+
+# Attribute of the pool and the setting it defaults to
+_SETTINGS = {
+    'dsn': 'database_url',
+    'min_size': 'db_pool_min_size',
+    'max_size': 'db_pool_max_size',
+    'acquire_timeout': 'db_pool_acquire_timeout',
+    'statement_cache_size': 'db_statement_cache_size',
+    'command_timeout': 'db_command_timeout',
+    'max_inactive_lifetime': 'db_pool_max_inactive_lifetime',
+    'close_timeout': 'db_pool_close_timeout',
+}
+# Changing one of these on a reload opens a new pool, the others apply to the open one
+_POOL_SETTINGS = ('dsn', 'min_size', 'max_size', 'statement_cache_size', 'command_timeout', 'max_inactive_lifetime')
+
+
+class DatabaseUnavailable(HTTPException):
+    def __init__(self, detail: str = "The database is temporarily unavailable, retry shortly.", retry_after: int = 1) -> None:
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+def normalize_dsn(url: str) -> str:
+    """
+    Accept SQLAlchemy style URLs (`postgresql+asyncpg://`) as well as plain libpq ones
+    """
+    scheme, separator, rest = url.partition("://")
+    if not separator:
+        return url
+    return f"{scheme.split('+', 1)[0]}://{rest}"
+
+
+class DatabasePool(LazilyConfigured):
+    """
+    Owns the asyncpg connection pool of the worker process.
+
+    The pool is opened by the app lifespan and drained on shutdown. Connections are
+    borrowed for the duration of a request through the `get_connection` dependency and
+    keep their prepared statements between requests: asyncpg prepares each distinct
+    query once per connection and reuses it from an LRU of `statement_cache_size`
+    entries (set it to 0 behind PgBouncer in transaction mode).
+
+    Acquiring waits at most `acquire_timeout`, after which the request is shed with a
+    503 instead of piling up behind an exhausted pool.
+
+    The settings are read from AppConfig on first use and applied again on a reload: a
+    new DSN or pool size opens a new pool while the old one drains in the background.
+    """
+    dsn = configured_attribute()
+    min_size = configured_attribute()
+    max_size = configured_attribute()
+    acquire_timeout = configured_attribute()
+    statement_cache_size = configured_attribute()
+    command_timeout = configured_attribute()
+    max_inactive_lifetime = configured_attribute()
+    close_timeout = configured_attribute()
+
+    def __init__(self, dsn: Optional[str] = None, min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 acquire_timeout: Optional[float] = None, statement_cache_size: Optional[int] = None,
+                 command_timeout: Optional[float] = None, max_inactive_lifetime: Optional[float] = None,
+                 close_timeout: Optional[float] = None):
+        # The settings are read on first use, importing the module reads no configuration
+        self._arguments = {
+            'dsn': dsn,
+            'min_size': min_size,
+            'max_size': max_size,
+            'acquire_timeout': acquire_timeout,
+            'statement_cache_size': statement_cache_size,
+            'command_timeout': command_timeout,
+            'max_inactive_lifetime': max_inactive_lifetime,
+            'close_timeout': close_timeout,
+        }
+        self._pool: Optional[asyncpg.Pool] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._last_attempt = 0.0
+        self.waiting = 0
+        self.acquisitions = 0
+        self.timeouts = 0
+
+    def _configure(self) -> None:
+        app_config = get_app_config()
+        for name, field in _SETTINGS.items():
+            value = self._arguments[name]
+            setattr(self, name, value if value is not None else getattr(app_config.settings, field))
+        self.dsn = normalize_dsn(self.dsn)
+
+    def _reload(self, previous: Settings, settings: Settings) -> None:
+        if all(getattr(previous, field) == getattr(settings, field) for field in _SETTINGS.values()):
+            return
+        pool_settings = [getattr(self, name) for name in _POOL_SETTINGS]
+        self._configure()
+        if self._pool is None or pool_settings == [getattr(self, name) for name in _POOL_SETTINGS]:
+            return
+        # Connections borrowed from the old pool are returned to it, then it closes
+        pool, self._pool = self._pool, None
+        self._last_attempt = 0.0
+        try:
+            asyncio.get_running_loop().create_task(self._close_pool(pool))
+        except RuntimeError:
+            pool.terminate()
+        log.info("Database settings changed, new connections come from a new pool")
+
+    @property
+    def configured(self) -> bool:
+        return "://" in self.dsn
+
+    @property
+    def pool(self) -> Optional[asyncpg.Pool]:
+        return self._pool
+
+    async def start(self) -> None:
+        """
+        Open the pool; a database that is down at startup is retried on the first request
+        """
+        if not self.configured:
+            log.info("DATABASE_URL is not a connection URL, the database pool is disabled")
+            return
+        try:
+            await self._ensure_pool()
+        except DatabaseUnavailable:
+            pass
+
+    async def ensure_available(self) -> None:
+        """
+        Raise DatabaseUnavailable now rather than midway through a streamed response
+        """
+        await self._ensure_pool()
+
+    async def _ensure_pool(self) -> asyncpg.Pool:
+        if self._pool is not None:
+            return self._pool
+        if not self.configured:
+            raise DatabaseUnavailable("The database is not configured.")
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._pool is not None:
+                return self._pool
+            # Do not hammer a database that is down, one attempt per acquire timeout
+            if time.monotonic() - self._last_attempt < self.acquire_timeout:
+                raise DatabaseUnavailable()
+            self._last_attempt = time.monotonic()
+            try:
+                self._pool = await asyncpg.create_pool(
+                    self.dsn,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    statement_cache_size=self.statement_cache_size,
+                    command_timeout=self.command_timeout,
+                    max_inactive_connection_lifetime=self.max_inactive_lifetime,
+                    timeout=self.acquire_timeout)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+                log.error(f"Unable to open the database pool: {e}")
+                raise DatabaseUnavailable()
+            log.info(f"Database pool opened (min_size={self.min_size}, max_size={self.max_size})")
+            return self._pool
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        pool = await self._ensure_pool()
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            connection = await pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            DB_POOL_ACQUIRE_TIMEOUTS.inc()
+            log.warning(f"No database connection available after {self.acquire_timeout}s, shedding the request")
+            raise DatabaseUnavailable()
+        except (OSError, asyncpg.PostgresConnectionError) as e:
+            log.error(f"Unable to connect to the database: {e}")
+            raise DatabaseUnavailable()
+        finally:
+            self.waiting -= 1
+            DB_POOL_ACQUIRE_WAIT.observe(time.perf_counter() - started)
+        self.acquisitions += 1
+        try:
+            yield connection
+        finally:
+            # Shielded: a request cancelled by a client disconnect must still hand the
+            # connection back (asyncpg rolls back any open transaction on release)
+            await asyncio.shield(pool.release(connection))
+
+    async def ping(self) -> None:
+        """
+        One round trip on a pooled connection, raises DatabaseUnavailable
+        """
+        async with self.acquire() as connection:
+            await connection.fetchval("SELECT 1")
+
+    async def close(self) -> None:
+        """
+        Wait up to `close_timeout` for borrowed connections to come back, then terminate
+        """
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await self._close_pool(pool)
+
+    async def _close_pool(self, pool: asyncpg.Pool) -> None:
+        try:
+            await asyncio.wait_for(pool.close(), timeout=self.close_timeout)
+        except asyncio.TimeoutError:
+            log.warning(f"Database pool did not drain within {self.close_timeout}s, terminating connections")
+            pool.terminate()
+
+    def stats(self) -> dict:
+        pool = self._pool
+        size = pool.get_size() if pool is not None else 0
+        idle = pool.get_idle_size() if pool is not None else 0
+        return {
+            'open': pool is not None,
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'max_size': self.max_size,
+            'waiting': self.waiting,
+            'saturation': (size - idle) / self.max_size if self.max_size else 0.0,
+            'acquisitions': self.acquisitions,
+            'timeouts': self.timeouts,
+        }
+
+
+database = DatabasePool()
+
+
+def _collect_pool_metrics() -> None:
+    stats = database.stats()
+    DB_POOL_SIZE.set(stats['size'])
+    DB_POOL_IN_USE.set(stats['in_use'])
+    DB_POOL_MAX_SIZE.set(stats['max_size'] if stats['open'] else 0)
+    DB_POOL_WAITING.set(stats['waiting'])
+
+
+registry.register_collector(_collect_pool_metrics)
@@ -0,0 +1,5 @@
+from .encoders import CsvEncoder, ExportFormat, NdjsonEncoder, RowEncoder, XlsxEncoder, create_encoder
+from .streaming import ExportStreamingResponse, export_response
+
+__all__ = ["CsvEncoder", "ExportFormat", "NdjsonEncoder", "RowEncoder", "XlsxEncoder", "create_encoder",
+           "ExportStreamingResponse", "export_response"]
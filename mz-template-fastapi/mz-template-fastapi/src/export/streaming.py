@@ -0,0 +1,70 @@
+import logging
+import time
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from ..config import get_app_config
+from ..database import database
+from ..pagination import PageRequest, Paginator
+from ..web.responses import DisconnectAwareStreamingResponse
+from .encoders import ENCODERS, ExportFormat, create_encoder
+
+
+log = logging.getLogger(__name__)
+
+
+async def _stream_rows(export_format: ExportFormat, sql: str, values: Sequence[Any], batch_size: int,
+                       temp_dir: Optional[str]) -> AsyncIterator[bytes]:
+    started = time.perf_counter()
+    exported = 0
+    # Created here so nothing is left behind when the response never starts
+    encoder = create_encoder(export_format, temp_dir=temp_dir)
+    try:
+        # A dedicated connection: the export outlives the request-scoped dependencies
+        async with database.acquire() as connection:
+            # Server-side cursors live inside a transaction; repeatable read gives the
+            # whole export one consistent snapshot
+            async with connection.transaction(isolation="repeatable_read", readonly=True):
+                statement = await connection.prepare(sql)
+                yield encoder.begin([attribute.name for attribute in statement.get_attributes()])
+                cursor = await statement.cursor(*values)
+                while True:
+                    rows = await cursor.fetch(batch_size)
+                    if not rows:
+                        break
+                    exported += len(rows)
+                    # Yielded even when empty (XLSX) so the response can stop on a disconnect
+                    yield await encoder.encode(rows)
+        async for chunk in encoder.finish():
+            yield chunk
+        log.info(f"Exported {exported} rows as {encoder.extension} in {time.perf_counter() - started:.2f}s")
+    finally:
+        # Also reached when the client disconnects (see ExportStreamingResponse): the
+        # transaction is rolled back and the connection goes back to the pool
+        encoder.close()
+
+
+class ExportStreamingResponse(DisconnectAwareStreamingResponse):
+    """
+    Stops at the next batch once the client disconnects, so the transaction ends and
+    the connection goes back to the pool instead of being reset mid-fetch
+    """
+
+
+async def export_response(paginator: Paginator, page_request: PageRequest, export_format: ExportFormat,
+                          filename: str, batch_size: Optional[int] = None) -> ExportStreamingResponse:
+    """
+    Stream every row matching the request's filters and sort as CSV, XLSX or NDJSON.
+
+    Rows are read from a server-side cursor `batch_size` at a time, so worker memory does
+    not grow with the size of the export.
+    """
+    app_config = get_app_config()
+    query = paginator.build_export_query(page_request)
+    # Fail with a proper status before the response starts
+    await database.ensure_available()
+    encoder_class = ENCODERS[export_format]
+    return ExportStreamingResponse(
+        _stream_rows(export_format, query.sql, query.values, batch_size or app_config.settings.export_batch_size,
+                     app_config.settings.export_temp_dir),
+        media_type=encoder_class.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{encoder_class.extension}"'})
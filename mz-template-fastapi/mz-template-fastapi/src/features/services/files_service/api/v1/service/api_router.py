@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from . import files_service
+
+
+files_service_api_router = APIRouter()
+files_service_api_router.include_router(files_service.router)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Request, status
+from src.authorization.authorize import get_contributor_user, get_user
+from src.authorization.models.user import User
+from src.storage import BlobInfo, blob_response, upload_request_body
+from src.ratelimit import RATE_LIMIT_RESPONSES, limit_per_user
+import logging
+
+
+router = APIRouter(prefix="/files", tags=["Files"], dependencies=[Depends(limit_per_user("files"))],
+                   responses=RATE_LIMIT_RESPONSES)
+logger = logging.getLogger(__name__)
+
+@router.put(
+    "/{name:path}",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BlobInfo,
+    summary="Upload a file",
+    description="Streams the raw request body into the storage container, replacing any existing blob"
+)
+async def upload_file(name: str, request: Request, user: User = Depends(get_contributor_user)) -> BlobInfo:
+    # The body is never read by FastAPI, it goes to storage block by block as it arrives
+    return await upload_request_body(name, request)
+
+@router.get(
+    "/{name:path}",
+    status_code=status.HTTP_200_OK,
+    summary="Download a file",
+    description="Streams the blob; a `Range: bytes=start-end` header returns only that part (206)",
+    responses={206: {"description": "The requested byte range"}, 416: {"description": "Range outside the file"}}
+)
+async def download_file(name: str, request: Request, user: User = Depends(get_user)):
+    return await blob_response(name, request)
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Response, status
 from src.observability.trace_context import trace_id_var
+from src.observability.readiness import ReadinessReport
+from src.observability.readiness_checks import readiness
+from ..models.health_status import HealthStatus
 import logging
 
 
@@ -10,10 +13,37 @@ logger.setLevel(logging.INFO)
 @router.get(
     "/",
     status_code=status.HTTP_200_OK,
+    response_model=HealthStatus,
     summary="Get health check",
     description="Validate if the service is available",
     response_description="healthy if service is available, unhealthy otherwise"
 )
-async def healthcheck():
+async def healthcheck() -> HealthStatus:
     # validation logic
-    return {"status": "healthy"} 
\ No newline at end of file
+    return HealthStatus(status="healthy")
+
+@router.get(
+    "/live",
+    status_code=status.HTTP_200_OK,
+    response_model=HealthStatus,
+    summary="Liveness probe",
+    description="The process is up and its event loop is serving requests; dependencies are not checked",
+    response_description="alive"
+)
+async def live() -> HealthStatus:
+    return HealthStatus(status="alive")
+
+@router.get(
+    "/ready",
+    status_code=status.HTTP_200_OK,
+    response_model=ReadinessReport,
+    summary="Readiness probe",
+    description="Cached outcome of the background dependency checks (database, blob storage, JWKS freshness)",
+    responses={503: {"model": ReadinessReport, "description": "A critical dependency is failing"}}
+)
+async def ready(response: Response) -> ReadinessReport:
+    # Never calls a dependency, the checks run in the background
+    report = readiness.report()
+    if not report.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from . import jobs_service
+
+
+jobs_service_api_router = APIRouter()
+jobs_service_api_router.include_router(jobs_service.router)
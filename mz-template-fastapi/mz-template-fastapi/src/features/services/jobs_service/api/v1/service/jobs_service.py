@@ -0,0 +1,36 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Body, Depends, Request, Response, status
+from src.authorization.authorize import get_user
+from src.authorization.models.user import User
+from src.jobs import Job, jobs
+from src.ratelimit import RATE_LIMIT_RESPONSES, limit_per_user
+from . import tasks  # noqa: F401 - registers the job tasks
+import logging
+
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"], dependencies=[Depends(limit_per_user("jobs"))],
+                   responses=RATE_LIMIT_RESPONSES)
+logger = logging.getLogger(__name__)
+
+@router.post(
+    "/{task}",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=Job,
+    summary="Submit a job",
+    description="Queues the task with the JSON body as its arguments and returns at once; poll the Location for the result"
+)
+async def submit_job(task: str, request: Request, response: Response, payload: Dict[str, Any] = Body(default_factory=dict),
+                     user: User = Depends(get_user)) -> Job:
+    job = await jobs.submit(task, payload, owner=user.id)
+    response.headers["Location"] = str(request.url_for("get_job", job_id=job.id))
+    return job
+
+@router.get(
+    "/{job_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=Job,
+    summary="Get a job",
+    description="Status of a job submitted by the caller, and its result once it has succeeded"
+)
+async def get_job(job_id: str, user: User = Depends(get_user)) -> Job:
+    return await jobs.get(job_id, owner=user.id)
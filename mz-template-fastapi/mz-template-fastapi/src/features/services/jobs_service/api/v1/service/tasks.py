@@ -0,0 +1,18 @@
+# Job tasks of this feature; also imported by the Celery workers (JOBS_TASK_MODULES)
+import asyncio
+
+from pydantic import BaseModel, Field
+
+from src.jobs import job_tasks
+
+
+class ExampleReportRequest(BaseModel):
+    rows: int = Field(1000, ge=1, le=1000000)
+    delay: float = Field(1.0, ge=0, le=60)
+
+
+@job_tasks.task("example.report", queue="default", payload_model=ExampleReportRequest)
+async def build_example_report(rows: int, delay: float) -> dict:
+    # Stands in for seconds of work that must not hold a request open
+    await asyncio.sleep(delay)
+    return {"rows": rows, "total": rows * (rows - 1) // 2}
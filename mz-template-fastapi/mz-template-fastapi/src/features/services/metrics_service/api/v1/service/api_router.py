@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from . import metrics_service
+
+
+metrics_service_api_router = APIRouter()
+metrics_service_api_router.include_router(metrics_service.router)
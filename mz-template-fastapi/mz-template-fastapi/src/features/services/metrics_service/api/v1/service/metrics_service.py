@@ -0,0 +1,23 @@
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+from src.observability.metrics import registry
+import logging
+
+
+router = APIRouter(prefix="/metrics", tags=["Monitoring"])
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    summary="Get metrics",
+    description="Prometheus metrics aggregated across every worker process of the container",
+    response_class=PlainTextResponse,
+    response_description="Metrics in the Prometheus text exposition format"
+)
+async def metrics():
+    # Rendered on the event loop that mutates the metrics; the worker snapshots live in
+    # /dev/shm so reading them is cheap
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,15 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from src.authorization.models.user import User
+
+
+class PaginatedResponse(BaseModel):
+    message: str
+    page: int
+    page_size: int
+    filters: List[str]
+    sort_by: List[str]
+    cursor: Optional[str] = None
+    user: User
@@ -1,34 +1,62 @@
 # Create a new APIRouter instance for the 'assets' routes
-from typing import List
+from datetime import datetime
+from typing import Optional
 from fastapi import APIRouter, Depends, Query, Request, status
 
 from src.authorization.authorize import get_user
 from src.authorization.models.user import User
+from src.cache import cached
+from src.export import ExportFormat, export_response
+from src.pagination import FieldSpec, PageRequest, Paginator, get_page_request
+from src.ratelimit import RATE_LIMIT_RESPONSES, limit_per_user
+from ..models.paginated_response import PaginatedResponse
 import logging
 
-router = APIRouter(prefix="/secure", tags=["Example"])
+router = APIRouter(prefix="/secure", tags=["Example"], dependencies=[Depends(limit_per_user("secure"))],
+                   responses=RATE_LIMIT_RESPONSES)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)  
 
+# Fields clients may filter and sort on; a real service points `source` at its table
+# and returns `await paginator.fetch_page(connection, page_request)`
+paginator = Paginator(
+    source="items",
+    fields=[
+        FieldSpec("id", int),
+        FieldSpec("name", str),
+        FieldSpec("status", str, operators=("eq", "ne", "in")),
+        FieldSpec("owner", str),
+        FieldSpec("created", datetime),
+    ],
+    key="id",
+    default_sort=["-created"])
+
 @router.get(
     "/",
     status_code=status.HTTP_200_OK,
+    response_model=PaginatedResponse,
     summary="Summary of the API",
     description="Detailed description of the API"
 )
+@cached("secure", ttl=10)  # Per user, path and query parameters; exports are streamed, never cached
 async def get_all_paginated(
     request: Request,
-    page: int = Query(1, description="Page number"),
-    page_size: int = Query(20, description="Page size"),
-    filters: List[str] = Query([], description="Filters"),
-    sort_by: List[str] = Query([], description="Sorting"),
+    page_request: PageRequest = Depends(get_page_request),
+    export_format: Optional[ExportFormat] = Query(None, alias="format", description="Stream every matching row instead of a page"),
     user: User = Depends(get_user)
-):
-    return  {
-        "message": "Hello, World!",
-        "page": page,
-        "page_size": page_size,
-        "filters": filters,
-        "sort_by": sort_by,
-        "user": user
-    }
\ No newline at end of file
+) -> PaginatedResponse:
+    if export_format is not None:
+        # Streams from a server-side cursor, memory stays flat whatever the row count
+        return await export_response(paginator, page_request, export_format, filename="items")
+
+    # Validates the filters, sort and cursor and compiles them to parameterized SQL
+    query = paginator.build_query(page_request)
+    return PaginatedResponse(
+        message="Hello, World!",
+        page=page_request.page,
+        page_size=page_request.page_size,
+        filters=[clause.normalized() for clause in query.filters],
+        sort_by=[clause.normalized() for clause in query.sort],
+        cursor=page_request.cursor,
+        user=user
+    )
@@ -0,0 +1,8 @@
+from .brokers import InProcessBroker, JobBroker, JobsUnavailable, UnavailableBroker, parse_queue_concurrency
+from .manager import JobManager, JobNotFound, create_broker, jobs
+from .models import Job, JobStatus
+from .registry import InvalidJobPayload, JobTask, TaskRegistry, UnknownJobTask, job_tasks
+
+__all__ = ["InProcessBroker", "JobBroker", "JobsUnavailable", "UnavailableBroker", "parse_queue_concurrency",
+           "JobManager", "JobNotFound", "create_broker", "jobs", "Job", "JobStatus", "InvalidJobPayload", "JobTask",
+           "TaskRegistry", "UnknownJobTask", "job_tasks"]
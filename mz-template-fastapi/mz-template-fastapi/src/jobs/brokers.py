@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from ..config.parsers import parse_queue_concurrency  # noqa: F401 - re-exported
+from ..observability.metrics import JOB_DURATION, JOBS_FINISHED, JOBS_QUEUED, JOBS_RUNNING
+from .models import Job, JobStatus
+from .registry import JobTask, TaskRegistry, job_tasks
+
+
+log = logging.getLogger(__name__)
+
+
+class JobsUnavailable(HTTPException):
+    def __init__(self, detail: str = "Jobs cannot be accepted right now, retry shortly.", retry_after: int = 5) -> None:
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class JobBroker:
+    """
+    Accepts jobs and reports their state; `submit` must return without waiting for the job
+    """
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def submit(self, task: JobTask, payload: Dict[str, Any], owner: Optional[str] = None) -> Job:
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+
+class UnavailableBroker(JobBroker):
+    """
+    Answers every submission and poll with a 503, for a broker that cannot work in this deployment
+    """
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+    async def submit(self, task: JobTask, payload: Dict[str, Any], owner: Optional[str] = None) -> Job:
+        raise JobsUnavailable(self.reason)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        raise JobsUnavailable(self.reason)
+
+
+class InProcessBroker(JobBroker):
+    """
+    Runs jobs on the event loop of the worker process that accepted them.
+
+    Each queue is an asyncio queue drained by `concurrency[queue]` consumer tasks, so a
+    queue never runs more jobs at once than its limit and holds at most `max_queued`
+    waiting ones (further submissions get a 503). Finished jobs are kept `result_ttl`
+    seconds. Jobs only exist in this process and are lost on restart: meant for
+    development, tests and single-worker deployments.
+    """
+
+    def __init__(self, concurrency: Dict[str, int], max_queued: int = 1000, result_ttl: float = 3600.0,
+                 shutdown_timeout: float = 10.0, registry: TaskRegistry = job_tasks):
+        self.concurrency = dict(concurrency)
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.shutdown_timeout = shutdown_timeout
+        self.registry = registry
+        self._jobs: Dict[str, Job] = {}
+        # Finished job id -> expiry; the TTL is constant, so the oldest expire first
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._consumers: List[asyncio.Task] = []
+        self._closing = False
+
+    async def start(self) -> None:
+        self._closing = False
+        for name in self.concurrency:
+            self._queue(name)
+
+    def _queue(self, name: str) -> asyncio.Queue:
+        queue = self._queues.get(name)
+        if queue is None:
+            if name not in self.concurrency:
+                log.warning(f"Job queue '{name}' is not listed in JOBS_QUEUES, running its jobs one at a time")
+            queue = self._queues[name] = asyncio.Queue()
+            loop = asyncio.get_running_loop()
+            for _ in range(self.concurrency.get(name, 1)):
+                self._consumers.append(loop.create_task(self._consume(name, queue)))
+        return queue
+
+    async def submit(self, task: JobTask, payload: Dict[str, Any], owner: Optional[str] = None) -> Job:
+        if self._closing:
+            raise JobsUnavailable("The service is shutting down.")
+        queue = self._queue(task.queue)
+        if queue.qsize() >= self.max_queued:
+            raise JobsUnavailable(f"The '{task.queue}' job queue is full.")
+        job = Job(id=new_job_id(), task=task.name, queue=task.queue, status=JobStatus.QUEUED,
+                  submitted_at=utcnow(), owner=owner)
+        self._jobs[job.id] = job
+        queue.put_nowait((job, task, payload))
+        JOBS_QUEUED.inc(task.queue)
+        return job.model_copy()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        job = self._jobs.get(job_id)
+        return job.model_copy() if job is not None else None
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        while self._expiry:
+            job_id, expires = next(iter(self._expiry.items()))
+            if expires > now:
+                break
+            del self._expiry[job_id]
+            self._jobs.pop(job_id, None)
+
+    async def _consume(self, name: str, queue: asyncio.Queue) -> None:
+        while True:
+            item: Optional[Tuple[Job, JobTask, Dict[str, Any]]] = await queue.get()
+            if item is None:
+                return
+            job, task, payload = item
+            JOBS_QUEUED.dec(name)
+            JOBS_RUNNING.inc(name)
+            job.status = JobStatus.RUNNING
+            job.started_at = utcnow()
+            started = time.perf_counter()
+            try:
+                job.result = await task.run(payload)
+                job.status = JobStatus.SUCCEEDED
+            except asyncio.CancelledError:
+                job.status = JobStatus.FAILED
+                job.error = "Cancelled by the shutdown"
+                raise
+            except Exception as e:
+                log.error(f"Job {job.id} ({job.task}) failed: {type(e).__name__}: {e}")
+                job.status = JobStatus.FAILED
+                job.error = f"{type(e).__name__}: {e}"
+            finally:
+                job.finished_at = utcnow()
+                JOBS_RUNNING.dec(name)
+                JOBS_FINISHED.inc(name, job.status.value)
+                JOB_DURATION.observe(time.perf_counter() - started, name)
+                self._expiry[job.id] = time.monotonic() + self.result_ttl
+            self._prune()
+
+    async def close(self) -> None:
+        """
+        Stop accepting jobs, let the consumers work through their queues for up to
+        `shutdown_timeout` seconds, then cancel what is left
+        """
+        self._closing = True
+        for name, queue in self._queues.items():
+            for _ in range(self.concurrency.get(name, 1)):
+                queue.put_nowait(None)
+        consumers, self._consumers = self._consumers, []
+        if consumers:
+            _, pending = await asyncio.wait(consumers, timeout=self.shutdown_timeout)
+            if pending:
+                log.warning(f"{len(pending)} job consumer(s) still busy after {self.shutdown_timeout}s, cancelling")
+                for consumer in pending:
+                    consumer.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        self._queues.clear()
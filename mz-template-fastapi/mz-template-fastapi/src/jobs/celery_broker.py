@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from celery import Celery
+
+from .brokers import JobBroker, JobsUnavailable, new_job_id, utcnow
+from .models import Job, JobStatus
+from .registry import JobTask, job_tasks
+
+
+log = logging.getLogger(__name__)
+
+RUN_TASK = "jobs.run"
+
+_STATUSES = {
+    "PENDING": JobStatus.QUEUED,
+    "RECEIVED": JobStatus.QUEUED,
+    "RETRY": JobStatus.QUEUED,
+    "STARTED": JobStatus.RUNNING,
+    "SUCCESS": JobStatus.SUCCEEDED,
+    "FAILURE": JobStatus.FAILED,
+    "REVOKED": JobStatus.FAILED,
+}
+
+
+def create_celery_app(broker_url: str, result_backend: str, result_ttl: float, task_modules: List[str],
+                      name: str = "jobs") -> Celery:
+    """
+    The Celery app shared by the API (publishing) and the workers (executing).
+
+    Every job goes through the single `jobs.run` task, which looks the job task up in
+    `job_tasks`; workers import `task_modules` so the registry is filled.
+    """
+    app = Celery(name, broker=broker_url, backend=result_backend, include=task_modules)
+    app.conf.update(
+        result_expires=int(result_ttl),
+        # Task name, kwargs and queue are stored with the result so any process can read them
+        result_extended=True,
+        task_serializer="json",
+        result_serializer="json",
+        accept_content=["json"],
+        task_default_queue="default",
+        # A job interrupted by a worker crash is redelivered, and a worker only reserves
+        # the job it is about to run so its concurrency limit holds
+        task_acks_late=True,
+        worker_prefetch_multiplier=1)
+
+    @app.task(name=RUN_TASK, bind=True)
+    def run_job(self, task: str, payload: Dict[str, Any], owner: Optional[str] = None,
+                submitted_at: Optional[str] = None) -> Dict[str, Any]:
+        started_at = utcnow().isoformat()
+        self.update_state(state="STARTED", meta={"started_at": started_at})
+        return {"started_at": started_at, "value": job_tasks.get(task).run_sync(payload)}
+
+    return app
+
+
+class CeleryBroker(JobBroker):
+    """
+    Hands jobs to Celery workers through the broker at `JOBS_BROKER_URL`; their state and
+    results live in `JOBS_RESULT_BACKEND` for `JOBS_RESULT_TTL` seconds, so any API worker
+    can answer the status polls.
+
+    The concurrency limit of a queue is the `--concurrency` of the workers consuming it,
+    e.g. `celery -A src.jobs.celery_worker worker -Q reports --concurrency 2`.
+    Publishing and result lookups are blocking client calls and run in a thread.
+    """
+
+    def __init__(self, app: Celery):
+        self.app = app
+
+    async def submit(self, task: JobTask, payload: Dict[str, Any], owner: Optional[str] = None) -> Job:
+        job = Job(id=new_job_id(), task=task.name, queue=task.queue, status=JobStatus.QUEUED,
+                  submitted_at=utcnow(), owner=owner)
+        queued = {"task": job.task, "queue": job.queue, "owner": owner, "submitted_at": job.submitted_at.isoformat()}
+
+        def publish() -> None:
+            # Recorded before publishing: the job can be polled (and its owner checked)
+            # before a worker picks it up, and unknown ids stay distinguishable
+            self.app.backend.store_result(job.id, queued, "PENDING")
+            self.app.send_task(RUN_TASK, kwargs={"task": job.task, "payload": payload, "owner": owner,
+                                                 "submitted_at": queued["submitted_at"]},
+                               task_id=job.id, queue=job.queue)
+
+        try:
+            await asyncio.to_thread(publish)
+        except Exception as e:
+            log.error(f"Unable to publish job {job.id} ({job.task}): {type(e).__name__}: {e}")
+            raise JobsUnavailable()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        try:
+            return await asyncio.to_thread(self._read, job_id)
+        except Exception as e:
+            log.error(f"Unable to read job {job_id}: {type(e).__name__}: {e}")
+            raise JobsUnavailable("The job store is unavailable, retry shortly.")
+
+    def _read(self, job_id: str) -> Optional[Job]:
+        meta = self.app.backend.get_task_meta(job_id)
+        state = meta.get("status")
+        result = meta.get("result")
+        if state == "PENDING":
+            # Only ids recorded by submit exist; anything else is unknown or expired
+            if not isinstance(result, dict) or "task" not in result:
+                return None
+            return Job(id=job_id, task=result["task"], queue=result["queue"], status=JobStatus.QUEUED,
+                       submitted_at=result.get("submitted_at"), owner=result.get("owner"))
+
+        kwargs = meta.get("kwargs") or {}
+        job = Job(id=job_id, task=kwargs.get("task", ""), queue=meta.get("queue") or "default",
+                  status=_STATUSES.get(state, JobStatus.QUEUED), submitted_at=kwargs.get("submitted_at"),
+                  finished_at=meta.get("date_done"), owner=kwargs.get("owner"))
+        if state in ("STARTED", "SUCCESS") and isinstance(result, dict):
+            job.started_at = result.get("started_at")
+            job.result = result.get("value")
+        elif state in ("FAILURE", "REVOKED"):
+            job.error = f"{type(result).__name__}: {result}" if isinstance(result, BaseException) else str(state)
+        return job
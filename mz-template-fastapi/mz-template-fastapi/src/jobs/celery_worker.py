@@ -0,0 +1,17 @@
+"""
+Celery entry point of the job workers, one per queue and concurrency limit:
+
+    celery -A src.jobs.celery_worker worker -Q default --concurrency 4
+    celery -A src.jobs.celery_worker worker -Q reports --concurrency 1
+"""
+from ..config import get_app_config
+from .celery_broker import create_celery_app
+
+app_config = get_app_config()
+
+celery_app = create_celery_app(
+    app_config.settings.jobs_broker_url,
+    app_config.settings.jobs_result_backend,
+    app_config.settings.jobs_result_ttl,
+    list(app_config.settings.jobs_task_modules),
+    name=app_config.settings.service_name)
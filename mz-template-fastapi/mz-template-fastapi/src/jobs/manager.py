@@ -0,0 +1,87 @@
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from ..config import get_app_config
+from ..server.limits import worker_processes
+from .brokers import InProcessBroker, JobBroker, UnavailableBroker, parse_queue_concurrency
+from .models import Job
+from .registry import TaskRegistry, job_tasks
+
+
+log = logging.getLogger(__name__)
+
+BROKERS = ("memory", "celery")
+
+
+class JobNotFound(HTTPException):
+    def __init__(self, job_id: str) -> None:
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job '{job_id}' was not found or has expired")
+
+
+def create_broker(kind: Optional[str] = None, registry: TaskRegistry = job_tasks) -> JobBroker:
+    app_config = get_app_config()
+    kind = kind or app_config.settings.jobs_broker
+    if kind == "celery":
+        # Imported here, celery is only needed when it is the broker
+        from .celery_broker import CeleryBroker, create_celery_app
+        return CeleryBroker(create_celery_app(
+            app_config.settings.jobs_broker_url,
+            app_config.settings.jobs_result_backend,
+            app_config.settings.jobs_result_ttl,
+            list(app_config.settings.jobs_task_modules),
+            name=app_config.settings.service_name))
+    if kind != "memory":
+        log.warning(f"Unknown JOBS_BROKER '{kind}', expected one of {BROKERS}; using the in-process broker")
+    workers = worker_processes()
+    if workers > 1:
+        # A job would only live in the worker that accepted it, most polls would answer 404
+        return UnavailableBroker(f"Jobs are disabled: the in-process broker cannot serve {workers} worker "
+                                 f"processes. Set JOBS_BROKER=celery.")
+    return InProcessBroker(
+        parse_queue_concurrency(app_config.settings.jobs_queues),
+        max_queued=app_config.settings.jobs_max_queued,
+        result_ttl=app_config.settings.jobs_result_ttl,
+        shutdown_timeout=app_config.settings.jobs_shutdown_timeout,
+        registry=registry)
+
+
+class JobManager:
+    """
+    Moves slow work off the request path: `submit` validates the payload, hands the job to
+    the broker chosen by JOBS_BROKER and returns at once; `get` reports its progress.
+    """
+
+    def __init__(self, broker: Optional[JobBroker] = None, registry: TaskRegistry = job_tasks):
+        self.registry = registry
+        self._broker = broker
+
+    @property
+    def broker(self) -> JobBroker:
+        if self._broker is None:
+            self._broker = create_broker(registry=self.registry)
+        return self._broker
+
+    async def start(self) -> None:
+        await self.broker.start()
+
+    async def close(self) -> None:
+        if self._broker is not None:
+            await self._broker.close()
+
+    async def submit(self, task_name: str, payload: Optional[Dict[str, Any]] = None, owner: Optional[str] = None) -> Job:
+        task = self.registry.get(task_name)
+        return await self.broker.submit(task, task.validate(payload), owner)
+
+    async def get(self, job_id: str, owner: Optional[str] = None) -> Job:
+        """
+        The job, as long as it exists and, when `owner` is given, was submitted by them
+        """
+        job = await self.broker.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            raise JobNotFound(job_id)
+        return job
+
+
+jobs = JobManager()
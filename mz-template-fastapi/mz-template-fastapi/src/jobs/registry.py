@@ -0,0 +1,90 @@
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, Optional, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+
+
+class UnknownJobTask(HTTPException):
+    def __init__(self, name: str) -> None:
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown job task '{name}'")
+
+
+class InvalidJobPayload(HTTPException):
+    def __init__(self, detail: Any = None) -> None:
+        super().__init__(status_code=422, detail=detail)
+
+
+class JobTask:
+    """
+    A function that may run as a job, its queue and the model validating its payload.
+
+    Async functions run on the event loop of whoever executes the job; plain functions
+    run in a thread so they never block it.
+    """
+
+    def __init__(self, name: str, function: Callable[..., Any], queue: str = "default",
+                 payload_model: Optional[Type[BaseModel]] = None):
+        self.name = name
+        self.function = function
+        self.queue = queue
+        self.payload_model = payload_model
+        self.is_async = inspect.iscoroutinefunction(function)
+
+    def validate(self, payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        payload = payload or {}
+        if self.payload_model is None:
+            return payload
+        try:
+            # JSON-safe so it can travel through any broker
+            return self.payload_model.model_validate(payload).model_dump(mode="json")
+        except ValidationError as e:
+            raise InvalidJobPayload(e.errors(include_url=False, include_context=False))
+
+    async def run(self, payload: Dict[str, Any]) -> Any:
+        if self.is_async:
+            return await self.function(**payload)
+        return await asyncio.to_thread(self.function, **payload)
+
+    def run_sync(self, payload: Dict[str, Any]) -> Any:
+        """Entry point for workers without an event loop (Celery)"""
+        if self.is_async:
+            return asyncio.run(self.function(**payload))
+        return self.function(**payload)
+
+
+class TaskRegistry:
+    def __init__(self):
+        self._tasks: Dict[str, JobTask] = {}
+
+    def task(self, name: Optional[str] = None, queue: str = "default",
+             payload_model: Optional[Type[BaseModel]] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Register a function as a job task:
+
+            @job_tasks.task("reports.build", queue="reports", payload_model=ReportRequest)
+            async def build_report(year: int) -> dict: ...
+
+        The payload posted to `/jobs/{name}` is passed as keyword arguments and the
+        return value, which must be JSON serializable, becomes the job result.
+        """
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            task_name = name or f"{function.__module__}.{function.__qualname__}"
+            if task_name in self._tasks:
+                raise ValueError(f"Job task '{task_name}' is already registered")
+            self._tasks[task_name] = JobTask(task_name, function, queue, payload_model)
+            return function
+        return decorator
+
+    def get(self, name: str) -> JobTask:
+        task = self._tasks.get(name)
+        if task is None:
+            raise UnknownJobTask(name)
+        return task
+
+    def all(self):
+        return list(self._tasks.values())
+
+
+job_tasks = TaskRegistry()
@@ -1,74 +1,175 @@
-import uuid
+import importlib
+import logging
+from contextlib import asynccontextmanager
 from fastapi.openapi.docs import (
     get_redoc_html
 )
-from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from .config.swagger_ui_config import SwaggerUiConfig
 from .observability.logging import setup_logging
-from .observability.tracing import setup_tracing
-from .observability.trace_context import trace_id_var
-from .config import get_app_config
-from .features.services.health_service.api.v1.service.api_router import health_service_api_router
-from .features.services.secure_service.api.v1.service.api_router import secure_service_api_router
+from .observability.tracing import setup_tracing, shutdown_tracing
+from .observability.trace_middleware import TraceContextMiddleware
+from .observability.metrics import event_loop_lag_monitor, registry as metrics_registry
+from .observability.metrics_middleware import MetricsMiddleware
+from .admission import AdmissionControlMiddleware
+from .observability.readiness_checks import readiness, setup_readiness
+from .observability.startup import startup_timer
+from .config import config_reloader, get_app_config
+from .web.responses import default_response_class
+from .web.compression import CompressionMiddleware
+from .web.static import PrecompressedStaticFiles
+from .authorization.azure_authorization import authorize
+from .database import database
+from .storage import storage
+from .jobs import jobs
 
-app_config = get_app_config()
+log = logging.getLogger(__name__)
+
+# Feature routers, imported by create_app() in this order: `import src.main` stays cheap
+# and the startup log shows what each feature costs. Each module under
+# src/features/services/<name>/api/v1/service/api_router.py exports `<name>_api_router`.
+FEATURE_ROUTERS = [
+    "health_service",
+    "metrics_service",
+    "secure_service",
+    "files_service",
+    "jobs_service",
+]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app_config = get_app_config()
+    if app_config.settings.metrics_enabled:
+        with startup_timer.step("metrics"):
+            # Publish this worker's metrics for the scrapes served by the other workers
+            metrics_registry.enable_multiprocess(app_config.settings.shared_state_dir)
+            metrics_registry.start(app_config.settings.metrics_publish_interval)
+            event_loop_lag_monitor.interval = app_config.settings.metrics_event_loop_interval
+            event_loop_lag_monitor.start()
+    # Open the database pool (retried on the first request when the database is down)
+    with startup_timer.step("database"):
+        await database.start()
+    # Create the blob container if asked to, the client itself is created on first use
+    with startup_timer.step("storage"):
+        await storage.start()
+    # Start the in-process job consumers (no-op with Celery)
+    with startup_timer.step("jobs"):
+        await jobs.start()
+    # Check the dependencies in the background for /healthcheck/ready
+    setup_readiness().start()
+    # Reload the settings on SIGHUP, and when .env changes if CONFIG_WATCH_INTERVAL is set
+    config_reloader.start()
+    log.info(f"Worker started in {startup_timer.summary()}")
+    yield
+    await config_reloader.stop()
+    await readiness.stop()
+    # Let running jobs finish for up to JOBS_SHUTDOWN_TIMEOUT
+    await jobs.close()
+    # Let in-flight queries return their connections, then close the pool
+    await database.close()
+    await storage.close()
+    await event_loop_lag_monitor.stop()
+    await metrics_registry.stop()
+    # Stop the JWKS background refresher, its connection pool and the verification pool
+    await authorize.aclose()
+    # Flush the spans still queued for export
+    shutdown_tracing()
+
+def include_feature_router(app: FastAPI, name: str) -> None:
+    with startup_timer.step(f"router {name}"):
+        module = importlib.import_module(f".features.services.{name}.api.v1.service.api_router", __package__)
+        app.include_router(getattr(module, f"{name}_api_router"), prefix=get_app_config().settings.api_v1_str)
 
 def create_app() -> FastAPI:
-    # Set up logging and tracing
-    setup_logging()
-    setup_tracing()
+    """
+    Application factory: `uvicorn src.main:create_app --factory`, or `python -m src`.
+
+    Nothing is built at import time; every worker process calls this once.
+    """
+    app_config = get_app_config()
+
+    # Set up logging
+    with startup_timer.step("logging"):
+        setup_logging()
 
     # Set up Entra client ID and scope
     app_client_id = app_config.get_entra_client_id()
     app_client_scope = app_config.get_entra_scope()
-    
-    app = FastAPI(
-        title=SwaggerUiConfig.Title,
-        description=SwaggerUiConfig.Description,
-        version=SwaggerUiConfig.Version,
-        openapi_url=SwaggerUiConfig.OpenApiURL,
-        swagger_ui_oauth2_redirect_url="/oauth2-redirect",
-        swagger_ui_init_oauth={
-            "usePkceWithAuthorizationCodeGrant": True,
-            "clientId": f"{app_client_id}",
-            "scopes": f"api://{app_client_id}/{app_client_scope}",
-        }
-    )
-
-    app.mount("/static", StaticFiles(directory="static"), name="static")
-
-    # Set all CORS enabled origins
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"]
-    )
+
+    with startup_timer.step("app"):
+        app = FastAPI(
+            title=SwaggerUiConfig.Title,
+            description=SwaggerUiConfig.Description,
+            version=SwaggerUiConfig.Version,
+            openapi_url=SwaggerUiConfig.OpenApiURL,
+            lifespan=lifespan,
+            # Typed response models + the fastest JSON rendering this FastAPI version offers
+            default_response_class=default_response_class(),
+            swagger_ui_oauth2_redirect_url="/oauth2-redirect",
+            swagger_ui_init_oauth={
+                "usePkceWithAuthorizationCodeGrant": True,
+                "clientId": f"{app_client_id}",
+                "scopes": f"api://{app_client_id}/{app_client_scope}",
+            }
+        )
+
+        # Serves prebuilt .br / .gz siblings, strong ETags, immutable caching of hashed names
+        app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
+
+        # Set all CORS enabled origins
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"]
+        )
+
+        # Compress text responses of COMPRESSION_MIN_SIZE bytes or more with brotli or gzip
+        if app_config.settings.compression_enabled:
+            app.add_middleware(
+                CompressionMiddleware,
+                minimum_size=app_config.settings.compression_min_size,
+                gzip_level=app_config.settings.compression_gzip_level,
+                brotli_quality=app_config.settings.compression_brotli_quality
+            )
+
+        # Bound the requests served at once per route group, shed the excess with a fast 503.
+        # Added before the trace context, so it runs inside it and the 503s carry X-Trace-ID
+        if app_config.settings.admission_enabled:
+            app.add_middleware(AdmissionControlMiddleware)
+
+        # Set the trace ID from traceparent / X-Trace-ID for every request
+        app.add_middleware(TraceContextMiddleware)
+
+        # Record per-route latency and in-flight requests
+        if app_config.settings.metrics_enabled:
+            app.add_middleware(MetricsMiddleware)
+
+        @app.get("/redoc", include_in_schema=False)
+        async def redoc_html():
+            return get_redoc_html(
+                openapi_url=SwaggerUiConfig.OpenApiURL,
+                title=SwaggerUiConfig.Title,
+                redoc_favicon_url="/static/favicon.ico"
+            )
+
     # Include API routers
-    app.include_router(health_service_api_router, prefix=app_config.get_api_v_str())
-    app.include_router(secure_service_api_router, prefix=app_config.get_api_v_str())
+    for name in FEATURE_ROUTERS:
+        if name == "metrics_service" and not app_config.settings.metrics_enabled:
+            continue
+        include_feature_router(app, name)
+
+    # Set up tracing (sampling, exporter and excluded routes come from the TRACING_* settings)
+    with startup_timer.step("tracing"):
+        setup_tracing(app)
     return app
 
-app = create_app()
-
-# Middleware to set trace ID
-@app.middleware("http")
-async def add_trace_id(request: Request, call_next):
-    # Generate or get a trace ID (example: using headers or UUID)
-    trace_id = request.headers.get("X-Trace-ID", str(uuid.uuid4()))
-    
-    # Store trace_id in request.state
-    request.state.trace_id = trace_id
-    trace_id_var.set(trace_id)
-    response = await call_next(request)
-    return response
-@app.get("/redoc", include_in_schema=False)
-async def redoc_html():
-    return get_redoc_html(
-        openapi_url=SwaggerUiConfig.OpenApiURL,
-        title=SwaggerUiConfig.Title,
-        redoc_favicon_url="/static/favicon.ico"
-    )
\ No newline at end of file
+def __getattr__(name: str):
+    # `uvicorn src.main:app` keeps working: the app is built on first access instead of at import
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
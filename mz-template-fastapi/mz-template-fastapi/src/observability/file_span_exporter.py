@@ -0,0 +1,77 @@
+import logging
+import os
+from typing import IO, Optional, Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+
+log = logging.getLogger(__name__)
+
+
+def worker_path(path: str, pid: int) -> str:
+    """
+    Per process file name, `spans.jsonl` becomes `spans.<pid>.jsonl`
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}.{pid}{extension}"
+
+
+class JsonLinesFileSpanExporter(SpanExporter):
+    """
+    Writes finished spans as JSON lines, rotating the file once it grows past `max_bytes`.
+
+    Every worker process writes and rotates its own file, named after its pid: the exporter
+    is built in the preloaded master, so the file is opened on the first export of each process.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 3):
+        self.base_path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path: Optional[str] = None
+        self._file: Optional[IO[str]] = None
+        self._pid: Optional[int] = None
+
+    def _open(self) -> IO[str]:
+        pid = os.getpid()
+        if self._file is None or self._pid != pid:
+            if self._file is not None:
+                # Inherited from the parent process, whose spans were already flushed
+                self._file.close()
+            self._pid = pid
+            self.path = worker_path(self.base_path, pid)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        try:
+            file = self._open()
+            file.write("".join(span.to_json(indent=None) + "\n" for span in spans))
+            file.flush()
+            if self.max_bytes and file.tell() >= self.max_bytes:
+                self._rotate()
+            return SpanExportResult.SUCCESS
+        except OSError as e:
+            log.warning(f"Unable to export spans to {self.path or self.base_path}: {e}")
+            return SpanExportResult.FAILURE
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def shutdown(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
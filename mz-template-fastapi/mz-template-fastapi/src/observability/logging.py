@@ -1,15 +1,44 @@
+import atexit
+import copy
 import logging
 import json
+import os
+import queue
+import sys
+import time
 from logging import Formatter, LogRecord
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, TextIO
+
 from opentelemetry import trace
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+from .trace_context import trace_id_var
+from ..config import Settings, get_app_config
+
+try:
+    import orjson
+
+    def _dumps(value: Dict[str, Any]) -> str:
+        return orjson.dumps(value, default=str).decode("utf-8")
+except ImportError:
+    def _dumps(value: Dict[str, Any]) -> str:
+        return json.dumps(value, default=str)
+
 
 class JsonFormatter(Formatter):
     def __init__(self, datefmt: str = "%Y-%m-%d %H:%M:%S"):
         super().__init__()
         self.datefmt = datefmt  # Ensure datefmt is initialized
+        self._cached_second: Optional[int] = None
+        self._cached_time = ""
+
+    def formatTime(self, record: LogRecord, datefmt: Optional[str] = None) -> str:
+        # The format has a one second resolution, so strftime only runs once per second
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = time.strftime(datefmt or self.datefmt, self.converter(second))
+            self._cached_second = second
+        return self._cached_time
 
     def format(self, record: LogRecord) -> str:
         try:
@@ -21,24 +50,145 @@ class JsonFormatter(Formatter):
                 "filename": record.filename,
                 "lineno": record.lineno,
             }
-            return json.dumps(log_record)
+            trace_id = getattr(record, "trace_id", None)
+            if trace_id:
+                log_record["trace_id"] = trace_id
+            span_id = getattr(record, "span_id", None)
+            if span_id:
+                log_record["span_id"] = span_id
+            if record.exc_info:
+                log_record["exception"] = self.formatException(record.exc_info)
+            elif record.exc_text:
+                log_record["exception"] = record.exc_text
+            return _dumps(log_record)
         except Exception as e:
             return json.dumps({"error": f"Failed to format log record: {str(e)}"})
 
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Enqueues records without blocking the caller.
+
+    Only the cheap per-request context (message, trace and span ids) is captured on the
+    calling thread, the JSON formatting and the write happen on the listener thread. When
+    the bounded queue is full the record is dropped and counted instead of stalling.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: LogRecord) -> LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.trace_id = trace_id_var.get()
+        span_context = trace.get_current_span().get_span_context()
+        record.span_id = format(span_context.span_id, "016x") if span_context.is_valid else None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingStreamHandler(logging.StreamHandler):
+    """
+    Buffers formatted records and writes them with a single call once the queue is drained
+    (or the batch is full), so a slow stdout pipe costs one write per batch.
+    """
+
+    def __init__(self, log_queue: queue.Queue, stream: Optional[TextIO] = None, batch_size: int = 256):
+        super().__init__(stream)
+        self.log_queue = log_queue
+        self.batch_size = batch_size
+        self._buffer: List[str] = []
+
+    def emit(self, record: LogRecord) -> None:
+        try:
+            self._buffer.append(self.format(record))
+            if len(self._buffer) >= self.batch_size or self.log_queue.empty():
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._buffer:
+                self.stream.write("\n".join(self._buffer) + "\n")
+                self._buffer.clear()
+            if self.stream and hasattr(self.stream, "flush"):
+                self.stream.flush()
+        finally:
+            self.release()
+
+
+_queue_handler: Optional[ContextQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
 def setup_logging() -> None:
-    logger = logging.getLogger(__name__)
-    if not logger.handlers:  # Prevent duplicate handlers
-        log_handler = logging.StreamHandler()
-        formatter = JsonFormatter()
-        log_handler.setFormatter(formatter)
-
-        logger.setLevel(logging.INFO)
-        logger.addHandler(log_handler)
-
-    # Setup OpenTelemetry Tracing
-    resource = Resource(attributes={"service.name": "your-service-name"})
-    tracer_provider = TracerProvider(resource=resource)
-    trace.set_tracer_provider(tracer_provider)
-
-    span_processor = BatchSpanProcessor(ConsoleSpanExporter())
-    tracer_provider.add_span_processor(span_processor)
+    global _queue_handler, _listener
+    app_config = get_app_config()
+    root_logger = logging.getLogger()
+    if _queue_handler is None:  # Prevent duplicate handlers
+        log_queue: queue.Queue = queue.Queue(maxsize=app_config.settings.log_queue_size)
+        writer = BatchingStreamHandler(log_queue, sys.stderr, batch_size=app_config.settings.log_batch_size)
+        writer.setFormatter(JsonFormatter())
+
+        _queue_handler = ContextQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, writer, respect_handler_level=False)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
+        root_logger.setLevel(app_config.settings.log_level)
+        root_logger.addHandler(_queue_handler)
+        app_config.on_reload(_reload_log_level)
+
+
+def _reload_log_level(previous: Settings, settings: Settings) -> None:
+    if previous.log_level != settings.log_level:
+        logging.getLogger().setLevel(settings.log_level)
+
+
+def _restart_after_fork() -> None:
+    """
+    The writer thread does not survive a fork (workers of the preloaded server): the child
+    gets its own queue, whose lock the parent's thread cannot be holding, and writer thread
+    """
+    global _listener
+    if _listener is None:
+        return
+    writer = _listener.handlers[0]
+    log_queue: queue.Queue = queue.Queue(maxsize=_queue_handler.queue.maxsize)
+    # Records still buffered belong to the parent, which writes them itself
+    writer._buffer.clear()
+    writer.log_queue = log_queue
+    _queue_handler.queue = log_queue
+    _queue_handler.dropped = 0
+    _listener = QueueListener(log_queue, writer, respect_handler_level=False)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Flush the queued records and stop the writer thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logging_stats() -> Dict[str, int]:
+    if _queue_handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
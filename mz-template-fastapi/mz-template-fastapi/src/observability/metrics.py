@@ -0,0 +1,461 @@
+import asyncio
+import bisect
+import logging
+import math
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..shared import SharedSnapshot, get_shared_state_dir, shared_memory_supported
+
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, *labels: Any) -> None:
+        """Mirror a cumulative count kept elsewhere (e.g. cache statistics)"""
+        self.values[self._key(labels)] = float(value)
+
+    def snapshot(self) -> List[list]:
+        return [[list(key), value] for key, value in self.values.items()]
+
+
+class Gauge(_Metric):
+    """
+    `aggregation` decides how the values of the worker processes are combined: `sum` (e.g.
+    in-flight requests) or `max` (e.g. event loop lag). Gauges of dead workers are ignored.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), aggregation: str = "sum"):
+        super().__init__(name, documentation, labelnames)
+        self.aggregation = aggregation
+        self.values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: Any) -> None:
+        self.values[self._key(labels)] = float(value)
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, *labels: Any, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def snapshot(self) -> List[list]:
+        return [[list(key), value] for key, value in self.values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per bucket counts (+Inf last), sum, count]
+        self.values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        key = self._key(labels)
+        entry = self.values.get(key)
+        if entry is None:
+            entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def snapshot(self) -> List[list]:
+        return [[list(key), [list(counts), total, count]] for key, (counts, total, count) in self.values.items()]
+
+
+class MetricsRegistry:
+    """
+    In-process metrics, aggregated across the uvicorn workers of a host.
+
+    Each worker periodically publishes a snapshot of its metrics to the shared state
+    directory; a scrape merges the snapshots of every worker (counters and histograms are
+    summed, gauges of live workers are summed or maxed), so any worker answers for the
+    whole container.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._derived: List[Tuple[str, str, Callable[[Dict[str, Dict[LabelValues, Any]]], Optional[float]]]] = []
+        self._snapshot: Optional[SharedSnapshot] = None
+        self._directory: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _register(self, metric: _Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), aggregation: str = "sum") -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, aggregation))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """Callback run before every snapshot, to copy statistics kept by other components"""
+        self._collectors.append(collector)
+
+    def derived(self, name: str, documentation: str,
+                fn: Callable[[Dict[str, Dict[LabelValues, Any]]], Optional[float]]) -> None:
+        """
+        Gauge computed at scrape time from the values already merged across workers, for
+        figures such as ratios that cannot be summed per process
+        """
+        self._derived.append((name, documentation, fn))
+
+    def snapshot(self) -> Dict[str, Any]:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                log.debug(f"Metrics collector failed: {e}")
+        return {
+            "pid": os.getpid(),
+            "written_at": time.time(),
+            "metrics": {
+                name: {"kind": metric.kind, "values": metric.snapshot()}
+                for name, metric in self._metrics.items()
+            },
+        }
+
+    # Multi-process publication
+
+    def enable_multiprocess(self, directory: Optional[str] = None) -> bool:
+        if not shared_memory_supported():
+            return False
+        try:
+            self._directory = os.path.join(get_shared_state_dir(directory), "metrics")
+            os.makedirs(self._directory, exist_ok=True)
+            self._snapshot = SharedSnapshot(os.path.join(self._directory, f"{os.getpid()}.json"))
+            self._prune_dead_workers()
+            return True
+        except OSError as e:
+            log.warning(f"Metrics are per process, unable to use the shared state directory: {e}")
+            self._directory = None
+            return False
+
+    def _prune_dead_workers(self) -> None:
+        # Snapshots of workers from a previous run would otherwise be summed forever;
+        # Prometheus treats the resulting drop as a counter reset
+        for file_name in os.listdir(self._directory):
+            pid, _, extension = file_name.partition(".")
+            if extension == "json" and pid.isdigit() and not _pid_alive(pid):
+                try:
+                    os.unlink(os.path.join(self._directory, file_name))
+                except OSError:
+                    pass
+
+    def publish(self) -> None:
+        if self._snapshot is not None:
+            try:
+                self._snapshot.write(self.snapshot())
+            except OSError as e:
+                log.debug(f"Unable to publish metrics snapshot: {e}")
+
+    def start(self, interval: float = 5.0) -> None:
+        if self._snapshot is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._publish_loop(interval))
+
+    async def _publish_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.publish()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        self.publish()
+
+    def _collect_snapshots(self) -> List[Tuple[Dict[str, Any], bool]]:
+        own = self.snapshot()
+        if self._directory is None:
+            return [(own, True)]
+
+        if self._snapshot is not None:
+            try:
+                self._snapshot.write(own)
+            except OSError:
+                pass
+        snapshots = [(own, True)]
+        for file_name in os.listdir(self._directory):
+            if not file_name.endswith(".json") or file_name == f"{os.getpid()}.json":
+                continue
+            document = SharedSnapshot(os.path.join(self._directory, file_name)).read()
+            if document:
+                snapshots.append((document, _pid_alive(document.get("pid"))))
+        return snapshots
+
+    # Exposition
+
+    def render(self) -> str:
+        """Prometheus text exposition (version 0.0.4) of the metrics of every worker"""
+        snapshots = self._collect_snapshots()
+        lines: List[str] = []
+        aggregated: Dict[str, Dict[LabelValues, Any]] = {}
+        for name, metric in self._metrics.items():
+            merged: Dict[LabelValues, Any] = {}
+            for document, alive in snapshots:
+                entry = document["metrics"].get(name)
+                if entry is None or (metric.kind == "gauge" and not alive):
+                    continue
+                for labels, value in entry["values"]:
+                    _merge(metric, merged, tuple(labels), value)
+            aggregated[name] = merged
+
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in merged.items():
+                lines.extend(_format_samples(metric, labels, value))
+
+        for name, documentation, fn in self._derived:
+            value = fn(aggregated)
+            if value is not None:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: Any) -> bool:
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except (OSError, TypeError, ValueError):
+        return False
+
+
+def _merge(metric: _Metric, merged: Dict[LabelValues, Any], labels: LabelValues, value: Any) -> None:
+    current = merged.get(labels)
+    if metric.kind == "histogram":
+        counts, total, count = value
+        if current is None:
+            merged[labels] = [list(counts), total, count]
+        else:
+            current[0] = [a + b for a, b in zip(current[0], counts)]
+            current[1] += total
+            current[2] += count
+    elif metric.kind == "gauge" and getattr(metric, "aggregation", "sum") == "max":
+        merged[labels] = value if current is None else max(current, value)
+    else:
+        merged[labels] = value if current is None else current + value
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_samples(metric: _Metric, labels: LabelValues, value: Any) -> List[str]:
+    if metric.kind != "histogram":
+        return [f"{metric.name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}"]
+
+    counts, total, count = value
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(list(metric.buckets) + [math.inf], counts):
+        cumulative += bucket_count
+        le = f'le="{_format_value(bound)}"'
+        lines.append(f"{metric.name}_bucket{_format_labels(metric.labelnames, labels, le)} {cumulative}")
+    lines.append(f"{metric.name}_sum{_format_labels(metric.labelnames, labels)} {_format_value(total)}")
+    lines.append(f"{metric.name}_count{_format_labels(metric.labelnames, labels)} {count}")
+    return lines
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"])
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served by route", ["route"])
+AUTH_FAILURES = registry.counter(
+    "auth_failures_total", "Rejected requests by reason (InvalidAuthorization 401, ForbiddenAccess 403)", ["reason"])
+AUTH_TOKEN_CACHE_LOOKUPS = registry.counter(
+    "auth_token_cache_lookups_total", "Verified-token cache lookups by result", ["result"])
+RATE_LIMIT_REJECTIONS = registry.counter(
+    "rate_limit_rejections_total", "Requests answered 429 by the rate limiter by route", ["route"])
+ADMISSION_REJECTIONS = registry.counter(
+    "admission_rejections_total", "Requests answered 503 by admission control by route group and reason",
+    ["group", "reason"])
+ADMISSION_CONCURRENCY_LIMIT = registry.gauge(
+    "admission_concurrency_limit", "Adaptive concurrency limit by route group (summed across workers)", ["group"])
+ADMISSION_QUEUED = registry.gauge(
+    "admission_queued_requests", "Requests waiting for admission by route group", ["group"])
+RESPONSE_CACHE_LOOKUPS = registry.counter(
+    "response_cache_lookups_total", "Response cache lookups by route and result (hit, miss, coalesced)",
+    ["route", "result"])
+RESPONSE_CACHE_INVALIDATIONS = registry.counter(
+    "response_cache_invalidations_total", "Response cache invalidations by route", ["route"])
+RESPONSE_CACHE_BYTES = registry.gauge("response_cache_bytes", "Bytes of responses held by the response cache")
+AUTH_VERIFY_QUEUE_WAIT = registry.histogram(
+    "auth_verify_queue_wait_seconds", "Time signature verifications waited for a pool worker",
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+AUTH_VERIFY_IN_FLIGHT = registry.gauge(
+    "auth_verify_in_flight", "Signature verifications running or queued in the verification pool")
+AUTH_VERIFY_CAPACITY = registry.gauge(
+    "auth_verify_capacity", "Signature verifications the verification pool admits at once (0 when inline)")
+AUTH_VERIFY_REJECTIONS = registry.counter(
+    "auth_verify_rejections_total", "Requests answered 503 because the verification pool was saturated")
+JWKS_FETCHES = registry.counter(
+    "jwks_fetch_total", "JWKS fetches from the identity provider by result", ["result"])
+JWKS_FETCH_DURATION = registry.histogram(
+    "jwks_fetch_duration_seconds", "Latency of the OpenID metadata + JWKS fetch")
+JWKS_SHARED_LOADS = registry.counter(
+    "jwks_shared_loads_total", "JWKS adopted from another worker instead of fetched")
+EVENT_LOOP_LAG = registry.gauge(
+    "event_loop_lag_seconds", "Latest event loop scheduling lag (max across workers)", aggregation="max")
+EVENT_LOOP_LAG_HISTOGRAM = registry.histogram(
+    "event_loop_lag_distribution_seconds", "Event loop scheduling lag",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+DB_POOL_ACQUIRE_WAIT = registry.histogram(
+    "db_pool_acquire_wait_seconds", "Time spent waiting for a database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+DB_POOL_ACQUIRE_TIMEOUTS = registry.counter(
+    "db_pool_acquire_timeouts_total", "Requests shed because no database connection became available")
+DB_POOL_SIZE = registry.gauge("db_pool_connections", "Open database connections")
+DB_POOL_IN_USE = registry.gauge("db_pool_connections_in_use", "Database connections borrowed by requests")
+DB_POOL_MAX_SIZE = registry.gauge("db_pool_max_connections", "Configured database pool capacity")
+DB_POOL_WAITING = registry.gauge("db_pool_waiting_requests", "Requests waiting for a database connection")
+STORAGE_TRANSFERRED_BYTES = registry.counter(
+    "storage_transferred_bytes_total", "Bytes moved to and from blob storage by direction", ["direction"])
+STORAGE_ERRORS = registry.counter(
+    "storage_errors_total", "Failed blob storage operations by error", ["error"])
+HEALTH_CHECK_LATENCY = registry.gauge(
+    "health_check_latency_seconds", "Latency of the last readiness check by dependency (max across workers)", ["check"],
+    aggregation="max")
+HEALTH_CHECK_FAILING = registry.gauge(
+    "health_check_failing", "Workers whose last readiness check of the dependency failed", ["check"])
+JOBS_QUEUED = registry.gauge("jobs_queued", "Jobs waiting in the in-process broker by queue", ["queue"])
+JOBS_RUNNING = registry.gauge("jobs_running", "Jobs running in the in-process broker by queue", ["queue"])
+JOBS_FINISHED = registry.counter("jobs_finished_total", "Finished jobs by queue and status", ["queue", "status"])
+JOB_DURATION = registry.histogram(
+    "job_duration_seconds", "Run time of jobs executed by the in-process broker", ["queue"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0))
+
+
+def _token_cache_hit_ratio(aggregated: Dict[str, Dict[LabelValues, Any]]) -> Optional[float]:
+    lookups = aggregated.get(AUTH_TOKEN_CACHE_LOOKUPS.name, {})
+    total = sum(lookups.values())
+    if not total:
+        return None
+    return (lookups.get(("hit",), 0.0) + lookups.get(("shared_hit",), 0.0)) / total
+
+
+registry.derived(
+    "auth_token_cache_hit_ratio", "Verified-token cache hit ratio across all workers", _token_cache_hit_ratio)
+
+
+def _db_pool_saturation(aggregated: Dict[str, Dict[LabelValues, Any]]) -> Optional[float]:
+    capacity = sum(aggregated.get(DB_POOL_MAX_SIZE.name, {}).values())
+    if not capacity:
+        return None
+    return sum(aggregated.get(DB_POOL_IN_USE.name, {}).values()) / capacity
+
+
+registry.derived(
+    "db_pool_saturation_ratio", "Borrowed database connections over pool capacity across all workers", _db_pool_saturation)
+
+
+def _verify_pool_saturation(aggregated: Dict[str, Dict[LabelValues, Any]]) -> Optional[float]:
+    capacity = sum(aggregated.get(AUTH_VERIFY_CAPACITY.name, {}).values())
+    if not capacity:
+        return None
+    return sum(aggregated.get(AUTH_VERIFY_IN_FLIGHT.name, {}).values()) / capacity
+
+
+registry.derived(
+    "auth_verify_saturation_ratio", "Verifications in flight over verification pool capacity across all workers",
+    _verify_pool_saturation)
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a task that sleeps for `interval` seconds
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            EVENT_LOOP_LAG.set(lag)
+            EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+
+event_loop_lag_monitor = EventLoopLagMonitor()
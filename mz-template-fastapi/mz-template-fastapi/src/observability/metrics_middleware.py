@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+_UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording the in-flight gauge and the latency histogram per route.
+
+    Requests are labelled with the route template (`/api/v1/secure/{id}`) rather than the
+    raw path, so the label cardinality stays bounded. The template is resolved before the
+    request is served, so the in-flight gauge is per route as well; resolutions are cached
+    per (method, path).
+    """
+
+    def __init__(self, app: ASGIApp, route_cache_size: int = 1024) -> None:
+        self.app = app
+        self.route_cache_size = route_cache_size
+        self._routes: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+    def _resolve_route(self, scope: Scope) -> str:
+        key = (scope["method"], scope["path"])
+        route = self._routes.get(key)
+        if route is not None:
+            self._routes.move_to_end(key)
+            return route
+
+        route = _UNMATCHED_ROUTE
+        app = scope.get("app")
+        partial = None
+        for candidate in getattr(getattr(app, "router", None), "routes", ()):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate.path
+                break
+            if match == Match.PARTIAL and partial is None:
+                partial = candidate.path
+        if route == _UNMATCHED_ROUTE and partial is not None:
+            route = partial  # Method not allowed, still the same route
+
+        self._routes[key] = route
+        if len(self._routes) > self.route_cache_size:
+            self._routes.popitem(last=False)
+        return route
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._resolve_route(scope)
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(route)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], route, status_code)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .metrics import HEALTH_CHECK_FAILING, HEALTH_CHECK_LATENCY
+
+
+log = logging.getLogger(__name__)
+
+PASS = "pass"
+WARN = "warn"
+FAIL = "fail"
+
+
+class CheckWarning(Exception):
+    """Raised by a check that works but is degraded; readiness is not affected"""
+
+
+class CheckResult(BaseModel):
+    name: str
+    status: str
+    critical: bool
+    latency_ms: float
+    checked_at: datetime
+    detail: Optional[str] = None
+
+
+class ReadinessReport(BaseModel):
+    ready: bool
+    draining: bool = False
+    checked_at: Optional[datetime] = None
+    age_seconds: Optional[float] = None
+    duration_ms: Optional[float] = None
+    checks: List[CheckResult] = []
+
+
+class DependencyCheck:
+    """
+    An async probe of one dependency: returning (optionally a detail string) passes,
+    raising CheckWarning warns, raising anything else or exceeding `timeout` fails.
+    Failing `critical` checks make the worker not ready.
+    """
+
+    def __init__(self, name: str, probe: Callable[[], Awaitable[Optional[str]]], timeout: float = 2.0,
+                 critical: bool = True):
+        self.name = name
+        self.probe = probe
+        self.timeout = timeout
+        self.critical = critical
+
+    async def run(self) -> CheckResult:
+        started = time.perf_counter()
+        status, detail = PASS, None
+        try:
+            detail = await asyncio.wait_for(self.probe(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            status, detail = FAIL, f"Timed out after {self.timeout}s"
+        except CheckWarning as e:
+            status, detail = WARN, str(e)
+        except Exception as e:
+            status, detail = FAIL, f"{type(e).__name__}: {getattr(e, 'detail', None) or e}"
+        latency = time.perf_counter() - started
+        HEALTH_CHECK_LATENCY.set(latency, self.name)
+        HEALTH_CHECK_FAILING.set(1 if status == FAIL else 0, self.name)
+        return CheckResult(name=self.name, status=status, critical=self.critical, latency_ms=round(latency * 1000, 3),
+                           checked_at=datetime.now(timezone.utc), detail=detail)
+
+
+class ReadinessMonitor:
+    """
+    Runs the dependency checks in the background and serves the cached outcome.
+
+    Every `interval` seconds all checks run concurrently, each bounded by its own
+    timeout; `/healthcheck/ready` only reads the last report, so probes never wait on
+    (or cause) a call to a dependency however often they come. A report older than
+    `stale_after` counts as not ready: the refresher itself is stuck.
+    """
+
+    def __init__(self, interval: float = 5.0, stale_after: Optional[float] = None):
+        self.interval = interval
+        self.stale_after = stale_after
+        self._checks: Dict[str, DependencyCheck] = {}
+        self._results: List[CheckResult] = []
+        self._checked_at: Optional[float] = None
+        self._checked_at_wall: Optional[datetime] = None
+        self._duration = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.draining = False
+
+    def register(self, name: str, probe: Callable[[], Awaitable[Optional[str]]], timeout: float = 2.0,
+                 critical: bool = True) -> None:
+        self._checks[name] = DependencyCheck(name, probe, timeout, critical)
+
+    def unregister(self, name: str) -> None:
+        self._checks.pop(name, None)
+
+    async def run_checks(self) -> ReadinessReport:
+        started = time.perf_counter()
+        self._results = list(await asyncio.gather(*(check.run() for check in self._checks.values())))
+        self._duration = time.perf_counter() - started
+        self._checked_at = time.monotonic()
+        self._checked_at_wall = datetime.now(timezone.utc)
+        for result in self._results:
+            if result.status != PASS:
+                log.warning(f"Readiness check '{result.name}' {result.status}: {result.detail}")
+        return self.report()
+
+    def drain(self) -> None:
+        """
+        Report not ready from now on, the worker is shutting down. Safe to call from a signal handler
+        """
+        self.draining = True
+
+    def report(self) -> ReadinessReport:
+        if self._checked_at is None:
+            return ReadinessReport(ready=False, draining=self.draining)
+        age = time.monotonic() - self._checked_at
+        stale_after = self.stale_after if self.stale_after is not None else self.interval * 3
+        ready = not self.draining and age <= stale_after and all(
+            result.status != FAIL for result in self._results if result.critical)
+        return ReadinessReport(
+            ready=ready,
+            draining=self.draining,
+            checked_at=self._checked_at_wall,
+            age_seconds=round(age, 3),
+            duration_ms=round(self._duration * 1000, 3),
+            checks=self._results)
+
+    def start(self) -> None:
+        """
+        Start the background refresher, needs a running event loop
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            ready = False
+            try:
+                ready = (await self.run_checks()).ready
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Readiness checks failed to run: {e}")
+            # Not ready (e.g. keys still loading at startup): look again sooner
+            await asyncio.sleep(self.interval if ready else min(self.interval, 1.0))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
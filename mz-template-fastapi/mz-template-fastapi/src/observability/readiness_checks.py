@@ -0,0 +1,69 @@
+from typing import Optional
+
+from ..authorization.azure_authorization import authorize
+from ..config import Settings, get_app_config
+from ..database import database
+from ..storage import storage
+from .readiness import CheckWarning, ReadinessMonitor
+
+
+async def check_database() -> Optional[str]:
+    # Fails on an exhausted pool too: the acquire waits past the check timeout
+    await database.ping()
+    stats = database.stats()
+    return f"{stats['in_use']}/{stats['max_size']} connections in use"
+
+
+async def check_storage() -> Optional[str]:
+    await storage.ping()
+    return f"Container '{storage.container}' is reachable"
+
+
+def jwks_check(max_age: float):
+    async def check_jwks() -> Optional[str]:
+        key_manager = authorize.key_manager
+        # The key manager's own refresher does the fetching, this check only reads its state
+        key_manager.start()
+        age = key_manager.age()
+        if not key_manager.keys or age is None:
+            raise RuntimeError("No signing keys loaded yet")
+        if age > max_age:
+            raise RuntimeError(f"Signing keys are {age:.0f}s old, the IdP has been unreachable too long")
+        if age > key_manager.refresh_interval:
+            raise CheckWarning(f"Signing keys are {age:.0f}s old, refreshing them is failing")
+        return f"{len(key_manager.keys)} keys, refreshed {age:.0f}s ago"
+    return check_jwks
+
+
+def configure_readiness(monitor: ReadinessMonitor) -> None:
+    """
+    JWKS freshness always, the database and blob storage when they are configured.
+    Called by the app lifespan, and again for the new settings on every reload
+    """
+    settings = get_app_config().settings
+    monitor.interval = settings.health_check_interval
+    timeout = settings.health_check_timeout
+    monitor.register("jwks", jwks_check(settings.health_jwks_max_age), timeout)
+    for name, configured, check in (("database", database.configured, check_database),
+                                    ("storage", storage.configured, check_storage)):
+        if configured:
+            monitor.register(name, check, timeout)
+        else:
+            monitor.unregister(name)
+
+
+def _reload_readiness(previous: Settings, settings: Settings) -> None:
+    configure_readiness(readiness)
+
+
+def setup_readiness() -> ReadinessMonitor:
+    """
+    Register the checks of `readiness` and keep them in line with the settings
+    """
+    configure_readiness(readiness)
+    get_app_config().on_reload(_reload_readiness)
+    return readiness
+
+
+# Built empty, so importing the module reads no configuration; the lifespan registers the checks
+readiness = ReadinessMonitor()
@@ -0,0 +1,206 @@
+import asyncio
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Dict, Iterator, List, Tuple
+
+
+class StartupTimer:
+    """
+    Wall-clock time of the startup steps of this worker: building the app (one step per
+    feature router, so each router's imports are attributed to it) and every lifespan
+    startup task. The lifespan logs them as one line once the worker is up.
+    """
+
+    def __init__(self):
+        self.steps: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - started))
+
+    def total(self) -> float:
+        return sum(duration for _, duration in self.steps)
+
+    def summary(self) -> str:
+        steps = ", ".join(f"{name} {duration * 1000:.0f} ms" for name, duration in self.steps)
+        return f"{self.total() * 1000:.0f} ms ({steps})"
+
+
+startup_timer = StartupTimer()
+
+_background_imports: Dict[str, asyncio.Future] = {}
+
+
+async def import_in_background(name: str) -> ModuleType:
+    """
+    Import `name` in a worker thread, once per process.
+
+    For the SDKs kept off the startup path: imported on the event loop they would stall
+    every request for the whole import (half a second for the blob SDK), from a thread
+    the loop keeps serving while they load.
+    """
+    future = _background_imports.get(name)
+    if future is None:
+        # Only an import that is fully done is safe to use without waiting
+        if name in sys.modules:
+            return sys.modules[name]
+        future = _background_imports[name] = asyncio.ensure_future(asyncio.to_thread(importlib.import_module, name))
+    return await asyncio.shield(future)
+
+
+# Written to stderr by the profiled worker once it answered: the imports listed after it
+# (background tasks started by the lifespan) are not part of the startup
+FIRST_RESPONSE_MARKER = "--- first response sent ---"
+
+
+async def _serve_first_request(app, path: str) -> Dict[str, float]:
+    """
+    Run the lifespan startup, one GET `path` and the lifespan shutdown straight through
+    the ASGI interface, timing each
+    """
+    lifespan_events: asyncio.Queue = asyncio.Queue()
+    lifespan_replies: asyncio.Queue = asyncio.Queue()
+
+    async def lifespan_receive() -> dict:
+        return await lifespan_events.get()
+
+    async def lifespan_send(message: dict) -> None:
+        await lifespan_replies.put(message)
+
+    started = time.perf_counter()
+    scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+    lifespan = asyncio.get_running_loop().create_task(app(scope, lifespan_receive, lifespan_send))
+    await lifespan_events.put({"type": "lifespan.startup"})
+    reply = await lifespan_replies.get()
+    if reply["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Application startup failed: {reply.get('message', '')}")
+    ready = time.perf_counter()
+
+    status = 0
+    request_scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80), "state": {},
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(request_scope, receive, send)
+    answered = time.perf_counter()
+    print(FIRST_RESPONSE_MARKER, file=sys.stderr, flush=True)
+
+    await lifespan_events.put({"type": "lifespan.shutdown"})
+    await lifespan_replies.get()
+    await lifespan
+    return {"startup": ready - started, "first_request": answered - ready, "status": status,
+            "shutdown": time.perf_counter() - answered}
+
+
+def _profile_child(output: str, path: str, launched: float) -> None:
+    """Runs under `python -X importtime`, times one worker from `import src.main` to its first response"""
+    interpreter = time.time() - launched
+    started = time.perf_counter()
+    import importlib
+    main = importlib.import_module("src.main")
+    imported = time.perf_counter()
+    app = main.create_app()
+    built = time.perf_counter()
+    build_steps = len(startup_timer.steps)
+    served = asyncio.run(_serve_first_request(app, path))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(dict(served, **{
+            "interpreter": interpreter,
+            "import": imported - started,
+            "build": built - imported,
+            "build_steps": startup_timer.steps[:build_steps],
+            "startup_steps": startup_timer.steps[build_steps:],
+            "path": path,
+        }), f)
+
+
+def _parse_import_times(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self us, cumulative us) of the `-X importtime` lines up to the first response"""
+    modules = []
+    for line in stderr.splitlines():
+        if line == FIRST_RESPONSE_MARKER:
+            break
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return modules
+
+
+def profile_startup(path: str, top: int = 15) -> int:
+    """
+    Start one worker in a fresh interpreter under `python -X importtime`, serve a single
+    request and print where the time to the first response went: the interpreter, the
+    imports (per package and per `src` module), every app construction and lifespan step
+    and the request itself.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "profile.json")
+        code = (f"from src.observability.startup import _profile_child; "
+                f"_profile_child({output!r}, {path!r}, {time.time()!r})")
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+        wall = time.perf_counter() - started
+        if process.returncode != 0 or not os.path.exists(output):
+            print("\n".join(line for line in process.stderr.splitlines() if not line.startswith("import time:")))
+            return 1
+        with open(output, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+
+    modules = _parse_import_times(process.stderr)
+    first_response = profile["interpreter"] + profile["import"] + profile["build"] + profile["startup"] + \
+        profile["first_request"]
+
+    def ms(seconds: float) -> str:
+        return f"{seconds * 1000:10.1f} ms"
+
+    print(f"First response to GET {profile['path']} ({profile['status']}) {first_response * 1000:.0f} ms "
+          f"after the process start")
+    print(f"  {'interpreter start':<40}{ms(profile['interpreter'])}")
+    print(f"  {'import src.main':<40}{ms(profile['import'])}")
+    print(f"  {'create_app()':<40}{ms(profile['build'])}")
+    for name, duration in profile["build_steps"]:
+        print(f"    {name:<38}{ms(duration)}")
+    print(f"  {'lifespan startup':<40}{ms(profile['startup'])}")
+    for name, duration in profile["startup_steps"]:
+        print(f"    {name:<38}{ms(duration)}")
+    print(f"  {'first request':<40}{ms(profile['first_request'])}")
+    print(f"  {'lifespan shutdown':<40}{ms(profile['shutdown'])}")
+    print(f"  {'interpreter exit':<40}{ms(wall - first_response - profile['shutdown'])}")
+
+    packages: Dict[str, int] = {}
+    for module, self_us, _ in modules:
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(f"\nImport time per package (self), {len(modules)} modules imported before the first response")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<40}{ms(self_us / 1e6)}")
+
+    print("\nImport time per src module (self / cumulative)")
+    own = sorted((entry for entry in modules if entry[0] == "src" or entry[0].startswith("src.")), key=lambda e: -e[2])
+    for module, self_us, cumulative_us in own[:top]:
+        print(f"  {module:<60}{self_us / 1000:10.1f}{cumulative_us / 1000:10.1f} ms")
+    return 0
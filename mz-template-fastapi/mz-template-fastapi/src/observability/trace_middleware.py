@@ -0,0 +1,95 @@
+import os
+import re
+from typing import Optional, Tuple
+
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import NonRecordingSpan, SpanContext, TraceFlags
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .trace_context import trace_id_var
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_MAX_TRACE_ID_LENGTH = 128
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, int]]:
+    """
+    Parse a W3C `traceparent` header into (trace_id, parent_span_id, flags), None when invalid
+    """
+    match = _TRACEPARENT.match(value.strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, int(flags, 16)
+
+
+class TraceContextMiddleware:
+    """
+    Pure ASGI middleware that sets the request trace id.
+
+    The id is taken from an upstream W3C `traceparent`, then `X-Trace-ID`, and only minted
+    when neither is present. It is stored in `trace_id_var` and `request.state.trace_id`,
+    echoed in the `X-Trace-ID` response header, and a valid `traceparent` becomes the
+    remote parent of the OpenTelemetry context so spans join the upstream trace. When the
+    OpenTelemetry instrumentation already opened a server span, its trace id is used.
+
+    Unlike `@app.middleware("http")` this adds no extra task or response stream per request,
+    so streaming responses are passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Trace-ID") -> None:
+        self.app = app
+        self.header_name = header_name.lower().encode("latin-1")
+        self.response_header_name = header_name.encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        trace_id = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = parse_traceparent(value.decode("latin-1"))
+            elif name == self.header_name and len(value) <= _MAX_TRACE_ID_LENGTH:
+                trace_id = value.decode("latin-1")
+
+        context_token = None
+        active_span_context = trace.get_current_span().get_span_context()
+        if active_span_context.is_valid:
+            # The OpenTelemetry instrumentation already joined the upstream trace, keep its ids
+            trace_id = format(active_span_context.trace_id, "032x")
+        elif traceparent is not None:
+            trace_id, parent_span_id, flags = traceparent
+            span_context = SpanContext(
+                trace_id=int(trace_id, 16),
+                span_id=int(parent_span_id, 16),
+                is_remote=True,
+                trace_flags=TraceFlags(flags),
+            )
+            context_token = otel_context.attach(trace.set_span_in_context(NonRecordingSpan(span_context)))
+        elif not trace_id:
+            trace_id = os.urandom(16).hex()
+
+        scope.setdefault("state", {})["trace_id"] = trace_id
+        var_token = trace_id_var.set(trace_id)
+        header_value = trace_id.encode("latin-1")
+
+        async def send_with_trace_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(self.response_header_name, header_value)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            trace_id_var.reset(var_token)
+            if context_token is not None:
+                otel_context.detach(context_token)
+
@@ -1,13 +1,85 @@
-from opentelemetry import trace
-from opentelemetry.sdk.resources import Resource
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+import logging
+from typing import TYPE_CHECKING, Optional
 
-def setup_tracing():
-    resource = Resource(attributes={"service.name": "your-service-name"})
-    tracer_provider = TracerProvider(resource=resource)
-    trace.set_tracer_provider(tracer_provider)
+from fastapi import FastAPI
 
-    span_processor = BatchSpanProcessor(ConsoleSpanExporter())
-    tracer_provider.add_span_processor(span_processor)
+from ..config import get_app_config
 
+# The SDK is only imported when an exporter is configured: with the default `none`
+# exporter tracing stays on the API's no-op tracer and costs nothing at startup
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SpanExporter
+
+
+log = logging.getLogger(__name__)
+
+EXPORTERS = ("none", "file", "otlp")
+
+_tracer_provider: Optional['TracerProvider'] = None
+
+
+def _build_exporter(name: str) -> Optional['SpanExporter']:
+    app_config = get_app_config()
+    if name == "file":
+        from .file_span_exporter import JsonLinesFileSpanExporter
+        return JsonLinesFileSpanExporter(
+            app_config.settings.tracing_file_path,
+            max_bytes=app_config.settings.tracing_file_max_bytes,
+            backup_count=app_config.settings.tracing_file_backup_count)
+    if name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            log.warning("TRACING_EXPORTER=otlp requires opentelemetry-exporter-otlp-proto-http, tracing disabled")
+            return None
+        return OTLPSpanExporter(endpoint=app_config.settings.tracing_otlp_endpoint)
+    if name != "none":
+        log.warning(f"Unknown TRACING_EXPORTER '{name}', expected one of {EXPORTERS}, tracing disabled")
+    return None
+
+
+def setup_tracing(app: FastAPI) -> Optional['TracerProvider']:
+    """
+    Install the tracer provider and instrument the app according to the TRACING_* settings.
+
+    With the `none` exporter (the default) no SDK provider is installed, so spans stay
+    no-op and the request path pays nothing. Otherwise spans are sampled with a
+    parent-based ratio sampler, exported in batches, and the routes listed in
+    TRACING_EXCLUDED_URLS (the healthcheck and metrics routes by default) produce no spans at all.
+    """
+    global _tracer_provider
+    app_config = get_app_config()
+    exporter = _build_exporter(app_config.settings.tracing_exporter)
+    if exporter is None:
+        return None
+
+    if _tracer_provider is None:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+        resource = Resource(attributes={"service.name": app_config.settings.service_name})
+        sampler = ParentBased(TraceIdRatioBased(app_config.settings.tracing_sample_ratio))
+        _tracer_provider = TracerProvider(resource=resource, sampler=sampler)
+        _tracer_provider.add_span_processor(BatchSpanProcessor(exporter))
+        trace.set_tracer_provider(_tracer_provider)
+
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    FastAPIInstrumentor.instrument_app(
+        app,
+        tracer_provider=_tracer_provider,
+        excluded_urls=",".join(app_config.settings.tracing_excluded_urls),
+        exclude_spans=["receive", "send"])
+    return _tracer_provider
+
+
+def shutdown_tracing() -> None:
+    """
+    Flush the spans still queued in the batch processor
+    """
+    global _tracer_provider
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()
+        _tracer_provider = None
@@ -0,0 +1,18 @@
+from .cursor import decode_cursor, encode_cursor, query_fingerprint
+from .dependencies import get_page_request
+from .paginator import COUNT_MODES, Page, PageRequest, Paginator
+from .query_grammar import FieldSpec, InvalidPaginationQuery, QueryGrammar
+
+__all__ = [
+    "COUNT_MODES",
+    "FieldSpec",
+    "InvalidPaginationQuery",
+    "Page",
+    "PageRequest",
+    "Paginator",
+    "QueryGrammar",
+    "decode_cursor",
+    "encode_cursor",
+    "get_page_request",
+    "query_fingerprint",
+]
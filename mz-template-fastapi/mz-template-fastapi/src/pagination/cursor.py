@@ -0,0 +1,45 @@
+import base64
+import hashlib
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Sequence
+
+from .query_grammar import FilterClause, InvalidPaginationQuery, SortClause
+
+
+def query_fingerprint(filters: Sequence[FilterClause], sort: Sequence[SortClause]) -> str:
+    """
+    Identifies the filters and order a cursor was issued for
+    """
+    text = "&".join(clause.normalized() for clause in filters) + "#" + ",".join(clause.normalized() for clause in sort)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any], fingerprint: str) -> str:
+    """
+    Opaque token holding the sort key of the last row of a page
+    """
+    payload = json.dumps({"k": [_to_json(value) for value in values], "q": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, sort: Sequence[SortClause], fingerprint: str) -> List[Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values, issued_for = payload["k"], payload["q"]
+    except (ValueError, KeyError, TypeError, UnicodeError):
+        raise InvalidPaginationQuery("Malformed cursor")
+    if issued_for != fingerprint or len(values) != len(sort):
+        raise InvalidPaginationQuery("The cursor does not match the filters and sort order of this request")
+    return [clause.field.convert(value) for clause, value in zip(sort, values)]
@@ -0,0 +1,27 @@
+from typing import List, Optional
+
+from fastapi import Query
+
+from .paginator import COUNT_MODES, PageRequest
+from .query_grammar import InvalidPaginationQuery
+from ..config import get_app_config
+
+
+async def get_page_request(
+    page: int = Query(1, ge=1, description="Page number, used when no cursor is given"),
+    page_size: Optional[int] = Query(None, ge=1, description="Page size, capped by PAGINATION_MAX_PAGE_SIZE"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    filters: List[str] = Query([], description="Filters, field:operator:value"),
+    sort_by: List[str] = Query([], description="Sorting, field or -field"),
+    count: str = Query("none", description=f"Total count: {', '.join(COUNT_MODES)}"),
+) -> PageRequest:
+    app_config = get_app_config()
+    max_page_size = app_config.settings.pagination_max_page_size
+    if page_size is None:
+        page_size = min(app_config.settings.pagination_default_page_size, max_page_size)
+    elif page_size > max_page_size:
+        raise InvalidPaginationQuery(f"page_size must not exceed {max_page_size}")
+    if count not in COUNT_MODES:
+        raise InvalidPaginationQuery(f"count must be one of {COUNT_MODES}")
+    return PageRequest.model_construct(
+        page=page, page_size=page_size, cursor=cursor, filters=filters, sort_by=sort_by, count=count)
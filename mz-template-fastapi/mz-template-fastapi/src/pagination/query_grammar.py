@@ -0,0 +1,248 @@
+import re
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+# operator -> SQL template, `{column}` and `{param}` are filled in by the compiler
+OPERATORS: Dict[str, str] = {
+    "eq": "{column} = {param}",
+    "ne": "{column} <> {param}",
+    "lt": "{column} < {param}",
+    "lte": "{column} <= {param}",
+    "gt": "{column} > {param}",
+    "gte": "{column} >= {param}",
+    "like": "{column} ILIKE {param}",
+    "in": "{column} = ANY({param})",
+    "isnull": "{column} IS NULL",
+    "notnull": "{column} IS NOT NULL",
+}
+_VALUELESS_OPERATORS = ("isnull", "notnull")
+_LIST_SEPARATOR = "|"
+
+
+def is_identifier(value: str) -> bool:
+    """True for a plain (optionally qualified) SQL identifier such as `items` or `i.created`"""
+    return bool(_IDENTIFIER.match(value))
+
+
+class InvalidPaginationQuery(HTTPException):
+    def __init__(self, detail: Any = None) -> None:
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in ("true", "1", "yes"):
+        return True
+    if lowered in ("false", "0", "no"):
+        return False
+    raise ValueError(f"'{value}' is not a boolean")
+
+
+_CONVERTERS = {
+    str: str,
+    int: int,
+    float: float,
+    bool: _parse_bool,
+    Decimal: Decimal,
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    uuid.UUID: uuid.UUID,
+}
+
+
+class FieldSpec:
+    """
+    A field clients may filter or sort on, mapped to a trusted SQL column.
+
+    Only fields declared here reach the SQL text; values always travel as bind
+    parameters. Sort fields used for keyset pagination must be NOT NULL.
+    """
+
+    def __init__(self, name: str, type: type = str, column: Optional[str] = None,
+                 filterable: bool = True, sortable: bool = True, operators: Optional[Iterable[str]] = None):
+        column = column or name
+        if not is_identifier(column):
+            raise ValueError(f"'{column}' is not a valid SQL column reference")
+        if type not in _CONVERTERS:
+            raise ValueError(f"Unsupported field type {type!r}")
+        self.name = name
+        self.type = type
+        self.column = column
+        self.filterable = filterable
+        self.sortable = sortable
+        self.operators = frozenset(operators) if operators is not None else frozenset(OPERATORS)
+
+    def convert(self, value: Any) -> Any:
+        if isinstance(value, self.type) and not (self.type is int and isinstance(value, bool)):
+            return value
+        try:
+            return _CONVERTERS[self.type](value if self.type is not str else str(value))
+        except (TypeError, ValueError, ArithmeticError):
+            raise InvalidPaginationQuery(f"Invalid value '{value}' for field '{self.name}'")
+
+
+class FilterClause:
+    __slots__ = ("field", "operator", "value")
+
+    def __init__(self, field: FieldSpec, operator: str, value: Any):
+        self.field = field
+        self.operator = operator
+        self.value = value
+
+    def normalized(self) -> str:
+        if self.operator in _VALUELESS_OPERATORS:
+            return f"{self.field.name}:{self.operator}"
+        value = _LIST_SEPARATOR.join(map(str, self.value)) if self.operator == "in" else str(self.value)
+        return f"{self.field.name}:{self.operator}:{value}"
+
+
+class SortClause:
+    __slots__ = ("field", "descending")
+
+    def __init__(self, field: FieldSpec, descending: bool = False):
+        self.field = field
+        self.descending = descending
+
+    def normalized(self) -> str:
+        return f"-{self.field.name}" if self.descending else self.field.name
+
+
+class QueryGrammar:
+    """
+    Parses the `filters` and `sort_by` query parameters.
+
+    filters: `field:operator:value` (`field:value` means `eq`), e.g. `status:eq:open`,
+    `created:gte:2024-01-01T00:00:00`, `owner:in:alice|bob`, `name:like:smith`,
+    `deleted_at:isnull`. Repeated filters are combined with AND.
+
+    sort_by: `field` or `-field` (descending), `field:asc` / `field:desc` also accepted.
+    """
+
+    def __init__(self, fields: Sequence[FieldSpec], max_filters: int = 20, max_sort_fields: int = 5):
+        self.fields: Dict[str, FieldSpec] = {field.name: field for field in fields}
+        self.max_filters = max_filters
+        self.max_sort_fields = max_sort_fields
+
+    def _field(self, name: str) -> FieldSpec:
+        field = self.fields.get(name)
+        if field is None:
+            raise InvalidPaginationQuery(f"Unknown field '{name}', expected one of {sorted(self.fields)}")
+        return field
+
+    def parse_filters(self, filters: Sequence[str]) -> List[FilterClause]:
+        if len(filters) > self.max_filters:
+            raise InvalidPaginationQuery(f"At most {self.max_filters} filters are allowed")
+        clauses = []
+        for expression in filters:
+            parts = expression.split(":", 2)
+            if len(parts) == 2 and parts[1] in _VALUELESS_OPERATORS:
+                name, operator, raw_value = parts[0], parts[1], None
+            elif len(parts) == 2:
+                name, operator, raw_value = parts[0], "eq", parts[1]
+            elif len(parts) == 3:
+                name, operator, raw_value = parts
+            else:
+                raise InvalidPaginationQuery(f"Invalid filter '{expression}', expected field:operator:value")
+
+            field = self._field(name)
+            if not field.filterable:
+                raise InvalidPaginationQuery(f"Field '{name}' cannot be filtered")
+            if operator not in OPERATORS or operator not in field.operators:
+                raise InvalidPaginationQuery(f"Operator '{operator}' is not supported for field '{name}'")
+
+            if operator in _VALUELESS_OPERATORS:
+                value = None
+            elif operator == "in":
+                value = [field.convert(item) for item in raw_value.split(_LIST_SEPARATOR)]
+            elif operator == "like":
+                if field.type is not str:
+                    raise InvalidPaginationQuery(f"Operator 'like' requires a text field, '{name}' is not")
+                value = raw_value
+            else:
+                value = field.convert(raw_value)
+            clauses.append(FilterClause(field, operator, value))
+        return clauses
+
+    def parse_sort(self, sort_by: Sequence[str]) -> List[SortClause]:
+        if len(sort_by) > self.max_sort_fields:
+            raise InvalidPaginationQuery(f"At most {self.max_sort_fields} sort fields are allowed")
+        clauses = []
+        seen = set()
+        for expression in sort_by:
+            descending = expression.startswith("-")
+            name = expression[1:] if descending else expression
+            if ":" in name:
+                name, direction = name.split(":", 1)
+                if direction not in ("asc", "desc"):
+                    raise InvalidPaginationQuery(f"Invalid sort direction '{direction}', expected asc or desc")
+                descending = direction == "desc"
+            field = self._field(name)
+            if not field.sortable:
+                raise InvalidPaginationQuery(f"Field '{name}' cannot be sorted")
+            if name in seen:
+                raise InvalidPaginationQuery(f"Field '{name}' is sorted more than once")
+            seen.add(name)
+            clauses.append(SortClause(field, descending))
+        return clauses
+
+
+class SqlParameters:
+    """
+    Collects bind values and hands out their asyncpg placeholders ($1, $2, ...)
+    """
+
+    def __init__(self):
+        self.values: List[Any] = []
+
+    def add(self, value: Any) -> str:
+        self.values.append(value)
+        return f"${len(self.values)}"
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def compile_filters(clauses: Sequence[FilterClause], parameters: SqlParameters) -> List[str]:
+    conditions = []
+    for clause in clauses:
+        template = OPERATORS[clause.operator]
+        if clause.operator in _VALUELESS_OPERATORS:
+            conditions.append(template.format(column=clause.field.column, param=""))
+            continue
+        value = f"%{_escape_like(clause.value)}%" if clause.operator == "like" else clause.value
+        conditions.append(template.format(column=clause.field.column, param=parameters.add(value)))
+    return conditions
+
+
+def compile_order_by(clauses: Sequence[SortClause]) -> str:
+    return ", ".join(f"{clause.field.column} {'DESC' if clause.descending else 'ASC'}" for clause in clauses)
+
+
+def compile_keyset(clauses: Sequence[SortClause], values: Sequence[Any], parameters: SqlParameters) -> str:
+    """
+    Condition selecting the rows after `values` in the given order.
+
+    A single direction compiles to a row comparison, `(a, b) > ($1, $2)`, which Postgres
+    answers with one index range scan; mixed directions expand to
+    `a > $1 OR (a = $1 AND b < $2)`.
+    """
+    placeholders = [parameters.add(value) for value in values]
+    if len({clause.descending for clause in clauses}) == 1:
+        operator = "<" if clauses[0].descending else ">"
+        columns = ", ".join(clause.field.column for clause in clauses)
+        return f"({columns}) {operator} ({', '.join(placeholders)})"
+
+    alternatives = []
+    for index, clause in enumerate(clauses):
+        equalities = [f"{previous.field.column} = {placeholders[i]}" for i, previous in enumerate(clauses[:index])]
+        operator = "<" if clause.descending else ">"
+        alternatives.append(" AND ".join(equalities + [f"{clause.field.column} {operator} {placeholders[index]}"]))
+    return "(" + " OR ".join(f"({alternative})" for alternative in alternatives) + ")"
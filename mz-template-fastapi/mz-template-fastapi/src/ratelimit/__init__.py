@@ -0,0 +1,7 @@
+from .buckets import RateLimit, TokenBuckets, parse_rate_limit, parse_rate_limits
+from .limiter import (
+    RATE_LIMIT_RESPONSES, RateLimiter, RateLimitExceeded, client_address, limit_per_client, limit_per_user,
+    rate_limiter)
+
+__all__ = ["RateLimit", "TokenBuckets", "parse_rate_limit", "parse_rate_limits", "RATE_LIMIT_RESPONSES",
+           "RateLimiter", "RateLimitExceeded", "client_address", "limit_per_client", "limit_per_user", "rate_limiter"]
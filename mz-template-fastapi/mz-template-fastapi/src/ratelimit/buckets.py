@@ -0,0 +1,42 @@
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from ..config.parsers import RateLimit, parse_rate_limit, parse_rate_limits  # noqa: F401 - re-exported
+
+
+class TokenBuckets:
+    """
+    In-process token buckets, one per key, refilled lazily on each take: a dict lookup and
+    a few float operations. The least recently used buckets beyond `max_keys` are dropped,
+    which only ever hands their callers a full bucket again.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: Hashable, rate: float, burst: float, now: Optional[float] = None) -> float:
+        """
+        Take one token from the bucket of `key`: 0.0 when granted, otherwise the seconds
+        until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = burst
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            self._buckets.move_to_end(key)
+        wait = 0.0
+        if tokens >= 1.0:
+            tokens -= 1.0
+        else:
+            wait = (1.0 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import math
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+
+from .buckets import RateLimit, TokenBuckets, parse_rate_limit, parse_rate_limits
+from ..authorization.authorize import get_user
+from ..authorization.models.user import User
+from ..config import Settings, get_app_config
+from ..observability.metrics import RATE_LIMIT_REJECTIONS
+from ..shared import SharedTokenBuckets, get_shared_state_dir, shared_memory_supported
+
+
+log = logging.getLogger(__name__)
+
+RATE_LIMIT_RESPONSES = {429: {"description": "Rate limit exceeded, retry after `Retry-After` seconds"}}
+
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, route: str, retry_after: float) -> None:
+        RATE_LIMIT_REJECTIONS.inc(route)
+        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many requests, slow down.",
+                         headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+class RateLimiter:
+    """
+    Token bucket limits per route and caller.
+
+    Each route uses its entry of RATE_LIMITS, or RATE_LIMIT_DEFAULT. Buckets live in
+    shared memory by default, so the limit holds for all the worker processes of the
+    host; `memory` keeps them per worker (divide the limits by the worker count). The
+    settings are read and the buckets opened on first use; the limits follow a settings
+    reload, the buckets and their backend are kept.
+    """
+
+    def __init__(self):
+        self.configured = False
+        self.default: Optional[RateLimit] = None
+        self.limits: Dict[str, Optional[RateLimit]] = {}
+        self._shared: Optional[SharedTokenBuckets] = None
+        self._local: Optional[TokenBuckets] = None
+
+    def _configure(self) -> None:
+        app_config = get_app_config()
+        self.default = parse_rate_limit(app_config.settings.rate_limit_default)
+        self.limits = parse_rate_limits(app_config.settings.rate_limits)
+        if app_config.settings.rate_limit_backend == "shared" and shared_memory_supported():
+            try:
+                directory = get_shared_state_dir(app_config.settings.shared_state_dir)
+                self._shared = SharedTokenBuckets(os.path.join(directory, "rate-limits.bin"),
+                                                  slots=app_config.settings.rate_limit_slots)
+            except OSError as e:
+                log.warning(f"Shared rate limits disabled, unable to use the shared state directory: {e}")
+        if self._shared is None:
+            self._local = TokenBuckets(max_keys=app_config.settings.rate_limit_max_keys)
+        app_config.on_reload(self._reload)
+        self.configured = True
+
+    def _reload(self, previous: Settings, settings: Settings) -> None:
+        if (previous.rate_limit_default, previous.rate_limits) == (settings.rate_limit_default, settings.rate_limits):
+            return
+        default, limits = parse_rate_limit(settings.rate_limit_default), parse_rate_limits(settings.rate_limits)
+        self.default, self.limits = default, limits
+
+    def limit_for(self, route: str) -> Optional[RateLimit]:
+        if not self.configured:
+            self._configure()
+        return self.limits.get(route, self.default)
+
+    def check(self, route: str, key: str) -> None:
+        """Count one request of `key` on `route`, raise RateLimitExceeded when over the limit"""
+        limit = self.limit_for(route)
+        if limit is None:
+            return
+        if self._shared is not None:
+            digest = hashlib.blake2b(f"{route}\0{key}".encode("utf-8"), digest_size=16).digest()
+            wait = self._shared.take(digest, limit.rate, limit.burst)
+        else:
+            wait = self._local.take((route, key), limit.rate, limit.burst)
+        if wait > 0:
+            raise RateLimitExceeded(route, wait)
+
+
+rate_limiter = RateLimiter()
+
+
+def client_address(request: Request) -> str:
+    # The peer address, or the X-Forwarded-For client when uvicorn trusts the proxy (FORWARDED_ALLOW_IPS)
+    return request.client.host if request.client else "unknown"
+
+
+def limit_per_user(route: str) -> Callable[..., Awaitable[None]]:
+    """
+    Dependency limiting every signed-in user (`User.id`) on `route`, e.g.
+    `APIRouter(dependencies=[Depends(limit_per_user("secure"))])`. The user is resolved
+    once per request, shared with the endpoint's own `get_user`.
+    """
+    async def dependency(user: User = Depends(get_user)) -> None:
+        rate_limiter.check(route, user.id)
+    return dependency
+
+
+def limit_per_client(route: str) -> Callable[..., Awaitable[None]]:
+    """Dependency limiting every client address on `route`, for anonymous endpoints"""
+    async def dependency(request: Request) -> None:
+        rate_limiter.check(route, client_address(request))
+    return dependency
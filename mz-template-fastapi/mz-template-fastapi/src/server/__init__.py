@@ -0,0 +1,4 @@
+from .launcher import resolve_workers, run
+from .limits import available_cpus, cgroup_cpu_limit, cgroup_memory_limit, worker_count
+
+__all__ = ["resolve_workers", "run", "available_cpus", "cgroup_cpu_limit", "cgroup_memory_limit", "worker_count"]
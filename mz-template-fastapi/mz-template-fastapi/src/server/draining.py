@@ -0,0 +1,48 @@
+import logging
+import signal
+import time
+from types import FrameType
+from typing import Optional
+
+from uvicorn import Config, Server
+
+from ..observability.readiness_checks import readiness
+
+
+log = logging.getLogger(__name__)
+
+
+class DrainingServer(Server):
+    """
+    uvicorn server that drains before it stops.
+
+    The first SIGTERM turns `/healthcheck/ready` into a 503 and keeps serving for
+    `drain_delay` seconds, so the load balancer takes the worker out of rotation while
+    the listener is still open. uvicorn's graceful shutdown then closes the listener, lets
+    in-flight requests finish for up to `timeout_graceful_shutdown` and runs the lifespan
+    shutdown. A second signal skips the rest of the delay.
+    """
+
+    def __init__(self, config: Config, drain_delay: float = 0.0):
+        super().__init__(config)
+        self.drain_delay = drain_delay
+        self._drain_until: Optional[float] = None
+        self._drain_logged = False
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        if sig == signal.SIGTERM and self.drain_delay > 0 and self._drain_until is None and not self.should_exit:
+            # Signal handler: only set flags, the main loop tick acts on them
+            self._captured_signals.append(sig)
+            self._drain_until = time.monotonic() + self.drain_delay
+            readiness.drain()
+            return
+        super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        if self._drain_until is not None and not self.should_exit:
+            if not self._drain_logged:
+                self._drain_logged = True
+                log.info(f"Draining for {self.drain_delay}s before shutting down")
+            if time.monotonic() >= self._drain_until:
+                self.should_exit = True
+        return await super().on_tick(counter)
@@ -0,0 +1,93 @@
+import logging
+import math
+import os
+from typing import Any, Dict, Optional
+
+from ..config import get_app_config
+from ..observability.logging import setup_logging
+from .limits import MB, WORKER_PROCESSES_ENV, available_cpus, cgroup_memory_limit, worker_count
+
+
+log = logging.getLogger(__name__)
+
+
+def resolve_workers(requested: Optional[int] = None) -> int:
+    """`requested`, else SERVER_WORKERS, else sized from the container's CPU and memory limits"""
+    app_config = get_app_config()
+    workers = requested or app_config.settings.server_workers
+    if workers <= 0:
+        cpus = available_cpus()
+        memory_limit = cgroup_memory_limit()
+        worker_memory_mb = app_config.settings.server_worker_memory_mb
+        workers = worker_count(cpus, memory_limit, app_config.settings.server_workers_per_cpu, worker_memory_mb)
+        memory = f"{memory_limit // MB} MB" if memory_limit is not None else "no"
+        log.info(f"Sized {workers} workers for {cpus:g} CPUs and {memory} memory limit "
+                 f"({worker_memory_mb} MB per worker)")
+    if workers > 1 and app_config.settings.jobs_broker == "memory":
+        log.warning(f"JOBS_BROKER=memory cannot serve jobs from {workers} workers, the /jobs routes answer 503. "
+                    f"Use JOBS_BROKER=celery, or SERVER_WORKERS=1")
+    return workers
+
+
+def gunicorn_options(host: str, port: int, workers: int) -> Dict[str, Any]:
+    app_config = get_app_config()
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "preload_app": True,
+        "keepalive": app_config.settings.server_keepalive,
+        "backlog": app_config.settings.server_backlog,
+        # The master kills the workers still running after this: leave them the drain delay,
+        # the in-flight requests and the lifespan shutdown, running jobs included
+        "graceful_timeout": math.ceil(app_config.settings.server_drain_delay
+                                      + app_config.settings.server_graceful_timeout
+                                      + app_config.settings.jobs_shutdown_timeout + 5),
+        "loglevel": app_config.settings.log_level.lower(),
+    }
+    if os.access("/dev/shm", os.W_OK):
+        # Worker heartbeat files on tmpfs, so a slow disk never delays a heartbeat
+        options["worker_tmp_dir"] = "/dev/shm"
+    return options
+
+
+def run_uvicorn(host: str, port: int, workers: int) -> int:
+    """uvicorn without preloading: every worker process imports and builds the app itself"""
+    import uvicorn
+    from .draining import DrainingServer
+
+    app_config = get_app_config()
+    config = uvicorn.Config(
+        "src.main:create_app", factory=True, host=host, port=port, workers=workers,
+        loop=app_config.settings.server_loop, http=app_config.settings.server_http,
+        backlog=app_config.settings.server_backlog, timeout_keep_alive=app_config.settings.server_keepalive,
+        timeout_graceful_shutdown=app_config.settings.server_graceful_timeout,
+        access_log=app_config.settings.server_access_log, log_config=None)
+    if workers > 1:
+        # uvicorn's supervisor restarts its workers but knows nothing of the drain delay
+        from uvicorn.supervisors import Multiprocess
+        Multiprocess(config, sockets=[config.bind_socket()]).run()
+        return 0
+    server = DrainingServer(config, drain_delay=app_config.settings.server_drain_delay)
+    server.run()
+    return 0 if server.started else 1
+
+
+def run(host: str = "0.0.0.0", port: int = 80, workers: Optional[int] = None) -> int:
+    """
+    Serve the app with a gunicorn master forking uvicorn workers from the preloaded app,
+    or with uvicorn alone where gunicorn cannot run (Windows)
+    """
+    setup_logging()
+    workers = resolve_workers(workers)
+    # Inherited by the forked workers and the spawned uvicorn ones alike
+    os.environ[WORKER_PROCESSES_ENV] = str(workers)
+    try:
+        from .prefork import PreforkServer, ServerLogger, ServerWorker
+    except ImportError as e:
+        log.warning(f"gunicorn is unavailable ({e}), serving with uvicorn without preloading")
+        return run_uvicorn(host, port, workers)
+
+    options = gunicorn_options(host, port, workers)
+    options.update(worker_class=ServerWorker, logger_class=ServerLogger)
+    PreforkServer(options).run()
+    return 0
@@ -0,0 +1,92 @@
+import math
+import os
+from typing import Optional
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+MB = 1024 * 1024
+# Set by the launcher, read by the workers (forked or spawned) to know how many serve the app
+WORKER_PROCESSES_ENV = "SERVER_WORKER_PROCESSES"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def physical_memory() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):  # Windows
+        return None
+
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT) -> Optional[float]:
+    """
+    CPUs granted by the container's cgroup quota (v2 `cpu.max`, v1 `cpu.cfs_quota_us`),
+    None when there is no quota
+    """
+    value = _read(os.path.join(root, "cpu.max"))
+    if value is not None:
+        quota, _, period = value.partition(" ")
+        if quota == "max":
+            return None
+        return int(quota) / int(period or 100000)
+    quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+    period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def cgroup_memory_limit(root: str = CGROUP_ROOT) -> Optional[int]:
+    """
+    Bytes the container may use (v2 `memory.max`, v1 `memory.limit_in_bytes`), None when unlimited
+    """
+    value = _read(os.path.join(root, "memory.max"))
+    if value is None:
+        value = _read(os.path.join(root, "memory", "memory.limit_in_bytes"))
+    if value is None or value == "max":
+        return None
+    limit = int(value)
+    # cgroup v1 reports "unlimited" as a huge number
+    physical = physical_memory()
+    if physical is not None and limit >= physical:
+        return None
+    return limit
+
+
+def available_cpus(root: str = CGROUP_ROOT) -> float:
+    """CPUs this process can use: its CPU affinity, capped by the cgroup quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Windows, macOS
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit(root)
+    return min(cpus, limit) if limit else cpus
+
+
+def worker_count(cpus: float, memory_limit: Optional[int], workers_per_cpu: float = 1.0,
+                 worker_memory_mb: int = 256) -> int:
+    """
+    Worker processes for `cpus` CPUs and a `memory_limit` in bytes.
+
+    Each worker runs one event loop, so `workers_per_cpu` workers per CPU (rounded up: two
+    workers make use of 1.5 CPUs). When memory is limited, the count is capped so that the
+    workers plus the master, which holds the preloaded app, fit in `worker_memory_mb` each.
+    """
+    by_cpu = max(1, math.ceil(cpus * workers_per_cpu))
+    if memory_limit is None:
+        return by_cpu
+    by_memory = max(1, memory_limit // (worker_memory_mb * MB) - 1)
+    return min(by_cpu, by_memory)
+
+
+def worker_processes() -> int:
+    """Worker processes the launcher started, 1 when the app is served some other way"""
+    try:
+        return max(1, int(os.environ.get(WORKER_PROCESSES_ENV, "1")))
+    except ValueError:
+        return 1
@@ -0,0 +1,136 @@
+import asyncio
+import gc
+import importlib
+import logging
+import signal
+import sys
+from typing import Any, Dict
+
+from fastapi import FastAPI
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from gunicorn.glogging import Logger
+from uvicorn_worker import UvicornWorker
+
+from ..config import get_app_config
+from .draining import DrainingServer
+
+
+log = logging.getLogger(__name__)
+
+
+async def warm_up() -> None:
+    """
+    Load in the master what every worker would otherwise load for itself: the signing keys
+    (and httpx with them) and the blob SDK when storage is configured. Nothing holding a
+    socket, a thread or the event loop survives, the workers open their own.
+    """
+    from ..authorization.azure_authorization import authorize
+    from ..storage import storage
+    from ..storage.blob_storage import SDK_MODULE
+
+    key_manager = authorize.key_manager
+    try:
+        # A failure is logged and left to the workers, which fetch the keys on first use
+        await key_manager.refresh(force=False)
+    finally:
+        await key_manager.aclose()
+    if storage.configured:
+        importlib.import_module(SDK_MODULE)
+
+
+def preload_app() -> FastAPI:
+    """Build and warm up the app once, in the gunicorn master, before the workers are forked"""
+    from ..authorization.azure_authorization import authorize
+    from ..main import create_app
+
+    app = create_app()
+    asyncio.run(warm_up())
+    # Keep the collector of the workers away from the inherited objects: updating their
+    # headers would copy the shared pages into every worker
+    gc.freeze()
+    log.info(f"Preloaded the app with {len(authorize.key_manager.keys)} signing keys")
+    return app
+
+
+class ServerLogger(Logger):
+    """Sends gunicorn's records through the app's JSON log pipeline"""
+
+    def setup(self, cfg) -> None:
+        super().setup(cfg)
+        for logger in (self.error_log, self.access_log):
+            logger.handlers = []
+            logger.propagate = True
+
+
+class ServerWorker(UvicornWorker):
+    """
+    UvicornWorker configured from the SERVER_* settings (event loop, HTTP parser, graceful
+    shutdown timeout, access log), serving with the DrainingServer
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        app_config = get_app_config()
+        self.CONFIG_KWARGS = {
+            "loop": app_config.settings.server_loop,
+            "http": app_config.settings.server_http,
+            "timeout_graceful_shutdown": app_config.settings.server_graceful_timeout,
+            "access_log": app_config.settings.server_access_log,
+        }
+        super().__init__(*args, **kwargs)
+        # uvicorn's records go through the app's JSON log pipeline too
+        for name in ("uvicorn.error", "uvicorn.access"):
+            logger = logging.getLogger(name)
+            logger.handlers = []
+            logger.propagate = name != "uvicorn.access" or self.config.access_log
+
+    def init_signals(self) -> None:
+        super().init_signals()
+        # Until the lifespan installs the settings reload, a SIGHUP must not kill the worker
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    async def _serve(self) -> None:
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config, drain_delay=get_app_config().settings.server_drain_delay)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+class ReloadingArbiter(Arbiter):
+    """
+    On SIGHUP, reloads the settings in place instead of replacing every worker: the master
+    reloads its own (for the workers it forks later) and forwards the signal to the workers
+    """
+
+    def handle_hup(self) -> None:
+        self.log.info("Hang up: reloading the settings of %s", self.master_name)
+        get_app_config().reload()
+        self.kill_workers(signal.SIGHUP)
+
+
+class PreforkServer(BaseApplication):
+    """
+    gunicorn master forking uvicorn workers from a preloaded app: the imports, routes and
+    signing keys are shared copy-on-write instead of being built again by every worker
+    """
+
+    def __init__(self, options: Dict[str, Any]):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> FastAPI:
+        return preload_app()
+
+    def run(self) -> None:
+        try:
+            ReloadingArbiter(self).run()
+        except RuntimeError as e:
+            print(f"\nError: {e}\n", file=sys.stderr)
+            sys.stderr.flush()
+            sys.exit(1)
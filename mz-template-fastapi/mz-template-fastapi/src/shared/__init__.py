@@ -0,0 +1,6 @@
+from .shared_memory import (
+    SharedCounters, SharedSlotTable, SharedSnapshot, SharedTokenBuckets, get_shared_state_dir,
+    shared_memory_supported)
+
+__all__ = ["SharedCounters", "SharedSlotTable", "SharedSnapshot", "SharedTokenBuckets", "get_shared_state_dir",
+           "shared_memory_supported"]
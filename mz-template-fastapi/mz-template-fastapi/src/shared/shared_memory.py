@@ -0,0 +1,273 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows, shared state is only used in the Linux containers
+    fcntl = None
+
+
+log = logging.getLogger()
+
+
+def shared_memory_supported() -> bool:
+    return fcntl is not None
+
+
+def get_shared_state_dir(configured: Optional[str] = None, namespace: str = "mz-fastapi") -> str:
+    """
+    Directory holding the files shared by the worker processes of one host, /dev/shm when available
+    """
+    base = configured or ("/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir())
+    path = os.path.join(base, f"{namespace}-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+class SharedSnapshot:
+    """
+    A single JSON document shared by all worker processes.
+
+    Writers replace the file atomically, readers only re-parse it when it changed. A
+    separate lock file lets one process claim a refresh while the others wait for it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock_fd: Optional[int] = None
+        self._lock_pid: Optional[int] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._cached: Optional[Any] = None
+
+    def read(self) -> Optional[Any]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        signature = (stat.st_ino, stat.st_mtime_ns)
+        if signature != self._stat:
+            try:
+                with open(self.path, "rb") as f:
+                    self._cached = json.loads(f.read())
+            except (OSError, ValueError) as e:
+                log.debug(f"Unable to read shared snapshot {self.path}: {e}")
+                return None
+            self._stat = signature
+        return self._cached
+
+    def write(self, document: Any) -> None:
+        directory = os.path.dirname(self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(document).encode("utf-8"))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def try_lock(self) -> bool:
+        """Non-blocking exclusive lock, True if this process now owns the refresh"""
+        if fcntl is None:
+            return True
+        # flock is held per open file: a descriptor inherited from the parent process
+        # (preloaded server workers) would share its lock with every sibling
+        if self._lock_fd is None or self._lock_pid != os.getpid():
+            self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+            self._lock_pid = os.getpid()
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def unlock(self) -> None:
+        if fcntl is not None and self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+
+def _map_file(path: str, size: int) -> Tuple[int, mmap.mmap]:
+    """Open (creating or resizing it once) a file of `size` bytes and map it shared"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    if os.fstat(fd).st_size != size:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    return fd, mmap.mmap(fd, size)
+
+
+class SharedSlotTable:
+    """
+    Fixed size, direct mapped hash table in an mmap'd file shared by the worker processes.
+
+    Each slot holds a 32 byte key, an expiry (epoch seconds) and a small payload, and is
+    guarded by its own byte range lock, so readers and writers of different slots never
+    contend. Colliding keys simply overwrite each other: this is a cache, not a store.
+    """
+    _HEADER = struct.Struct("<32sdI")  # key, expires_at, payload length
+
+    def __init__(self, path: str, slots: int = 4096, slot_size: int = 2048):
+        if fcntl is None:
+            raise RuntimeError("SharedSlotTable requires fcntl (Linux/macOS)")
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_payload = slot_size - self._HEADER.size
+        size = slots * slot_size
+
+        self._fd, self._map = _map_file(path, size)
+
+    def _offset(self, key: bytes) -> int:
+        return (int.from_bytes(key[:8], "little") % self.slots) * self.slot_size
+
+    def get(self, key: bytes, now: Optional[float] = None) -> Optional[bytes]:
+        offset = self._offset(key)
+        fcntl.lockf(self._fd, fcntl.LOCK_SH, self.slot_size, offset)
+        try:
+            slot_key, expires_at, length = self._HEADER.unpack_from(self._map, offset)
+            if slot_key != key or length > self.max_payload:
+                return None
+            if expires_at <= (time.time() if now is None else now):
+                return None
+            start = offset + self._HEADER.size
+            return self._map[start:start + length]
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot_size, offset)
+
+    def put(self, key: bytes, payload: bytes, expires_at: float) -> bool:
+        if len(key) != 32 or len(payload) > self.max_payload:
+            return False
+        offset = self._offset(key)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slot_size, offset)
+        try:
+            self._HEADER.pack_into(self._map, offset, key, expires_at, len(payload))
+            start = offset + self._HEADER.size
+            self._map[start:start + len(payload)] = payload
+            return True
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot_size, offset)
+
+    def delete(self, key: bytes) -> None:
+        offset = self._offset(key)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slot_size, offset)
+        try:
+            slot_key, _, _ = self._HEADER.unpack_from(self._map, offset)
+            if slot_key == key:
+                self._HEADER.pack_into(self._map, offset, b"\0" * 32, 0.0, 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot_size, offset)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class SharedTokenBuckets:
+    """
+    Token buckets in an mmap'd file shared by the worker processes, so a rate limit holds
+    for the host instead of for each worker.
+
+    Set associative: a key hashes to a set of `ways` 32 byte slots (16 byte key digest,
+    tokens, last update on the system wide monotonic clock) locked together by one byte
+    range lock. A new key takes a free slot of its set, or else the bucket that refilled
+    the most, and inherits its tokens: a collision can make a limit stricter for a while,
+    never hand out a fresh burst.
+    """
+    _SLOT = struct.Struct("<16sdd")  # key, tokens, updated_at
+    _FREE = b"\0" * 16
+
+    def __init__(self, path: str, slots: int = 65536, ways: int = 4):
+        if fcntl is None:
+            raise RuntimeError("SharedTokenBuckets requires fcntl (Linux/macOS)")
+        self.path = path
+        self.ways = ways
+        self.sets = max(1, slots // ways)
+        self.slots = self.sets * ways
+        self.slot_size = self._SLOT.size
+        self.set_size = ways * self.slot_size
+        self._fd, self._map = _map_file(path, self.slots * self.slot_size)
+
+    def take(self, key: bytes, rate: float, burst: float, now: Optional[float] = None) -> float:
+        """
+        Take one token from the bucket of `key` (16 bytes) refilled at `rate` per second up to
+        `burst`: 0.0 when granted, otherwise the seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        set_offset = (int.from_bytes(key[:8], "little") % self.sets) * self.set_size
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self.set_size, set_offset)
+        try:
+            victim, victim_tokens = set_offset, -1.0
+            for offset in range(set_offset, set_offset + self.set_size, self.slot_size):
+                slot_key, tokens, updated_at = self._SLOT.unpack_from(self._map, offset)
+                if slot_key == key:
+                    tokens = min(burst, tokens + max(now - updated_at, 0.0) * rate)
+                    break
+                refilled = burst if slot_key == self._FREE else min(burst, tokens + max(now - updated_at, 0.0) * rate)
+                if refilled > victim_tokens:
+                    victim, victim_tokens = offset, refilled
+            else:
+                offset, tokens = victim, victim_tokens
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / rate
+            self._SLOT.pack_into(self._map, offset, key, tokens, now)
+            return wait
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self.set_size, set_offset)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class SharedCounters:
+    """
+    Counters in an mmap'd file shared by the worker processes, e.g. invalidation
+    generations: a reader compares the value it saw earlier with the current one.
+
+    Direct mapped by key digest; colliding keys share a counter, so an increment may also
+    be seen by an unrelated key. Reads are a single unlocked 8 byte load, increments are
+    done under the slot's byte range lock.
+    """
+    _SLOT = struct.Struct("<Q")
+
+    def __init__(self, path: str, slots: int = 4096):
+        if fcntl is None:
+            raise RuntimeError("SharedCounters requires fcntl (Linux/macOS)")
+        self.path = path
+        self.slots = slots
+        self._fd, self._map = _map_file(path, slots * self._SLOT.size)
+
+    def _offset(self, key: bytes) -> int:
+        return (int.from_bytes(key[:8], "little") % self.slots) * self._SLOT.size
+
+    def get(self, key: bytes) -> int:
+        return self._SLOT.unpack_from(self._map, self._offset(key))[0]
+
+    def increment(self, key: bytes) -> int:
+        offset = self._offset(key)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self._SLOT.size, offset)
+        try:
+            value = self._SLOT.unpack_from(self._map, offset)[0] + 1
+            self._SLOT.pack_into(self._map, offset, value)
+            return value
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self._SLOT.size, offset)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
@@ -0,0 +1,8 @@
+from .blob_storage import (
+    BlobInfo, BlobNotFound, BlobStorage, InvalidBlobName, StorageUnavailable, storage, validate_blob_name)
+from .byte_ranges import ByteRange, RangeNotSatisfiable, parse_range_header
+from .streaming import blob_response, upload_request_body
+
+__all__ = ["BlobInfo", "BlobNotFound", "BlobStorage", "InvalidBlobName", "StorageUnavailable", "storage",
+           "validate_blob_name", "ByteRange", "RangeNotSatisfiable", "parse_range_header", "blob_response",
+           "upload_request_body"]
@@ -0,0 +1,354 @@
+import asyncio
+import base64
+import logging
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Deque, Iterator, List, Optional
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from ..config import LazilyConfigured, Settings, configured_attribute, get_app_config
+from ..observability.metrics import STORAGE_ERRORS, STORAGE_TRANSFERRED_BYTES
+from ..observability.startup import import_in_background
+
+# The Azure SDK (and aiohttp under it) takes longer to import than the rest of the app:
+# it is loaded in a worker thread once the app started, not when this module is imported
+SDK_MODULE = "azure.storage.blob.aio"
+
+if TYPE_CHECKING:
+    from azure.storage.blob.aio import BlobClient, BlobServiceClient
+
+log = logging.getLogger(__name__)
+
+MAX_BLOB_NAME_LENGTH = 1024
+
+# Attribute of the storage and the setting it defaults to
+_SETTINGS = {
+    'account_url': 'storage_account_url',
+    'container': 'storage_account_container_name',
+    'connection_string': 'storage_account_connection_string',
+    'account_name': 'storage_account_name',
+    'account_key': 'storage_account_key',
+    'block_size': 'storage_block_size',
+    'max_concurrency': 'storage_max_concurrency',
+    'create_container': 'storage_create_container',
+}
+# Changing one of these on a reload creates a new client, the others apply to the current one
+_CLIENT_SETTINGS = ('account_url', 'connection_string', 'account_name', 'account_key', 'block_size')
+
+
+class StorageUnavailable(HTTPException):
+    def __init__(self, detail: str = "Blob storage is temporarily unavailable, retry shortly.", retry_after: int = 1) -> None:
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+class BlobNotFound(HTTPException):
+    def __init__(self, name: str) -> None:
+        super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=f"Blob '{name}' was not found")
+
+
+class InvalidBlobName(HTTPException):
+    def __init__(self, detail: str) -> None:
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class BlobInfo(BaseModel):
+    name: str
+    size: int
+    etag: str
+    content_type: Optional[str] = None
+    last_modified: Optional[datetime] = None
+
+
+def validate_blob_name(name: str) -> str:
+    if not name or len(name) > MAX_BLOB_NAME_LENGTH:
+        raise InvalidBlobName(f"Blob names must be 1 to {MAX_BLOB_NAME_LENGTH} characters long")
+    if name.startswith("/") or any(segment in (".", "..") for segment in name.split("/")):
+        raise InvalidBlobName(f"Invalid blob name '{name}'")
+    return name
+
+
+@contextmanager
+def _storage_errors(name: str) -> Iterator[None]:
+    from azure.core.exceptions import AzureError, ResourceModifiedError, ResourceNotFoundError
+    try:
+        yield
+    except ResourceNotFoundError:
+        raise BlobNotFound(name)
+    except ResourceModifiedError:
+        # Transfers are pinned to the ETag read when they started
+        STORAGE_ERRORS.inc("modified")
+        raise StorageUnavailable(f"Blob '{name}' changed during the transfer, retry.")
+    except AzureError as e:
+        STORAGE_ERRORS.inc(type(e).__name__)
+        log.error(f"Blob storage request for '{name}' failed: {e}")
+        raise StorageUnavailable()
+
+
+def _default_credential():
+    try:
+        from azure.identity.aio import DefaultAzureCredential
+    except ImportError:
+        log.info("azure-identity is not installed, STORAGE_ACCOUNT_URL must carry a SAS token")
+        return None
+    return DefaultAzureCredential()
+
+
+async def _close_client(client: Optional['BlobServiceClient'], credential) -> None:
+    if client is not None:
+        await client.close()
+    if credential is not None:
+        await credential.close()
+
+
+class BlobStorage(LazilyConfigured):
+    """
+    Streams blobs between requests and the configured storage account container.
+
+    One async BlobServiceClient, and so one HTTP connection pool, per worker process:
+    created on first use and closed by the app lifespan. Uploads are cut into
+    `block_size` blocks staged `max_concurrency` at a time while the request body is
+    still arriving, then committed; downloads fetch `block_size` ranges
+    `max_concurrency` at a time and yield them in order. Nothing goes through the disk
+    and a transfer holds about `(max_concurrency + 1) * block_size` bytes in memory.
+
+    Set STORAGE_ACCOUNT_CONNECTION_STRING for the Azurite emulator
+    (`UseDevelopmentStorage=true`), or STORAGE_ACCOUNT_NAME and STORAGE_ACCOUNT_KEY for
+    shared key access; otherwise STORAGE_ACCOUNT_URL is used with DefaultAzureCredential
+    (managed identity, workload identity, az login).
+
+    The settings are read from AppConfig on first use and applied again on a reload.
+    """
+    account_url = configured_attribute()
+    container = configured_attribute()
+    connection_string = configured_attribute()
+    account_name = configured_attribute()
+    account_key = configured_attribute()
+    block_size = configured_attribute()
+    max_concurrency = configured_attribute()
+    create_container = configured_attribute()
+
+    def __init__(self, account_url: Optional[str] = None, container: Optional[str] = None,
+                 connection_string: Optional[str] = None, block_size: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, create_container: Optional[bool] = None):
+        # The settings are read on first use, importing the module reads no configuration
+        self._arguments = {
+            'account_url': account_url,
+            'container': container,
+            'connection_string': connection_string,
+            'block_size': block_size,
+            'max_concurrency': max_concurrency,
+            'create_container': create_container,
+        }
+        self._client: Optional['BlobServiceClient'] = None
+        self._credential = None
+        self._sdk_preload: Optional[asyncio.Task] = None
+
+    def _configure(self) -> None:
+        app_config = get_app_config()
+        for name, field in _SETTINGS.items():
+            value = self._arguments.get(name)
+            setattr(self, name, value if value is not None else getattr(app_config.settings, field))
+        self.max_concurrency = max(1, self.max_concurrency)
+
+    def _reload(self, previous: Settings, settings: Settings) -> None:
+        if all(getattr(previous, field) == getattr(settings, field) for field in _SETTINGS.values()):
+            return
+        client_settings = [getattr(self, name) for name in _CLIENT_SETTINGS]
+        self._configure()
+        if self._client is None or client_settings == [getattr(self, name) for name in _CLIENT_SETTINGS]:
+            return
+        # Transfers already running keep the old client, the next storage call creates a new one
+        client, self._client = self._client, None
+        credential, self._credential = self._credential, None
+        try:
+            asyncio.get_running_loop().create_task(_close_client(client, credential))
+        except RuntimeError:
+            pass  # No event loop (the gunicorn master): no client was ever opened in it
+        log.info("Storage settings changed, new transfers use a new client")
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.connection_string) or "://" in self.account_url
+
+    def _service_client(self) -> 'BlobServiceClient':
+        if self._client is None:
+            if not self.configured:
+                raise StorageUnavailable("Blob storage is not configured.")
+            from azure.storage.blob.aio import BlobServiceClient
+            options = {
+                "max_single_put_size": self.block_size,
+                "max_block_size": self.block_size,
+                "max_single_get_size": self.block_size,
+                "max_chunk_get_size": self.block_size,
+            }
+            if self.connection_string:
+                self._client = BlobServiceClient.from_connection_string(self.connection_string, **options)
+            elif self.account_key:
+                self._client = BlobServiceClient(
+                    self.account_url, credential={"account_name": self.account_name, "account_key": self.account_key},
+                    **options)
+            else:
+                self._credential = _default_credential()
+                self._client = BlobServiceClient(self.account_url, credential=self._credential, **options)
+        return self._client
+
+    def blob_client(self, name: str) -> 'BlobClient':
+        return self._service_client().get_blob_client(self.container, validate_blob_name(name))
+
+    async def _load_sdk(self) -> None:
+        await import_in_background(SDK_MODULE)
+
+    async def start(self) -> None:
+        """
+        Start loading the SDK in the background and create the container when
+        STORAGE_CREATE_CONTAINER is set; the client is created by the first storage call
+        """
+        if not self.configured:
+            log.info("Neither STORAGE_ACCOUNT_URL nor STORAGE_ACCOUNT_CONNECTION_STRING is set, blob storage is disabled")
+            return
+        self._sdk_preload = asyncio.get_running_loop().create_task(self._load_sdk())
+        if self.create_container:
+            await self._load_sdk()
+            from azure.core.exceptions import AzureError, ResourceExistsError
+            try:
+                await self._service_client().create_container(self.container)
+                log.info(f"Created the blob container '{self.container}'")
+            except ResourceExistsError:
+                pass
+            except AzureError as e:
+                log.error(f"Unable to create the blob container '{self.container}': {e}")
+
+    async def close(self) -> None:
+        preload, self._sdk_preload = self._sdk_preload, None
+        if preload is not None and not preload.done():
+            preload.cancel()
+        client, self._client = self._client, None
+        credential, self._credential = self._credential, None
+        await _close_client(client, credential)
+
+    async def ping(self) -> None:
+        """
+        Read the container properties, raises StorageUnavailable or BlobNotFound
+        """
+        await self._load_sdk()
+        with _storage_errors(self.container):
+            await self._service_client().get_container_client(self.container).get_container_properties()
+
+    async def get_properties(self, name: str) -> BlobInfo:
+        await self._load_sdk()
+        with _storage_errors(name):
+            properties = await self.blob_client(name).get_blob_properties()
+        return BlobInfo(
+            name=name,
+            size=properties.size,
+            etag=properties.etag,
+            content_type=properties.content_settings.content_type,
+            last_modified=properties.last_modified)
+
+    async def upload(self, name: str, chunks: AsyncIterable[bytes], content_type: Optional[str] = None) -> BlobInfo:
+        """
+        Write `chunks` (e.g. `request.stream()`) to the blob, replacing it.
+
+        Bodies smaller than one block go out as a single Put Blob. Larger ones are staged
+        block by block as they arrive; reading pauses while `max_concurrency` blocks are
+        in flight, which pushes back on the client instead of buffering.
+        """
+        await self._load_sdk()
+        from azure.storage.blob import BlobBlock, ContentSettings
+        blob = self.blob_client(name)
+        content_settings = ContentSettings(content_type=content_type or "application/octet-stream")
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Unique per upload: concurrent uploads to one blob must not share uncommitted blocks
+        prefix = uuid.uuid4().hex
+        block_ids: List[str] = []
+        tasks: List[asyncio.Task] = []
+        failures: List[BaseException] = []
+        buffer = bytearray()
+        size = 0
+
+        async def stage(block_id: str, data: bytes) -> None:
+            try:
+                await blob.stage_block(block_id, data, length=len(data))
+                STORAGE_TRANSFERRED_BYTES.inc("upload", amount=len(data))
+            except BaseException as e:
+                failures.append(e)
+                raise
+            finally:
+                semaphore.release()
+
+        async def stage_next(data: bytes) -> None:
+            await semaphore.acquire()
+            if failures:
+                semaphore.release()
+                raise failures[0]
+            block_id = base64.b64encode(f"{prefix}-{len(block_ids):06d}".encode()).decode()
+            block_ids.append(block_id)
+            tasks.append(asyncio.get_running_loop().create_task(stage(block_id, data)))
+
+        with _storage_errors(name):
+            try:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    buffer += chunk
+                    while len(buffer) >= self.block_size:
+                        await stage_next(bytes(buffer[:self.block_size]))
+                        del buffer[:self.block_size]
+
+                if not block_ids:
+                    result = await blob.upload_blob(bytes(buffer), overwrite=True, content_settings=content_settings)
+                    STORAGE_TRANSFERRED_BYTES.inc("upload", amount=size)
+                else:
+                    if buffer:
+                        await stage_next(bytes(buffer))
+                    await asyncio.gather(*tasks)
+                    result = await blob.commit_block_list(
+                        [BlobBlock(block_id) for block_id in block_ids], content_settings=content_settings)
+            except BaseException:
+                # Uncommitted blocks are discarded by the service after a week
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+        log.info(f"Uploaded {size} bytes to '{name}' in {max(len(block_ids), 1)} block(s)")
+        return BlobInfo(name=name, size=size, etag=result["etag"], content_type=content_settings.content_type,
+                        last_modified=result.get("last_modified"))
+
+    async def _download_range(self, blob: 'BlobClient', offset: int, length: int, etag: Optional[str]) -> bytes:
+        from azure.core import MatchConditions
+        with _storage_errors(blob.blob_name):
+            options = {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+            downloader = await blob.download_blob(offset=offset, length=length, **options)
+            data = await downloader.readall()
+        STORAGE_TRANSFERRED_BYTES.inc("download", amount=len(data))
+        return data
+
+    async def iter_range(self, name: str, start: int, end: int, etag: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Yield bytes `start` to `end` (inclusive) of the blob in order, fetched as
+        `max_concurrency` parallel ranged GETs; `etag` pins every range to one version
+        """
+        await self._load_sdk()
+        blob = self.blob_client(name)
+        loop = asyncio.get_running_loop()
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            for offset in range(start, end + 1, self.block_size):
+                length = min(self.block_size, end + 1 - offset)
+                pending.append(loop.create_task(self._download_range(blob, offset, length, etag)))
+                if len(pending) >= self.max_concurrency:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # Client gone or a range failed: drop the ranges still downloading
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+storage = BlobStorage()
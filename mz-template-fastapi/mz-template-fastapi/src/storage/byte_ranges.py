@@ -0,0 +1,58 @@
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+class RangeNotSatisfiable(HTTPException):
+    def __init__(self, size: int) -> None:
+        super().__init__(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                         detail="The requested range is outside the blob",
+                         headers={"Content-Range": f"bytes */{size}"})
+
+
+class ByteRange:
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+    def content_range(self, size: int) -> str:
+        return f"bytes {self.start}-{self.end}/{size}"
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[ByteRange]:
+    """
+    The single byte range asked for by a `Range` header, None to send the whole body.
+
+    `bytes=0-499`, `bytes=500-` and `bytes=-500` (the last 500 bytes) are supported.
+    Malformed headers and multi-range requests are ignored and answered with the full
+    body, as RFC 9110 allows; a valid range starting past the end raises a 416.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable(size)
+            return ByteRange(max(size - suffix, 0), size - 1)
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or (last and end < start):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(size)
+    return ByteRange(start, min(end, size - 1))
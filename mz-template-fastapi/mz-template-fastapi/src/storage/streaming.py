@@ -0,0 +1,60 @@
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import Request
+from starlette.responses import Response
+
+from ..web.responses import DisconnectAwareStreamingResponse
+from .blob_storage import BlobInfo, storage
+from .byte_ranges import parse_range_header
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+async def upload_request_body(name: str, request: Request) -> BlobInfo:
+    """
+    Stream the request body into the blob as it arrives, without buffering it first
+    """
+    return await storage.upload(name, request.stream(), content_type=request.headers.get("content-type"))
+
+
+async def blob_response(name: str, request: Request, filename: Optional[str] = None) -> Response:
+    """
+    Stream the blob to the client, honouring `Range`, `If-Range` and `If-None-Match`.
+
+    A single byte range is answered with a 206 that fetches only that part of the blob;
+    every range is read from the version whose ETag was current when the request started.
+    """
+    info = await storage.get_properties(name)
+    headers = {"Accept-Ranges": "bytes", "ETag": info.etag}
+    if info.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(info.last_modified, usegmt=True)
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if _etag_matches(request.headers.get("if-none-match"), info.etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    # If-Range: only send the part when the client's copy is still current
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range in (info.etag, headers.get("Last-Modified")):
+        byte_range = parse_range_header(request.headers.get("range"), info.size)
+
+    media_type = info.content_type or "application/octet-stream"
+    if info.size == 0:
+        return Response(b"", media_type=media_type, headers=headers)
+    status_code = 200
+    start, end = 0, info.size - 1
+    if byte_range is not None:
+        status_code = 206
+        start, end = byte_range.start, byte_range.end
+        headers["Content-Range"] = byte_range.content_range(info.size)
+    headers["Content-Length"] = str(end - start + 1)
+    return DisconnectAwareStreamingResponse(
+        storage.iter_range(name, start, end, etag=info.etag), status_code=status_code, media_type=media_type,
+        headers=headers)
@@ -0,0 +1,184 @@
+import asyncio
+import zlib
+from typing import Dict, FrozenSet, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional, responses are gzip-compressed without it
+    brotli = None
+
+_COMPRESSIBLE_TYPES = frozenset((
+    "application/json", "application/javascript", "application/x-ndjson", "application/xml",
+    "image/svg+xml", "application/wasm",
+))
+_UNCOMPRESSED_STATUSES = frozenset((204, 206, 304))
+_accepted_cache: Dict[str, FrozenSet[str]] = {}
+
+
+def accepted_encodings(header: str) -> FrozenSet[str]:
+    """
+    `gzip, deflate, br;q=1.0, zstd;q=0` -> {"gzip", "deflate", "br"}; `*` accepts br and gzip.
+    Results are cached per header value, browsers send a handful of distinct ones.
+    """
+    accepted = _accepted_cache.get(header)
+    if accepted is not None:
+        return accepted
+    codings = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        codings.add(coding.strip().lower())
+    if "*" in codings:
+        codings.update(("br", "gzip"))
+    accepted = frozenset(codings)
+    if len(_accepted_cache) >= 256:
+        _accepted_cache.clear()
+    _accepted_cache[header] = accepted
+    return accepted
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    if media_type.startswith("text/"):
+        return media_type != "text/event-stream"
+    return media_type in _COMPRESSIBLE_TYPES or media_type.endswith(("+json", "+xml"))
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing responses with brotli (when installed) or gzip.
+
+    Only text-like content types of at least `minimum_size` bytes are compressed; responses
+    that already carry a Content-Encoding (e.g. precompressed static files), partial
+    content and HEAD requests go through untouched. Streamed responses (exports) are
+    compressed chunk by chunk and flushed, so every chunk still reaches the client at once.
+    Bodies above `thread_minimum_size` are compressed in a thread to keep the event loop
+    free. Compressing weakens a strong ETag, as the bytes are no longer the identity ones.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 thread_minimum_size: int = 256 * 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.thread_minimum_size = thread_minimum_size
+
+    def choose_encoding(self, header: Optional[str]) -> Optional[str]:
+        if not header:
+            return None
+        accepted = accepted_encodings(header)
+        if brotli is not None and "br" in accepted:
+            return "br"
+        return "gzip" if "gzip" in accepted else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        header = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                header = value.decode("latin-1")
+                break
+        responder = _CompressionResponder(self, self.choose_encoding(header), send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: Optional[str], send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.compressor = None
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self._send(message)
+        elif message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=list(message.get("headers", [])))
+            content_length = headers.get("content-length")
+            if (message["status"] in _UNCOMPRESSED_STATUSES or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type", ""))
+                    or (content_length is not None and int(content_length) < self.middleware.minimum_size)):
+                self.passthrough = True
+                await self._send(message)
+            else:
+                self.start = message
+        elif message["type"] == "http.response.body" and self.compressor is None:
+            await self._send_first_body(message)
+        elif message["type"] == "http.response.body":
+            body = self._compress_chunk(message.get("body", b""), more=message.get("more_body", False))
+            await self._send({"type": "http.response.body", "body": body, "more_body": message.get("more_body", False)})
+        else:
+            await self._send(message)
+
+    def _start_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=list(self.start.get("headers", [])))
+        if "accept-encoding" not in headers.get("vary", "").lower():
+            headers.add_vary_header("Accept-Encoding")
+        return headers
+
+    async def _send_first_body(self, message: Message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not more_body and len(body) < self.middleware.minimum_size:
+            self.passthrough = True
+            await self._send(self.start)
+            await self._send(message)
+            return
+
+        headers = self._start_headers()
+        if self.encoding is None:
+            self.passthrough = True
+            await self._send({**self.start, "headers": headers.raw})
+            await self._send(message)
+            return
+
+        headers["content-encoding"] = self.encoding
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+        if more_body:
+            # Streamed: the compressed length is unknown
+            del headers["content-length"]
+            self.compressor = self._compressor()
+            body = self._compress_chunk(body, more=True)
+        else:
+            if len(body) >= self.middleware.thread_minimum_size:
+                body = await asyncio.to_thread(self._compress_body, body)
+            else:
+                body = self._compress_body(body)
+            headers["content-length"] = str(len(body))
+            self.passthrough = True
+        await self._send({**self.start, "headers": headers.raw})
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _compressor(self):
+        if self.encoding == "br":
+            return brotli.Compressor(quality=self.middleware.brotli_quality)
+        return zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 31)
+
+    def _compress_body(self, body: bytes) -> bytes:
+        if self.encoding == "br":
+            return brotli.compress(body, quality=self.middleware.brotli_quality)
+        compressor = zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+
+    def _compress_chunk(self, chunk: bytes, more: bool) -> bytes:
+        if self.encoding == "br":
+            data = self.compressor.process(chunk)
+            return data + (self.compressor.flush() if more else self.compressor.finish())
+        data = self.compressor.compress(chunk)
+        return data + self.compressor.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
@@ -0,0 +1,80 @@
+import asyncio
+import inspect
+import logging
+from typing import Any, Type, Union
+
+from fastapi import routing
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # Optional, the standard library encoder is used without it
+    orjson = None
+
+
+log = logging.getLogger(__name__)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson (falls back to the standard encoder when missing)
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _serializes_to_json_bytes() -> bool:
+    # FastAPI >= 0.130 dumps typed responses straight to JSON bytes with pydantic-core,
+    # but only while the route keeps the default response class
+    return "dump_json" in inspect.signature(routing.serialize_response).parameters
+
+
+def default_response_class() -> Union[Type[Response], DefaultPlaceholder]:
+    """
+    The app-wide response class: FastAPI's own JSON fast path when it has one, orjson otherwise
+    """
+    if _serializes_to_json_bytes():
+        return Default(JSONResponse)
+    return FastJSONResponse
+
+
+class DisconnectAwareStreamingResponse(StreamingResponse):
+    """
+    Streams the body and stops at the next chunk once the client disconnects.
+
+    Starlette's StreamingResponse cancels the body iterator on disconnect, possibly in
+    the middle of a database fetch or a storage request. Here a watcher only flags the
+    disconnect; the iterator is then closed between chunks so its cleanup (ending a
+    transaction, cancelling pending downloads) runs normally.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.get_running_loop().create_task(watch_disconnect())
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            async for chunk in self.body_iterator:
+                if disconnected.is_set():
+                    log.info(f"Client disconnected, stopped streaming {scope.get('path')}")
+                    return
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            watcher.cancel()
+            await self.body_iterator.aclose()
+
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import re
+from mimetypes import guess_type
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .compression import accepted_encodings
+
+# Build tools name assets after their content: `index-BfT3x9aQ.js`, `app.3f9c2b1e.css`
+_HASHED_NAME = re.compile(r"[.-]([A-Za-z0-9_-]{8,})\.[A-Za-z0-9]+$")
+_SIBLINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def is_hashed_name(path: str) -> bool:
+    match = _HASHED_NAME.search(os.path.basename(path))
+    # A hash has digits or capitals, `index-component.js` is not hashed
+    return match is not None and any(c.isdigit() or c.isupper() for c in match.group(1))
+
+
+class _Variant(NamedTuple):
+    path: str
+    etag: str
+
+
+class _Asset(NamedTuple):
+    signature: Tuple[int, int]
+    media_type: str
+    cache_control: str
+    variants: Dict[Optional[str], _Variant]
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles serving prebuilt `.br` / `.gz` siblings to the clients that accept them.
+
+    ETags are strong: a hash of the file content, suffixed per encoding. The hash and the
+    sibling lookup are done once per file version, in the thread that resolves the path.
+    Siblings older than their file are ignored. Hashed names (`index-BfT3x9aQ.js`) are
+    cached for a year as immutable; other files are revalidated (`no-cache`), a `304`
+    when they did not change.
+    """
+
+    def __init__(self, *args, immutable_max_age: int = 31536000, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.immutable_cache_control = f"public, max-age={immutable_max_age}, immutable"
+        self._assets: Dict[str, _Asset] = {}
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and os.path.isfile(full_path):
+            self._asset(full_path, stat_result)
+        return full_path, stat_result
+
+    def _asset(self, full_path: str, stat_result: os.stat_result) -> _Asset:
+        signature = (stat_result.st_mtime_ns, stat_result.st_size)
+        asset = self._assets.get(full_path)
+        if asset is not None and asset.signature == signature:
+            return asset
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(full_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 16), b""):
+                digest.update(chunk)
+        tag = digest.hexdigest()
+        variants = {None: _Variant(full_path, f'"{tag}"')}
+        for encoding, suffix in _SIBLINGS:
+            try:
+                sibling = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if sibling.st_mtime_ns >= stat_result.st_mtime_ns:
+                variants[encoding] = _Variant(full_path + suffix, f'"{tag}-{encoding}"')
+        asset = _Asset(
+            signature=signature,
+            media_type=guess_type(full_path)[0] or "text/plain",
+            cache_control=self.immutable_cache_control if is_hashed_name(full_path) else "no-cache",
+            variants=variants)
+        self._assets[full_path] = asset
+        return asset
+
+    def file_response(self, full_path: str, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        asset = self._asset(full_path, stat_result)
+        headers = {"cache-control": asset.cache_control}
+        variant, served_stat = asset.variants[None], stat_result
+        if len(asset.variants) > 1:
+            headers["vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, _ in _SIBLINGS:
+                if encoding in accepted and encoding in asset.variants:
+                    try:
+                        served_stat = os.stat(asset.variants[encoding].path)
+                    except OSError:
+                        continue
+                    variant = asset.variants[encoding]
+                    headers["content-encoding"] = encoding
+                    break
+        headers["etag"] = variant.etag
+
+        response = FileResponse(variant.path, status_code=status_code, headers=headers, media_type=asset.media_type,
+                                stat_result=served_stat)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
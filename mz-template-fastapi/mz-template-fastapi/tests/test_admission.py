@@ -0,0 +1,118 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from src.admission import AdaptiveLimit
+from src.admission.limits import parse_group_limits
+from src.config import get_app_config
+
+
+def _limit(max_limit: int = 4, min_limit: int = 1, queue_size: int = 2, latency_target: float = 0.5) -> AdaptiveLimit:
+    return AdaptiveLimit("test", max_limit, min_limit, queue_size, latency_target)
+
+
+class AdaptiveLimitTest(unittest.IsolatedAsyncioTestCase):
+    async def test_admits_up_to_the_limit_then_queues_in_order(self):
+        limit = _limit(max_limit=2)
+        self.assertTrue(limit.try_acquire())
+        self.assertTrue(limit.try_acquire())
+        self.assertFalse(limit.try_acquire())
+
+        first = asyncio.create_task(limit.acquire(1.0))
+        second = asyncio.create_task(limit.acquire(1.0))
+        await asyncio.sleep(0)
+        self.assertEqual(limit.queued, 2)
+        self.assertTrue(limit.queue_full())
+
+        limit.release(0.01, 200)
+        self.assertTrue(await first)
+        self.assertFalse(second.done())
+        limit.release(0.01, 200)
+        self.assertTrue(await second)
+        self.assertEqual(limit.in_flight, 2)
+
+    async def test_a_waiter_times_out_without_taking_a_slot(self):
+        limit = _limit(max_limit=1)
+        limit.try_acquire()
+
+        self.assertFalse(await limit.acquire(0.01))
+
+        self.assertEqual(limit.queued, 0)
+        self.assertEqual(limit.in_flight, 1)
+
+    async def test_a_cancelled_waiter_never_leaks_a_slot_handed_over(self):
+        limit = _limit(max_limit=1)
+        limit.try_acquire()
+        waiter = asyncio.create_task(limit.acquire(1.0))
+        await asyncio.sleep(0)
+
+        limit.release(0.01, 200)  # Hands the slot over to the waiter...
+        waiter.cancel()           # ...which is cancelled before it resumes
+        try:
+            admitted = await waiter
+        except asyncio.CancelledError:
+            admitted = False
+
+        # Either the waiter owns the slot, or it was given back
+        self.assertEqual(limit.in_flight, 1 if admitted else 0)
+        self.assertEqual(limit.queued, 0)
+
+    async def test_slow_responses_back_off_once_per_target(self):
+        limit = _limit(max_limit=8, min_limit=2)
+        for _ in range(3):
+            limit.try_acquire()
+        limit.release(1.0, 200)
+        limit.release(1.0, 200)
+        self.assertEqual(limit.limit, 6.0)
+
+        limit._next_decrease = 0.0
+        limit.release(0.01, 503)
+        self.assertEqual(limit.limit, 4.5)
+
+    async def test_the_limit_stays_within_its_bounds(self):
+        limit = _limit(max_limit=4, min_limit=2)
+        for _ in range(10):
+            limit.try_acquire()
+            limit._next_decrease = 0.0
+            limit.release(1.0, 200)
+        self.assertEqual(limit.limit, 2.0)
+
+        for _ in range(100):
+            limit.try_acquire()
+            limit.try_acquire()
+            limit.release(0.01, 200)
+            limit.release(0.01, 200)
+        self.assertEqual(limit.limit, 4.0)
+
+
+class ParseGroupLimitsTest(unittest.TestCase):
+    def test_parses_the_maximum_and_the_latency_target(self):
+        self.assertEqual(parse_group_limits("files=16:30, jobs=8,secure=:2"),
+                         {"files": (16, 30.0), "jobs": (8, None), "secure": (None, 2.0)})
+
+
+class AdmissionMiddlewareOrderTest(unittest.IsolatedAsyncioTestCase):
+    async def test_load_shed_responses_carry_the_trace_id(self):
+        from src.main import create_app
+        settings = get_app_config().settings.model_copy(update={
+            "admission_enabled": True, "admission_max_concurrency": 1, "admission_min_concurrency": 1,
+            "admission_queue_size": 0})
+        with mock.patch.object(get_app_config(), "settings", settings):
+            app = create_app()
+            app.middleware_stack = admission = app.build_middleware_stack()
+        # Every slot of the default group is taken: the next request is shed
+        while type(admission).__name__ != "AdmissionControlMiddleware":
+            admission = admission.app
+        admission._limit("default").try_acquire()
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/redoc", headers={"x-trace-id": "upstream-id"})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["x-trace-id"], "upstream-id")
+
+
+if __name__ == "__main__":
+    unittest.main()
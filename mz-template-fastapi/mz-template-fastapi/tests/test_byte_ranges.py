@@ -0,0 +1,106 @@
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+import httpx
+from fastapi import FastAPI, Request
+
+from src.storage.blob_storage import BlobInfo
+from src.storage.byte_ranges import RangeNotSatisfiable, parse_range_header
+from src.storage.streaming import blob_response
+
+CONTENT = bytes(range(100))
+
+
+class ParseRangeHeaderTest(unittest.TestCase):
+    def test_parses_single_ranges(self):
+        for header, expected in (("bytes=0-9", (0, 9)), ("bytes=90-", (90, 99)), ("bytes=-10", (90, 99)),
+                                 ("bytes=95-200", (95, 99)), ("bytes=-500", (0, 99)), ("Bytes= 5-5", (5, 5))):
+            with self.subTest(header=header):
+                byte_range = parse_range_header(header, 100)
+                self.assertEqual((byte_range.start, byte_range.end), expected)
+
+    def test_ignores_what_it_does_not_support(self):
+        for header in (None, "", "items=0-9", "bytes=0-9,20-29", "bytes=a-b", "bytes=9-0", "bytes=5"):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range_header(header, 100))
+
+    def test_rejects_ranges_past_the_end(self):
+        for header, size in (("bytes=100-", 100), ("bytes=-0", 100), ("bytes=-5", 0)):
+            with self.subTest(header=header), self.assertRaises(RangeNotSatisfiable) as raised:
+                parse_range_header(header, size)
+            self.assertEqual(raised.exception.status_code, 416)
+            self.assertEqual(raised.exception.headers["Content-Range"], f"bytes */{size}")
+
+
+class FakeStorage:
+    def __init__(self):
+        self.info = BlobInfo(name="report.bin", size=len(CONTENT), etag='"v1"', content_type="application/pdf",
+                             last_modified=datetime(2024, 5, 1, tzinfo=timezone.utc))
+        self.ranges = []
+
+    async def get_properties(self, name: str) -> BlobInfo:
+        return self.info
+
+    async def iter_range(self, name: str, start: int, end: int, etag=None):
+        self.ranges.append((start, end, etag))
+        yield CONTENT[start:end + 1]
+
+
+class BlobResponseTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.storage = FakeStorage()
+        patcher = mock.patch("src.storage.streaming.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        app = FastAPI()
+
+        @app.get("/blob")
+        async def get_blob(request: Request):
+            return await blob_response("report.bin", request, filename="report.pdf")
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_sends_the_whole_blob(self):
+        response = await self.client.get("/blob")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, CONTENT)
+        self.assertEqual(response.headers["accept-ranges"], "bytes")
+        self.assertEqual(response.headers["content-disposition"], 'attachment; filename="report.pdf"')
+        self.assertEqual(self.storage.ranges, [(0, 99, '"v1"')])
+
+    async def test_a_range_fetches_only_that_part(self):
+        response = await self.client.get("/blob", headers={"range": "bytes=10-19"})
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, CONTENT[10:20])
+        self.assertEqual(response.headers["content-range"], "bytes 10-19/100")
+        self.assertEqual(response.headers["content-length"], "10")
+        self.assertEqual(self.storage.ranges, [(10, 19, '"v1"')])
+
+    async def test_a_stale_if_range_gets_the_whole_blob(self):
+        response = await self.client.get("/blob", headers={"range": "bytes=10-19", "if-range": '"v0"'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, CONTENT)
+
+    async def test_a_current_etag_is_answered_304(self):
+        response = await self.client.get("/blob", headers={"if-none-match": 'W/"v1"'})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(self.storage.ranges, [])
+
+    async def test_a_range_past_the_end_is_answered_416(self):
+        response = await self.client.get("/blob", headers={"range": "bytes=500-"})
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["content-range"], "bytes */100")
+
+
+if __name__ == "__main__":
+    unittest.main()
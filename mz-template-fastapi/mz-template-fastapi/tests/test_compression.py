@@ -0,0 +1,149 @@
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+from src.web.compression import CompressionMiddleware, accepted_encodings, brotli, is_compressible
+from src.web.static import PrecompressedStaticFiles, is_hashed_name
+
+TEXT = "hello compression " * 200
+
+
+async def _text(request):
+    return PlainTextResponse(TEXT, headers={"etag": '"v1"'})
+
+
+async def _small(request):
+    return PlainTextResponse("tiny")
+
+
+async def _image(request):
+    return Response(os.urandom(4096), media_type="image/png")
+
+
+async def _stream(request):
+    async def chunks():
+        for _ in range(3):
+            yield TEXT.encode("utf-8")
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class AcceptedEncodingsTest(unittest.TestCase):
+    def test_parses_the_header_and_drops_refused_codings(self):
+        self.assertEqual(accepted_encodings("gzip, deflate, br;q=1.0, zstd;q=0"), {"gzip", "deflate", "br"})
+        self.assertEqual(accepted_encodings("*"), {"*", "br", "gzip"})
+
+    def test_only_text_like_types_are_compressible(self):
+        self.assertTrue(is_compressible("text/html; charset=utf-8"))
+        self.assertTrue(is_compressible("application/problem+json"))
+        self.assertFalse(is_compressible("text/event-stream"))
+        self.assertFalse(is_compressible("image/png"))
+
+
+class CompressionMiddlewareTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        app = Starlette(routes=[Route("/text", _text), Route("/small", _small), Route("/image", _image),
+                                Route("/stream", _stream)])
+        app.add_middleware(CompressionMiddleware, minimum_size=500)
+        self.client = _client(app)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_gzips_text_and_weakens_the_etag(self):
+        response = await self.client.get("/text", headers={"accept-encoding": "gzip"})
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["etag"], 'W/"v1"')
+        self.assertIn("Accept-Encoding", response.headers["vary"])
+        self.assertEqual(response.text, TEXT)
+        self.assertLess(int(response.headers["content-length"]), len(TEXT))
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    async def test_prefers_brotli(self):
+        response = await self.client.get("/text", headers={"accept-encoding": "gzip, br"})
+
+        self.assertEqual(response.headers["content-encoding"], "br")
+        self.assertEqual(response.text, TEXT)
+
+    async def test_leaves_small_binary_and_unaccepted_responses_alone(self):
+        for path, accept_encoding in (("/small", "gzip"), ("/image", "gzip"), ("/text", "identity")):
+            with self.subTest(path=path, accept_encoding=accept_encoding):
+                response = await self.client.get(path, headers={"accept-encoding": accept_encoding})
+                self.assertNotIn("content-encoding", response.headers)
+
+    async def test_compresses_streams_chunk_by_chunk(self):
+        async with self.client.stream("GET", "/stream", headers={"accept-encoding": "gzip"}) as response:
+            compressed = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertNotIn("content-length", response.headers)
+        self.assertEqual(gzip.decompress(compressed).decode("utf-8"), TEXT * 3)
+
+
+class PrecompressedStaticFilesTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self._write("app.js", TEXT.encode("utf-8"))
+        self._write("app.js.gz", gzip.compress(TEXT.encode("utf-8")))
+        self._write("index-BfT3x9aQ.js", b"console.log(1)")
+        app = Starlette(routes=[Mount("/static", PrecompressedStaticFiles(directory=self.directory))])
+        self.client = _client(app)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    def _write(self, name: str, content: bytes) -> None:
+        with open(os.path.join(self.directory, name), "wb") as file:
+            file.write(content)
+
+    async def test_serves_the_gzip_sibling_with_its_own_etag(self):
+        plain = await self.client.get("/static/app.js", headers={"accept-encoding": "identity"})
+        compressed = await self.client.get("/static/app.js", headers={"accept-encoding": "gzip"})
+
+        self.assertNotIn("content-encoding", plain.headers)
+        self.assertEqual(compressed.headers["content-encoding"], "gzip")
+        self.assertEqual(compressed.text, TEXT)
+        self.assertEqual(compressed.headers["etag"], plain.headers["etag"][:-1] + '-gzip"')
+        self.assertEqual(plain.headers["vary"], "Accept-Encoding")
+        self.assertEqual(plain.headers["cache-control"], "no-cache")
+
+    async def test_revalidation_is_answered_304(self):
+        first = await self.client.get("/static/app.js", headers={"accept-encoding": "gzip"})
+
+        response = await self.client.get("/static/app.js", headers={"accept-encoding": "gzip",
+                                                                    "if-none-match": first.headers["etag"]})
+
+        self.assertEqual(response.status_code, 304)
+
+    async def test_a_stale_sibling_is_ignored(self):
+        past = time.time() - 60
+        os.utime(os.path.join(self.directory, "app.js.gz"), (past, past))
+
+        response = await self.client.get("/static/app.js", headers={"accept-encoding": "gzip"})
+
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.text, TEXT)
+
+    async def test_hashed_names_are_immutable(self):
+        response = await self.client.get("/static/index-BfT3x9aQ.js")
+
+        self.assertIn("immutable", response.headers["cache-control"])
+        self.assertTrue(is_hashed_name("app.3f9c2b1e.css"))
+        self.assertFalse(is_hashed_name("index-component.js"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import uuid
+import zipfile
+from datetime import datetime
+from decimal import Decimal
+
+from src.export import CsvEncoder, ExportFormat, NdjsonEncoder, XlsxEncoder, create_encoder
+
+COLUMNS = ["id", "name", "amount", "created"]
+ROWS = [
+    (1, 'Widget, "large"', Decimal("9.50"), datetime(2024, 5, 1, 12, 30)),
+    (2, None, Decimal("0"), datetime(2024, 5, 2)),
+]
+
+
+class CsvEncoderTest(unittest.IsolatedAsyncioTestCase):
+    async def test_writes_the_header_then_quoted_rows(self):
+        encoder = CsvEncoder()
+
+        output = encoder.begin(COLUMNS) + await encoder.encode(ROWS)
+
+        self.assertEqual(output.decode("utf-8").splitlines(), [
+            "id,name,amount,created",
+            '1,"Widget, ""large""",9.50,2024-05-01 12:30:00',
+            "2,,0,2024-05-02 00:00:00",
+        ])
+
+
+class NdjsonEncoderTest(unittest.IsolatedAsyncioTestCase):
+    async def test_writes_one_object_per_row(self):
+        encoder = NdjsonEncoder()
+        row_id = uuid.UUID(int=1)
+
+        self.assertEqual(encoder.begin(["id", "amount", "created"]), b"")
+        output = await encoder.encode([(row_id, Decimal("9.50"), datetime(2024, 5, 1, 12, 30))])
+
+        self.assertTrue(output.endswith(b"\n"))
+        self.assertEqual([json.loads(line) for line in output.splitlines()], [
+            {"id": str(row_id), "amount": "9.50", "created": "2024-05-01T12:30:00"},
+        ])
+
+
+class XlsxEncoderTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.temp_dir = directory.name
+
+    async def test_streams_a_complete_workbook(self):
+        encoder = create_encoder(ExportFormat.XLSX, temp_dir=self.temp_dir)
+        self.assertIsInstance(encoder, XlsxEncoder)
+        encoder.begin(COLUMNS)
+        self.assertEqual(await encoder.encode(ROWS), b"")
+
+        output = b"".join([chunk async for chunk in encoder.finish()])
+        encoder.close()
+
+        with zipfile.ZipFile(io.BytesIO(output)) as workbook:
+            self.assertIn("xl/worksheets/sheet1.xml", workbook.namelist())
+            # constant_memory writes inline strings straight into the sheet
+            self.assertIn(b"Widget", workbook.read("xl/worksheets/sheet1.xml"))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    async def test_starts_a_new_sheet_past_the_row_limit(self):
+        encoder = XlsxEncoder(temp_dir=self.temp_dir)
+        encoder.MAX_ROWS_PER_SHEET = 2
+        encoder.begin(COLUMNS)
+        await encoder.encode(ROWS)
+
+        self.assertEqual(len(encoder.workbook.worksheets()), 2)
+        encoder.close()
+
+    async def test_closing_an_abandoned_export_leaves_no_files(self):
+        encoder = XlsxEncoder(temp_dir=self.temp_dir)
+        encoder.begin(COLUMNS)
+        await encoder.encode(ROWS)
+
+        encoder.close()
+
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
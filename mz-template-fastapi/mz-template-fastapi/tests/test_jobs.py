@@ -0,0 +1,128 @@
+import asyncio
+import os
+import unittest
+from unittest import mock
+
+from src.jobs import (
+    InProcessBroker, JobStatus, JobsUnavailable, TaskRegistry, UnavailableBroker, create_broker,
+    parse_queue_concurrency)
+from src.server.limits import WORKER_PROCESSES_ENV
+
+
+class InProcessBrokerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.registry = TaskRegistry()
+        self.release = asyncio.Event()
+        self.running = 0
+        self.max_running = 0
+
+        @self.registry.task("blocking")
+        async def blocking(value: int = 0) -> int:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            await self.release.wait()
+            self.running -= 1
+            return value * 2
+
+        self.task = self.registry.get("blocking")
+
+    async def _broker(self, **options) -> InProcessBroker:
+        broker = InProcessBroker({"default": options.pop("concurrency", 1)}, registry=self.registry, **options)
+        await broker.start()
+        self.addAsyncCleanup(broker.close)
+        self.addCleanup(self.release.set)
+        return broker
+
+    async def _wait_for(self, broker: InProcessBroker, job_id: str, status: JobStatus):
+        for _ in range(100):
+            job = await broker.get(job_id)
+            if job is not None and job.status == status:
+                return job
+            await asyncio.sleep(0.01)
+        self.fail(f"Job {job_id} did not reach {status}")
+
+    async def test_runs_a_job_and_keeps_its_result(self):
+        broker = await self._broker()
+        self.release.set()
+
+        job = await broker.submit(self.task, {"value": 21}, owner="user-1")
+        self.assertEqual(job.status, JobStatus.QUEUED)
+
+        finished = await self._wait_for(broker, job.id, JobStatus.SUCCEEDED)
+        self.assertEqual(finished.result, 42)
+        self.assertEqual(finished.owner, "user-1")
+
+    async def test_queue_runs_at_most_its_concurrency(self):
+        broker = await self._broker(concurrency=2)
+        jobs = [await broker.submit(self.task, {}) for _ in range(5)]
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(self.running, 2)
+        self.release.set()
+        for job in jobs:
+            await self._wait_for(broker, job.id, JobStatus.SUCCEEDED)
+        self.assertEqual(self.max_running, 2)
+
+    async def test_a_full_queue_rejects_jobs_with_503(self):
+        broker = await self._broker(max_queued=2)
+        await broker.submit(self.task, {})
+        await asyncio.sleep(0.01)  # The only consumer takes the first job
+        await broker.submit(self.task, {})
+        await broker.submit(self.task, {})
+
+        with self.assertRaises(JobsUnavailable) as raised:
+            await broker.submit(self.task, {})
+        self.assertEqual(raised.exception.status_code, 503)
+
+    async def test_finished_jobs_are_pruned_after_the_result_ttl(self):
+        broker = await self._broker(result_ttl=0.05)
+        self.release.set()
+        job = await broker.submit(self.task, {})
+        await self._wait_for(broker, job.id, JobStatus.SUCCEEDED)
+
+        await asyncio.sleep(0.1)
+
+        self.assertIsNone(await broker.get(job.id))
+
+    async def test_shutdown_stops_accepting_jobs(self):
+        broker = await self._broker(shutdown_timeout=0.05)
+        await broker.close()
+
+        with self.assertRaises(JobsUnavailable):
+            await broker.submit(self.task, {})
+
+
+class CreateBrokerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_in_process_broker_serves_a_single_worker(self):
+        with mock.patch.dict(os.environ, {WORKER_PROCESSES_ENV: "1"}):
+            self.assertIsInstance(create_broker("memory"), InProcessBroker)
+
+    async def test_in_process_broker_is_disabled_with_several_workers(self):
+        registry = TaskRegistry()
+
+        @registry.task("noop")
+        async def noop() -> None:
+            pass
+
+        with mock.patch.dict(os.environ, {WORKER_PROCESSES_ENV: "4"}):
+            broker = create_broker("memory", registry=registry)
+
+        self.assertIsInstance(broker, UnavailableBroker)
+        for call in (broker.submit(registry.get("noop"), {}), broker.get("job-id")):
+            with self.assertRaises(JobsUnavailable) as raised:
+                await call
+            self.assertEqual(raised.exception.status_code, 503)
+
+
+class ParseQueueConcurrencyTest(unittest.TestCase):
+    def test_parses_queue_limits(self):
+        self.assertEqual(parse_queue_concurrency("default=4, reports=1,bulk"), {"default": 4, "reports": 1, "bulk": 1})
+        self.assertEqual(parse_queue_concurrency("default=0"), {"default": 1})
+
+    def test_rejects_a_malformed_limit(self):
+        with self.assertRaises(ValueError):
+            parse_queue_concurrency("default=many")
+
+
+if __name__ == "__main__":
+    unittest.main()
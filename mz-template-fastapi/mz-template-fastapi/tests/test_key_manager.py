@@ -0,0 +1,91 @@
+import asyncio
+import base64
+import unittest
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from src.authorization.key_manager import JwksKeyManager
+
+METADATA_URL = "https://login.example.com/tenant/v2.0/.well-known/openid-configuration"
+JWKS_URL = "https://login.example.com/tenant/discovery/v2.0/keys"
+
+
+def _b64(number: int) -> str:
+    return base64.urlsafe_b64encode(number.to_bytes((number.bit_length() + 7) // 8, "big")).rstrip(b"=").decode()
+
+
+def _jwk(kid: str) -> dict:
+    numbers = rsa.generate_private_key(public_exponent=65537, key_size=2048).public_key().public_numbers()
+    return {"kty": "RSA", "kid": kid, "n": _b64(numbers.n), "e": _b64(numbers.e)}
+
+
+class FakeResponse:
+    def __init__(self, document: dict):
+        self.document = document
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> dict:
+        return self.document
+
+
+class FakeIdP:
+    """Answers the metadata and JWKS requests of the key manager, slowly enough for requests to overlap"""
+
+    def __init__(self, jwks: list):
+        self.jwks = jwks
+        self.requests = []
+
+    async def get(self, url: str) -> FakeResponse:
+        self.requests.append(url)
+        await asyncio.sleep(0.01)
+        if url == METADATA_URL:
+            return FakeResponse({"jwks_uri": JWKS_URL})
+        return FakeResponse({"keys": self.jwks})
+
+
+class JwksKeyManagerTest(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.jwk = _jwk("kid-1")
+
+    async def asyncSetUp(self):
+        self.idp = FakeIdP([self.jwk])
+        self.key_manager = JwksKeyManager(METADATA_URL, min_refresh_interval=0, client=self.idp)
+
+    async def asyncTearDown(self):
+        await self.key_manager.aclose()
+
+    async def test_concurrent_misses_share_one_fetch(self):
+        keys = await asyncio.gather(*(self.key_manager.get_key("kid-1") for _ in range(20)))
+
+        self.assertTrue(all(key is keys[0] for key in keys))
+        self.assertIsNotNone(keys[0])
+        self.assertEqual(self.key_manager.fetch_count, 1)
+        self.assertEqual(self.idp.requests, [METADATA_URL, JWKS_URL])
+
+    async def test_unknown_kid_is_negatively_cached(self):
+        await self.key_manager.get_key("kid-1")
+
+        self.assertIsNone(await self.key_manager.get_key("forged"))
+        self.assertEqual(self.key_manager.fetch_count, 2)
+        for _ in range(5):
+            self.assertIsNone(await self.key_manager.get_key("forged"))
+
+        self.assertEqual(self.key_manager.fetch_count, 2)
+        self.assertEqual(self.key_manager.negative_hits, 5)
+
+    async def test_kid_published_by_a_rotation_is_found_after_its_negative_ttl(self):
+        self.key_manager.negative_ttl = 0
+        await self.key_manager.get_key("kid-1")
+        self.assertIsNone(await self.key_manager.get_key("kid-2"))
+
+        self.idp.jwks = [self.jwk, _jwk("kid-2")]
+
+        self.assertIsNotNone(await self.key_manager.get_key("kid-2"))
+        self.assertEqual(self.key_manager.fetch_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from src.config import LazilyConfigured, configured_attribute, get_app_config
+
+
+class Client(LazilyConfigured):
+    url = configured_attribute()
+    timeout = configured_attribute()
+
+    def __init__(self, timeout=None):
+        self._timeout = timeout
+        self.configurations = 0
+
+    def _configure(self) -> None:
+        self.configurations += 1
+        self.url = get_app_config().settings.database_url
+        self.timeout = self._timeout if self._timeout is not None else 5.0
+
+
+class Broken(LazilyConfigured):
+    url = configured_attribute()
+
+    def _configure(self) -> None:
+        self.url = self.missing_setting
+
+
+class LazilyConfiguredTest(unittest.TestCase):
+    def test_reads_the_settings_on_first_use_only(self):
+        client = Client(timeout=1.0)
+        self.assertFalse(client.settings_applied)
+        self.assertEqual(client.configurations, 0)
+
+        self.assertEqual(client.timeout, 1.0)
+        self.assertEqual(client.url, get_app_config().settings.database_url)
+        self.assertTrue(client.settings_applied)
+        self.assertEqual(client.configurations, 1)
+
+    def test_registers_the_reload_listener_once(self):
+        client = Client()
+        client.ensure_configured()
+        client.ensure_configured()
+
+        self.assertEqual(get_app_config()._listeners.count(client._reload), 1)
+
+    def test_an_error_while_configuring_is_not_hidden(self):
+        broken = Broken()
+
+        with self.assertRaises(AttributeError) as raised:
+            broken.url
+        self.assertIn("missing_setting", str(raised.exception))
+        self.assertFalse(broken.settings_applied)
+
+
+if __name__ == "__main__":
+    unittest.main()
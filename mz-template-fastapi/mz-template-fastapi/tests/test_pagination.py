@@ -0,0 +1,89 @@
+import unittest
+from datetime import datetime
+
+from src.pagination import (
+    FieldSpec, InvalidPaginationQuery, PageRequest, Paginator, QueryGrammar, decode_cursor, encode_cursor,
+    query_fingerprint)
+from src.pagination.query_grammar import SqlParameters, compile_keyset
+
+FIELDS = [
+    FieldSpec("id", int),
+    FieldSpec("name", str),
+    FieldSpec("status", str, operators=("eq", "in")),
+    FieldSpec("created", datetime),
+]
+
+
+class CursorTest(unittest.TestCase):
+    def setUp(self):
+        self.grammar = QueryGrammar(FIELDS)
+        self.sort = self.grammar.parse_sort(["-created", "id"])
+        self.fingerprint = query_fingerprint(self.grammar.parse_filters(["status:open"]), self.sort)
+
+    def test_round_trips_the_sort_key_with_its_types(self):
+        values = [datetime(2024, 5, 1, 12, 30), 42]
+
+        token = encode_cursor(values, self.fingerprint)
+
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token, self.sort, self.fingerprint), values)
+
+    def test_rejects_a_cursor_issued_for_other_filters(self):
+        token = encode_cursor([datetime(2024, 5, 1), 42], self.fingerprint)
+        other = query_fingerprint(self.grammar.parse_filters(["status:closed"]), self.sort)
+
+        with self.assertRaises(InvalidPaginationQuery) as raised:
+            decode_cursor(token, self.sort, other)
+        self.assertEqual(raised.exception.status_code, 400)
+
+    def test_rejects_a_malformed_cursor(self):
+        for token in ("not a cursor", "e30", encode_cursor([42], self.fingerprint)):
+            with self.subTest(token=token), self.assertRaises(InvalidPaginationQuery):
+                decode_cursor(token, self.sort, self.fingerprint)
+
+
+class PaginatorSqlTest(unittest.TestCase):
+    def setUp(self):
+        self.paginator = Paginator("items", FIELDS, key="id", default_sort=["-created"], max_page_size=100,
+                                   max_offset=1000)
+
+    def test_first_page_filters_sorts_by_the_key_too_and_fetches_one_extra_row(self):
+        query = self.paginator.build_query(PageRequest(page_size=10, filters=["status:in:open|held"]))
+
+        self.assertEqual(query.sql, "SELECT * FROM items WHERE status = ANY($1) ORDER BY created DESC, id DESC LIMIT $2")
+        self.assertEqual(query.values, [["open", "held"], 11])
+
+    def test_cursor_compiles_to_a_row_comparison(self):
+        first = self.paginator.build_query(PageRequest(page_size=10))
+        cursor = encode_cursor([datetime(2024, 5, 1), 42], first.fingerprint)
+
+        query = self.paginator.build_query(PageRequest(page_size=10, cursor=cursor))
+
+        self.assertEqual(query.sql, "SELECT * FROM items WHERE (created, id) < ($1, $2) ORDER BY created DESC, id DESC "
+                                    "LIMIT $3")
+        self.assertEqual(query.values, [datetime(2024, 5, 1), 42, 11])
+
+    def test_mixed_directions_expand_the_row_comparison(self):
+        sort = QueryGrammar(FIELDS).parse_sort(["name", "-id"])
+
+        condition = compile_keyset(sort, ["b", 7], SqlParameters())
+
+        self.assertEqual(condition, "((name > $1) OR (name = $1 AND id < $2))")
+
+    def test_offset_pages_are_bounded(self):
+        query = self.paginator.build_query(PageRequest(page=3, page_size=10))
+        self.assertTrue(query.sql.endswith("LIMIT $1 OFFSET $2"))
+        self.assertEqual(query.values, [11, 20])
+
+        with self.assertRaises(InvalidPaginationQuery):
+            self.paginator.build_query(PageRequest(page=200, page_size=10))
+
+    def test_only_declared_fields_reach_the_sql(self):
+        for request in (PageRequest(filters=["password:eq:x"]), PageRequest(sort_by=["id; DROP TABLE items"]),
+                        PageRequest(filters=["status:like:open"])):
+            with self.subTest(request=request), self.assertRaises(InvalidPaginationQuery):
+                self.paginator.build_query(request)
+
+
+if __name__ == "__main__":
+    unittest.main()
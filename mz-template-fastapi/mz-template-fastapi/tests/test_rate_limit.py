@@ -0,0 +1,107 @@
+import hashlib
+import os
+import tempfile
+import unittest
+
+from src.ratelimit import RateLimit, TokenBuckets, parse_rate_limit, parse_rate_limits
+from src.shared import SharedTokenBuckets, shared_memory_supported
+
+
+def _key(name: str) -> bytes:
+    return hashlib.blake2b(name.encode("utf-8"), digest_size=16).digest()
+
+
+class ParseRateLimitTest(unittest.TestCase):
+    def test_parses_rate_period_and_burst(self):
+        self.assertEqual(parse_rate_limit("20/s"), RateLimit(rate=20.0, burst=20.0))
+        self.assertEqual(parse_rate_limit("600/5m:50"), RateLimit(rate=2.0, burst=50.0))
+        self.assertIsNone(parse_rate_limit("off"))
+        self.assertEqual(parse_rate_limits("secure=1/s:5, files=off"), {"secure": RateLimit(1.0, 5.0), "files": None})
+
+    def test_rejects_malformed_limits(self):
+        for value in ("fast", "20/d", "20/s:"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_rate_limit(value)
+
+
+class TokenBucketsCases:
+    """Behaviour shared by the in-process and the shared memory buckets"""
+
+    def setUp(self):
+        self.buckets = self.create_buckets()
+
+    def create_buckets(self):
+        return TokenBuckets(max_keys=100)
+
+    def key(self, name: str):
+        return name
+
+    def test_allows_a_burst_then_waits_for_the_refill(self):
+        key = self.key("user-1")
+        waits = [self.buckets.take(key, rate=2.0, burst=3.0, now=100.0) for _ in range(4)]
+
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 0.5)
+
+    def test_refills_at_the_rate_up_to_the_burst(self):
+        key = self.key("user-1")
+        for _ in range(3):
+            self.buckets.take(key, rate=2.0, burst=3.0, now=100.0)
+
+        self.assertEqual(self.buckets.take(key, rate=2.0, burst=3.0, now=100.5), 0.0)
+        self.assertGreater(self.buckets.take(key, rate=2.0, burst=3.0, now=100.5), 0.0)
+
+        # A long idle period refills the bucket to the burst, not beyond
+        waits = [self.buckets.take(key, rate=2.0, burst=3.0, now=1000.0) for _ in range(4)]
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertGreater(waits[3], 0.0)
+
+    def test_keys_have_their_own_bucket(self):
+        self.buckets.take(self.key("user-1"), rate=1.0, burst=1.0, now=100.0)
+
+        self.assertGreater(self.buckets.take(self.key("user-1"), rate=1.0, burst=1.0, now=100.0), 0.0)
+        self.assertEqual(self.buckets.take(self.key("user-2"), rate=1.0, burst=1.0, now=100.0), 0.0)
+
+
+class InProcessTokenBucketsTest(TokenBucketsCases, unittest.TestCase):
+    def test_drops_the_least_recently_used_buckets(self):
+        buckets = TokenBuckets(max_keys=2)
+        for name in ("a", "b", "c"):
+            buckets.take(name, rate=1.0, burst=1.0, now=100.0)
+
+        self.assertEqual(len(buckets), 2)
+        self.assertEqual(buckets.take("a", rate=1.0, burst=1.0, now=100.0), 0.0)
+        self.assertGreater(buckets.take("c", rate=1.0, burst=1.0, now=100.0), 0.0)
+
+
+@unittest.skipUnless(shared_memory_supported(), "shared memory buckets need fcntl")
+class SharedTokenBucketsTest(TokenBucketsCases, unittest.TestCase):
+    def create_buckets(self, slots: int = 64):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        buckets = SharedTokenBuckets(os.path.join(directory.name, "rate-limits.bin"), slots=slots)
+        self.addCleanup(buckets.close)
+        return buckets
+
+    def key(self, name: str):
+        return _key(name)
+
+    def test_buckets_are_shared_between_mappings_of_the_file(self):
+        other = SharedTokenBuckets(self.buckets.path, slots=self.buckets.slots)
+        self.addCleanup(other.close)
+
+        self.assertEqual(self.buckets.take(_key("user-1"), rate=1.0, burst=1.0, now=100.0), 0.0)
+        self.assertGreater(other.take(_key("user-1"), rate=1.0, burst=1.0, now=100.0), 0.0)
+
+    def test_a_full_set_never_hands_out_a_fresh_burst(self):
+        buckets = self.create_buckets(slots=4)
+        for name in ("a", "b", "c", "d"):
+            for _ in range(2):
+                buckets.take(_key(name), rate=1.0, burst=2.0, now=100.0)
+
+        # Every bucket of the only set is empty: the newcomer inherits an empty one
+        self.assertGreater(buckets.take(_key("e"), rate=1.0, burst=2.0, now=100.0), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import time
+import unittest
+
+import httpx
+from fastapi import FastAPI
+from fastapi.exceptions import ResponseValidationError
+from pydantic import BaseModel
+
+from src.cache import VARY_NONE, CachedResponse, ResponseCache, cached
+
+
+def _entry(body: bytes, generation, expires_at: float) -> CachedResponse:
+    return CachedResponse(body=body, status_code=200, media_type=None, headers=(), etag='"etag"',
+                          generation=generation, expires_at=expires_at)
+
+
+class ResponseCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Configured by hand: per process generations instead of the shared memory ones
+        self.cache = ResponseCache()
+        self.cache.configured = True
+        self.cache.max_bytes = 1024
+        self.cache.max_entry_bytes = 512
+        self.computed = 0
+
+    async def _get(self, key: bytes = b"key", scope: str = "", ttl: float = 30.0, body: bytes = b"body"):
+        async def compute(generation, expires_at):
+            self.computed += 1
+            await asyncio.sleep(0.01)
+            return _entry(body, generation, expires_at)
+        return await self.cache.get_or_compute(key, "items", scope, ttl, compute)
+
+    async def test_concurrent_misses_compute_once(self):
+        results = await asyncio.gather(*(self._get() for _ in range(10)))
+
+        self.assertEqual(self.computed, 1)
+        self.assertEqual(sorted(result for _, result in results), ["coalesced"] * 9 + ["miss"])
+        self.assertTrue(all(entry is results[0][0] for entry, _ in results))
+        self.assertEqual(self.cache.stats()["items"], {"miss": 1, "coalesced": 9})
+
+    async def test_hit_until_the_ttl_expires(self):
+        await self._get(ttl=30)
+        self.assertEqual((await self._get())[1], "hit")
+
+        await self._get(key=b"short", ttl=0.0)
+        self.assertEqual((await self._get(key=b"short"))[1], "miss")
+
+    async def test_invalidating_a_route_bumps_its_generation(self):
+        await self._get(scope="user-1")
+        await self._get(key=b"other", scope="user-2")
+        generation = self.cache.generation("items", "user-1")
+
+        self.cache.invalidate("items")
+
+        self.assertNotEqual(self.cache.generation("items", "user-1"), generation)
+        self.assertEqual((await self._get(scope="user-1"))[1], "miss")
+        self.assertEqual((await self._get(key=b"other", scope="user-2"))[1], "miss")
+
+    async def test_invalidating_a_scope_keeps_the_other_scopes(self):
+        await self._get(scope="user-1")
+        await self._get(key=b"other", scope="user-2")
+
+        self.cache.invalidate("items", "user-1")
+
+        self.assertEqual((await self._get(scope="user-1"))[1], "miss")
+        self.assertEqual((await self._get(key=b"other", scope="user-2"))[1], "hit")
+
+    async def test_memory_is_bounded_in_bytes(self):
+        for index in range(4):
+            await self._get(key=bytes([index]), body=b"x" * 400)
+        await self._get(key=b"large", body=b"x" * 600)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertLessEqual(self.cache.size_bytes, self.cache.max_bytes)
+        self.assertEqual((await self._get(key=bytes([3])))[1], "hit")
+        self.assertEqual((await self._get(key=bytes([0])))[1], "miss")
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+class Items(BaseModel):
+    items: list[Item]
+
+
+class CachedEndpointTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = 0
+        app = FastAPI()
+
+        @app.get("/items")
+        @cached(f"test_items_{time.monotonic_ns()}", ttl=30, vary=VARY_NONE)
+        async def get_items():
+            self.calls += 1
+            return {"items": [1, 2, 3]}
+
+        @app.get("/models", response_model=Items)
+        @cached(f"test_models_{time.monotonic_ns()}", ttl=30, vary=VARY_NONE)
+        async def get_models():
+            return {"items": [{"id": 1, "name": "one", "password": "secret"}]}
+
+        @app.get("/invalid", response_model=Items)
+        @cached(f"test_invalid_{time.monotonic_ns()}", ttl=30, vary=VARY_NONE)
+        async def get_invalid():
+            return {"items": [{"id": "not a number"}]}
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_results_are_filtered_through_the_response_model(self):
+        for _ in range(2):
+            response = await self.client.get("/models")
+            self.assertEqual(response.json(), {"items": [{"id": 1, "name": "one"}]})
+        self.assertEqual(response.headers["x-cache"], "HIT")
+
+    async def test_results_are_validated_against_the_response_model(self):
+        with self.assertRaises(ResponseValidationError):
+            await self.client.get("/invalid")
+
+    async def test_revalidation_is_answered_304_without_a_body(self):
+        first = await self.client.get("/items")
+        etag = first.headers["etag"]
+
+        for if_none_match in (etag, f"W/{etag}", f'"other", {etag}'):
+            with self.subTest(if_none_match=if_none_match):
+                response = await self.client.get("/items", headers={"if-none-match": if_none_match})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+                self.assertEqual(response.headers["etag"], etag)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json(), {"items": [1, 2, 3]})
+        self.assertEqual(first.headers["x-cache"], "MISS")
+        self.assertEqual(self.calls, 1)
+
+    async def test_a_stale_etag_gets_the_body(self):
+        response = await self.client.get("/items", headers={"if-none-match": '"stale"'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"items": [1, 2, 3]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pydantic import ValidationError
+
+from src.config import AppConfig, Settings, load_settings
+
+
+class SettingsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.env_file = os.path.join(directory.name, ".env")
+        self._write("")
+
+    def _write(self, content: str) -> None:
+        with open(self.env_file, "w", encoding="utf-8") as file:
+            file.write(content)
+
+    def test_derives_values_from_other_settings(self):
+        self._write("ENTRA_CLIENT_ID=client\nENTRA_SCOPE=access\nLOG_LEVEL=debug\nTRACING_EXCLUDED_URLS=/a, /b,\n")
+
+        settings = load_settings(self.env_file)
+
+        self.assertEqual(settings.scope_name, "api://client/access")
+        self.assertEqual(settings.api_audience, "api://client")
+        self.assertEqual(settings.log_level, "DEBUG")
+        self.assertEqual(settings.tracing_excluded_urls, ("/a", "/b"))
+
+    def test_environment_variables_win_over_the_file(self):
+        self._write("DB_POOL_MAX_SIZE=5\n")
+
+        with mock.patch.dict(os.environ, {"DB_POOL_MAX_SIZE": "7"}):
+            self.assertEqual(load_settings(self.env_file).db_pool_max_size, 7)
+
+    def test_malformed_values_fail_the_load_naming_the_variable(self):
+        for line, field in (("DB_POOL_MAX_SIZE=many", "db_pool_max_size"), ("RATE_LIMITS=secure=fast", "rate_limits"),
+                            ("JOBS_QUEUES=default=many", "jobs_queues"), ("ADMISSION_LIMITS=files=x", "admission_limits"),
+                            ("RESPONSE_CACHE_TTLS=secure=soon", "response_cache_ttls")):
+            with self.subTest(line=line):
+                self._write(line + "\n")
+                with self.assertRaises(ValidationError) as raised:
+                    load_settings(self.env_file)
+                self.assertEqual(raised.exception.errors()[0]["loc"], (field,))
+
+    def test_snapshots_are_immutable(self):
+        settings = load_settings(self.env_file)
+
+        with self.assertRaises(ValidationError):
+            settings.db_pool_max_size = 1
+
+    def test_reports_the_missing_required_variables(self):
+        self._write("DATABASE_URL=postgresql://db/app\n")
+
+        missing = load_settings(self.env_file).missing_required_vars()
+
+        self.assertNotIn("DATABASE_URL", missing)
+        self.assertIn("ENTRA_TENANT_ID", missing)
+
+
+class AppConfigReloadTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.env_file = os.path.join(directory.name, ".env")
+        self._write("DB_POOL_MAX_SIZE=5\n")
+        with mock.patch("src.config.appconfig.default_env_file", return_value=self.env_file):
+            self.app_config = AppConfig()
+        self.calls = []
+        self.app_config.on_reload(self._listener)
+
+    def _write(self, content: str) -> None:
+        with open(self.env_file, "w", encoding="utf-8") as file:
+            file.write(content)
+
+    def _listener(self, previous: Settings, settings: Settings) -> None:
+        self.calls.append((previous.db_pool_max_size, settings.db_pool_max_size))
+
+    def test_swaps_the_snapshot_and_notifies_the_listeners(self):
+        previous = self.app_config.settings
+        self._write("DB_POOL_MAX_SIZE=8\n")
+
+        self.assertTrue(self.app_config.reload())
+
+        self.assertIsNot(self.app_config.settings, previous)
+        self.assertEqual(self.app_config.settings.db_pool_max_size, 8)
+        self.assertEqual(self.calls, [(5, 8)])
+
+    def test_nothing_changed_keeps_the_snapshot(self):
+        previous = self.app_config.settings
+
+        self.assertFalse(self.app_config.reload())
+
+        self.assertIs(self.app_config.settings, previous)
+        self.assertEqual(self.calls, [])
+
+    def test_an_invalid_value_keeps_the_current_settings(self):
+        self._write("DB_POOL_MAX_SIZE=many\n")
+
+        with self.assertLogs("src.config.appconfig", "ERROR"):
+            self.assertFalse(self.app_config.reload())
+
+        self.assertEqual(self.app_config.settings.db_pool_max_size, 5)
+        self.assertEqual(self.calls, [])
+
+    def test_a_failing_listener_does_not_stop_the_others(self):
+        def failing(previous: Settings, settings: Settings) -> None:
+            raise RuntimeError("boom")
+
+        self.app_config._listeners.insert(0, failing)
+        self._write("DB_POOL_MAX_SIZE=8\n")
+
+        with self.assertLogs("src.config.appconfig", "ERROR"):
+            self.assertTrue(self.app_config.reload())
+        self.assertEqual(self.calls, [(5, 8)])
+
+    def test_listeners_are_registered_once(self):
+        self.app_config.on_reload(self._listener)
+
+        self.assertEqual(self.app_config._listeners.count(self._listener), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import time
+import unittest
+from unittest import mock
+
+from src.authorization.models.user import User
+from src.authorization.token_cache import VerifiedTokenCache
+
+
+def _claims(expires_in: float = 60.0) -> dict:
+    return {"oid": "user-1", "exp": time.time() + expires_in}
+
+
+class VerifiedTokenCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = VerifiedTokenCache(max_size=2)
+        self.user = User(id="user-1")
+
+    def test_returns_a_verified_token_until_it_expires(self):
+        claims = _claims(expires_in=60)
+        self.cache.put("token", claims, self.user)
+
+        self.assertIs(self.cache.get("token").user, self.user)
+        with mock.patch("src.authorization.token_cache.time.time", return_value=claims["exp"]):
+            self.assertIsNone(self.cache.get("token"))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.expirations, 1)
+
+    def test_never_stores_an_expired_token_or_one_without_exp(self):
+        self.cache.put("expired", _claims(expires_in=-1), self.user)
+        self.cache.put("no-exp", {"oid": "user-1"}, self.user)
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test_evicts_the_least_recently_used_token(self):
+        self.cache.put("first", _claims(), self.user)
+        self.cache.put("second", _claims(), self.user)
+        self.cache.get("first")
+        self.cache.put("third", _claims(), self.user)
+
+        self.assertIsNotNone(self.cache.get("first"))
+        self.assertIsNone(self.cache.get("second"))
+        self.assertIsNotNone(self.cache.get("third"))
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_a_size_of_zero_disables_the_cache(self):
+        cache = VerifiedTokenCache(max_size=0)
+        cache.put("token", _claims(), self.user)
+
+        self.assertIsNone(cache.get("token"))
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import httpx
+from fastapi import FastAPI, Request
+from opentelemetry import trace
+
+from src.observability.trace_context import trace_id_var
+from src.observability.trace_middleware import TraceContextMiddleware, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+TRACEPARENT = f"00-{TRACE_ID}-{PARENT_ID}-01"
+
+
+class ParseTraceparentTest(unittest.TestCase):
+    def test_parses_a_valid_header(self):
+        self.assertEqual(parse_traceparent(TRACEPARENT), (TRACE_ID, PARENT_ID, 1))
+        self.assertEqual(parse_traceparent(f" {TRACEPARENT.upper()} "), (TRACE_ID, PARENT_ID, 1))
+
+    def test_rejects_invalid_headers(self):
+        for value in ("", "garbage", f"ff-{TRACE_ID}-{PARENT_ID}-01", f"00-{'0' * 32}-{PARENT_ID}-01",
+                      f"00-{TRACE_ID}-{'0' * 16}-01", f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_traceparent(value))
+
+
+class TraceContextMiddlewareTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        app = FastAPI()
+        app.add_middleware(TraceContextMiddleware)
+
+        @app.get("/trace")
+        async def get_trace(request: Request):
+            span_context = trace.get_current_span().get_span_context()
+            return {
+                "state": request.state.trace_id,
+                "var": trace_id_var.get(),
+                "parent": format(span_context.span_id, "016x") if span_context.is_valid else None,
+            }
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_traceparent_sets_the_trace_id_and_the_remote_parent(self):
+        response = await self.client.get("/trace", headers={"traceparent": TRACEPARENT, "x-trace-id": "ignored"})
+
+        self.assertEqual(response.json(), {"state": TRACE_ID, "var": TRACE_ID, "parent": PARENT_ID})
+        self.assertEqual(response.headers["x-trace-id"], TRACE_ID)
+        self.assertIsNone(trace_id_var.get())
+
+    async def test_falls_back_to_the_trace_id_header(self):
+        response = await self.client.get("/trace", headers={"traceparent": "garbage", "x-trace-id": "upstream-id"})
+
+        self.assertEqual(response.json(), {"state": "upstream-id", "var": "upstream-id", "parent": None})
+        self.assertEqual(response.headers["x-trace-id"], "upstream-id")
+
+    async def test_mints_a_trace_id_when_none_is_sent(self):
+        first = await self.client.get("/trace", headers={"x-trace-id": "x" * 200})
+        second = await self.client.get("/trace")
+
+        self.assertRegex(first.headers["x-trace-id"], r"^[0-9a-f]{32}$")
+        self.assertNotEqual(first.headers["x-trace-id"], second.headers["x-trace-id"])
+        self.assertEqual(first.json()["state"], first.headers["x-trace-id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from src.authorization.token_validator import TokenValidationError
+from src.authorization.verification_executor import SignatureVerificationExecutor
+
+
+class FakeValidator:
+    def __init__(self, valid: bool = True):
+        self.valid = valid
+
+    def verify_signature(self, parsed_token, key) -> None:
+        if not self.valid:
+            raise TokenValidationError('The token is invalid.')
+
+
+class SignatureVerificationExecutorTest(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.key = rsa.generate_private_key(public_exponent=65537, key_size=2048).public_key()
+
+    async def test_inline_runs_do_not_dilute_the_queue_wait_average(self):
+        executor = SignatureVerificationExecutor('inline')
+
+        for _ in range(3):
+            await executor.verify(FakeValidator(), None, self.key)
+
+        stats = executor.stats()
+        self.assertEqual(stats['waits_recorded'], 0)
+        self.assertEqual(stats['queue_wait_avg'], 0.0)
+
+    async def test_queue_wait_average_counts_only_measured_waits(self):
+        executor = SignatureVerificationExecutor('thread', max_workers=1)
+        self.addCleanup(executor.shutdown)
+
+        await executor.verify(FakeValidator(), None, self.key)
+        with self.assertRaises(TokenValidationError):
+            await executor.verify(FakeValidator(valid=False), None, self.key)
+
+        stats = executor.stats()
+        self.assertEqual(stats['completed'], 2)
+        self.assertEqual(stats['waits_recorded'], 2)
+        self.assertAlmostEqual(stats['queue_wait_avg'], executor.queue_wait_total / 2)
+        self.assertEqual(stats['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,39 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+import asyncio
+import os
+import signal
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from .middleware import setup_middleware
 from .routes.config import router as config_router
+from .settings import reload_settings, settings_cache
+from .utils.precomputed import PrecomputedJSON, json_response, precompute_json
+from .utils.rate_limit import limit_per_client
+from .utils.security import get_api_key
+from .utils.static_files import PrecompressedStaticFiles
+
+# The built frontend: `npm run build:backend` in frontend/
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Reload the settings on SIGHUP (`kill -HUP <pid>`), e.g. to rotate the API key without a restart
+    """
+    loop = asyncio.get_running_loop()
+    handles_signal = False
+    try:
+        loop.add_signal_handler(signal.SIGHUP, reload_settings)
+        handles_signal = True
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+        pass  # No SIGHUP on Windows, and no signal handlers outside the main thread
+    yield
+    if handles_signal:
+        loop.remove_signal_handler(signal.SIGHUP)
 
-app = FastAPI(title="Secure Config API")
+app = FastAPI(title="Secure Config API", lifespan=lifespan)
 
 # Setup middleware (CORS, etc.)
 setup_middleware(app)
@@ -14,23 +41,31 @@ setup_middleware(app)
 # Include API routes
 app.include_router(config_router, prefix="/api")
 
+@settings_cache
+def get_public_config_body() -> PrecomputedJSON:
+    """The public configuration, serialized once per settings version"""
+    return precompute_json({
+        "apiKey": get_api_key()
+    })
+
 # Setup public config.json endpoint that delivers the API key
-@app.get("/config.json")
-async def get_public_config():
+@app.get("/config.json", dependencies=[Depends(limit_per_client("config_json"))])
+async def get_public_config(request: Request):
     """
     Public endpoint that returns the API key.
     This simulates runtime injection of the API key into the frontend.
+    The response carries an ETag: polling clients get a `304` while it is unchanged.
     """
-    from .utils.security import get_api_key
-    
-    return JSONResponse(content={
-        "apiKey": get_api_key()
-    })
+    return json_response(request, get_public_config_body())
 
-@app.get("/")
-async def root():
-    """Root endpoint for health check"""
-    return {"status": "API is running"}
+if os.path.isfile(os.path.join(STATIC_DIR, "index.html")):
+    # Serve the frontend last, so the routes above take precedence; `/` is its index.html
+    app.mount("/", PrecompressedStaticFiles(directory=STATIC_DIR, html=True), name="frontend")
+else:
+    @app.get("/")
+    async def root():
+        """Root endpoint for health check"""
+        return {"status": "API is running"}
 
 if __name__ == "__main__":
     import uvicorn
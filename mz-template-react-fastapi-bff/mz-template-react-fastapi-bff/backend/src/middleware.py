@@ -1,10 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import os
-from dotenv import load_dotenv
+from fastapi.middleware.gzip import GZipMiddleware
 
-# Load environment variables
-load_dotenv()
+from .settings import get_settings
 
 def setup_middleware(app: FastAPI) -> None:
     """
@@ -13,9 +11,10 @@ def setup_middleware(app: FastAPI) -> None:
     Args:
         app: The FastAPI application
     """
-    # Get allowed origins from environment
-    frontend_origin = os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
-    allowed_origins = [frontend_origin]
+    settings = get_settings()
+
+    # Get allowed origins from the settings
+    allowed_origins = [settings.frontend_origin]
     
     # Setup CORS middleware
     app.add_middleware(
@@ -24,4 +23,12 @@ def setup_middleware(app: FastAPI) -> None:
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE"],
         allow_headers=["*"],
-    )
\ No newline at end of file
+    )
+    
+    # Compress responses of COMPRESSION_MIN_SIZE bytes or more. The built frontend is
+    # served from its precompressed .br / .gz files, which this leaves untouched
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.compression_min_size,
+        compresslevel=6,
+    )
@@ -1,44 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from ..settings import get_settings, settings_cache
+from ..utils.precomputed import PrecomputedJSON, json_response, precompute_json
 from ..utils.security import verify_api_key
-import os
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+log = logging.getLogger(__name__)
 
 router = APIRouter()
 
+@settings_cache
+def get_protected_config() -> Optional[PrecomputedJSON]:
+    """
+    Get the protected configuration, serialized once per settings version
+    
+    Returns:
+        Optional[PrecomputedJSON]: The configuration, None if a required variable is missing
+    """
+    settings = get_settings()
+    entra_client_id = settings.entra_client_id
+    entra_scope = settings.entra_scope
+    if not entra_client_id or not entra_scope:
+        return None
+    return precompute_json({
+        "entra_client_id": entra_client_id,
+        "entra_scope": entra_scope,
+        "timestamp": "2025-05-20T12:00:00Z",  # Example timestamp
+        "is_enabled": True
+    })
+
 @router.get("/config", dependencies=[Depends(verify_api_key)])
-async def get_config():
+async def get_config(request: Request):
     """
     Get protected configuration data
     
     This endpoint returns sensitive configuration data that should
     only be accessible by authenticated clients with a valid API key.
+    The response carries an ETag: polling clients get a `304` while it is unchanged.
     """
-    try:
-        # Get configuration from environment variables
-        entra_client_id = os.getenv("ENTRA_CLIENT_ID")
-        entra_scope = os.getenv("ENTRA_SCOPE")
-        
-        if not entra_client_id or not entra_scope:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Server configuration error: Missing required environment variables"
-            )
-        
-        # Return configuration data
-        return {
-            "entra_client_id": entra_client_id,
-            "entra_scope": entra_scope,
-            "timestamp": "2025-05-20T12:00:00Z",  # Example timestamp
-            "is_enabled": True
-        }
-    
-    except Exception as e:
-        # Log the error (in a real app, use proper logging)
-        print(f"Error retrieving config: {str(e)}")
+    config = get_protected_config()
+    if config is None:
+        log.error("Error retrieving config: missing ENTRA_CLIENT_ID or ENTRA_SCOPE")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal server error"
-        )
\ No newline at end of file
+            detail="Server configuration error: Missing required environment variables"
+        )
+    return json_response(request, config, cache_control="private, no-cache")
\ No newline at end of file
@@ -0,0 +1,102 @@
+import logging
+from functools import lru_cache
+from typing import Callable, List, Optional, TypeVar
+
+from dotenv import find_dotenv
+from pydantic import ValidationError, ValidationInfo, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from .utils.parsers import parse_rate_limit, parse_rate_limits
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Settings(BaseSettings):
+    """
+    Immutable, typed snapshot of the environment variables and of the `.env` file.
+
+    Read once, when first needed, instead of every module loading `.env` again; environment
+    variables win over the file, and unset or empty variables take the defaults below.
+    `reload_settings()` replaces the whole snapshot, nothing ever changes one in place.
+    """
+
+    model_config = SettingsConfigDict(env_file_encoding="utf-8", env_ignore_empty=True, extra="ignore", frozen=True)
+
+    api_key: Optional[str] = None
+    # Further accepted keys, comma separated: the previous key while clients move to API_KEY
+    api_keys: str = ""
+    entra_client_id: Optional[str] = None
+    entra_scope: Optional[str] = None
+    frontend_origin: str = "http://localhost:5173"
+    compression_min_size: int = 1024
+    rate_limit_default: str = "off"
+    rate_limits: str = ""
+    rate_limit_max_keys: int = 100000
+
+    @field_validator("rate_limit_default", "rate_limits")
+    @classmethod
+    def _parseable_rate_limits(cls, value: str, info: ValidationInfo) -> str:
+        (parse_rate_limit if info.field_name == "rate_limit_default" else parse_rate_limits)(value)
+        return value
+
+
+_settings: Optional[Settings] = None
+_derived: List[Callable] = []
+
+
+def _load_settings() -> Settings:
+    return Settings(_env_file=find_dotenv() or ".env")
+
+
+def get_settings() -> Settings:
+    """
+    Get the settings, loaded on the first call
+
+    Returns:
+        Settings: The settings
+
+    Raises:
+        pydantic.ValidationError: If a variable holds a malformed value
+    """
+    global _settings
+    if _settings is None:
+        _settings = _load_settings()
+    return _settings
+
+
+def settings_cache(function: Callable[[], T]) -> Callable[[], T]:
+    """
+    Cache what `function` builds from the settings until they are reloaded
+
+    Args:
+        function: A function without arguments reading the settings
+
+    Returns:
+        Callable: The cached function
+    """
+    cached = lru_cache(maxsize=None)(function)
+    _derived.append(cached)
+    return cached
+
+
+def reload_settings() -> bool:
+    """
+    Re-read the environment and the `.env` file, and drop everything built from the
+    previous settings. A malformed value keeps the current settings.
+
+    Returns:
+        bool: True if the settings were replaced
+    """
+    global _settings
+    try:
+        settings = _load_settings()
+    except ValidationError as e:
+        log.error(f"Settings not reloaded, keeping the current ones: {e}")
+        return False
+    _settings = settings
+    for cached in _derived:
+        cached.cache_clear()
+    log.info("Settings reloaded")
+    return True
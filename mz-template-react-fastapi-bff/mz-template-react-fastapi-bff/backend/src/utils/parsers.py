@@ -0,0 +1,50 @@
+import re
+from typing import Dict, NamedTuple, Optional
+
+# Parsers of the rate limit settings: a leaf module, imported by the settings to validate
+# them and by the rate limiter to apply them
+
+_PERIODS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+_LIMIT = re.compile(r"^(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)?([smh])(?::(\d+))?$")
+
+
+class RateLimit(NamedTuple):
+    rate: float   # tokens added per second
+    burst: float  # bucket capacity: requests allowed back to back
+
+
+def parse_rate_limit(value: str) -> Optional[RateLimit]:
+    """
+    Parse a limit such as `20/s`, `600/5m:50` (600 per 5 minutes, bursts of 50) or `off`
+
+    Args:
+        value: The limit
+
+    Returns:
+        Optional[RateLimit]: The limit, None when unlimited
+
+    Raises:
+        ValueError: If the limit cannot be parsed
+    """
+    value = value.strip().lower()
+    if value in ("", "off", "none", "0"):
+        return None
+    match = _LIMIT.match(value)
+    if match is None:
+        raise ValueError(f"Invalid rate limit '{value}', expected e.g. '20/s', '600/5m' or '20/s:40'")
+    requests, periods, unit, burst = match.groups()
+    period = float(periods or 1) * _PERIODS[unit]
+    return RateLimit(rate=float(requests) / period, burst=float(burst) if burst else max(float(requests), 1.0))
+
+
+def parse_rate_limits(value: str) -> Dict[str, Optional[RateLimit]]:
+    """
+    Parse per-route limits such as `api=20/s:40,config_json=off`
+    """
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        route, _, limit = item.partition("=")
+        limits[route.strip()] = parse_rate_limit(limit)
+    return limits
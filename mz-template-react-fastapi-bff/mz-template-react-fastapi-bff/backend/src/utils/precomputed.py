@@ -0,0 +1,53 @@
+import hashlib
+import json
+from typing import Any, NamedTuple
+
+from fastapi import Request
+from starlette.responses import Response
+
+
+class PrecomputedJSON(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def precompute_json(content: Any) -> PrecomputedJSON:
+    """
+    Serialize a JSON body once, with its strong ETag
+
+    Args:
+        content: The JSON content
+
+    Returns:
+        PrecomputedJSON: The body, rendered like JSONResponse does, and a hash of it as ETag
+    """
+    body = json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+    return PrecomputedJSON(body=body, etag='"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"')
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag, with the weak comparison of conditional GETs
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def json_response(request: Request, payload: PrecomputedJSON, cache_control: str = "no-cache") -> Response:
+    """
+    Answer with a precomputed body, or `304 Not Modified` when the client already has it
+
+    Args:
+        request: The request, for its If-None-Match header
+        payload: The precomputed body
+        cache_control: The Cache-Control header; `no-cache` lets clients keep the body but revalidate it
+
+    Returns:
+        Response: The response
+    """
+    headers = {"etag": payload.etag, "cache-control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
@@ -0,0 +1,91 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from .parsers import RateLimit, parse_rate_limit, parse_rate_limits
+from ..settings import get_settings, settings_cache
+
+
+class RateLimitExceeded(HTTPException):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, slow down.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+class RateLimiter:
+    """
+    In-process token buckets per route and caller.
+
+    Each route uses its entry of RATE_LIMITS, or RATE_LIMIT_DEFAULT. A check is a dict
+    lookup and a few float operations; the least recently used buckets beyond `max_keys`
+    are dropped, which only ever hands their callers a full bucket again.
+    """
+
+    def __init__(self, default: Optional[RateLimit], limits: Dict[str, Optional[RateLimit]], max_keys: int = 100000):
+        self.default = default
+        self.limits = limits
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def check(self, route: str, key: Hashable) -> None:
+        """
+        Count one request of `key` on `route`
+
+        Raises:
+            RateLimitExceeded: If the caller is over the route's limit
+        """
+        limit = self.limits.get(route, self.default)
+        if limit is None:
+            return
+        now = time.monotonic()
+        bucket_key = (route, key)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            tokens = limit.burst
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            self._buckets.move_to_end(bucket_key)
+        if tokens < 1.0:
+            self._buckets[bucket_key] = (tokens, now)
+            raise RateLimitExceeded((1.0 - tokens) / limit.rate)
+        self._buckets[bucket_key] = (tokens - 1.0, now)
+
+
+@settings_cache
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the rate limiter, built from RATE_LIMIT_DEFAULT and RATE_LIMITS
+
+    Returns:
+        RateLimiter: The rate limiter, built once per settings version
+    """
+    settings = get_settings()
+    return RateLimiter(
+        default=parse_rate_limit(settings.rate_limit_default),
+        limits=parse_rate_limits(settings.rate_limits),
+        max_keys=settings.rate_limit_max_keys
+    )
+
+
+def client_address(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def limit_per_client(route: str):
+    """
+    Dependency limiting every client address on `route`
+
+    Args:
+        route: The name of the route in RATE_LIMITS
+    """
+    async def dependency(request: Request) -> None:
+        get_rate_limiter().check(route, client_address(request))
+    return dependency
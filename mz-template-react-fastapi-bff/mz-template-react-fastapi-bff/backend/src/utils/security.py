@@ -1,14 +1,68 @@
-from fastapi import HTTPException, Header, status
-import os
-from dotenv import load_dotenv
-from typing import Optional
+from fastapi import HTTPException, Header, Request, status
+import hashlib
+import hmac
+import secrets
+from typing import Iterable, Optional
 
-# Load environment variables
-load_dotenv()
+from .rate_limit import client_address, get_rate_limiter
+from ..settings import get_settings, settings_cache
+
+_NO_DIGEST = bytes(32)
+
+class ApiKeyStore:
+    """
+    The accepted API keys, kept as salted hashes.
+
+    A presented key is hashed once and looked up in a dict, whatever the number of keys,
+    then compared in constant time. The salt is random per process, so neither the lookup
+    nor the comparison timing says anything about the keys. Several keys can be active at
+    once, so a key can be rotated without rejecting the clients still holding the old one.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self._salt = secrets.token_bytes(16)
+        self._digests = {}
+        for key in keys:
+            digest = self._digest(key)
+            self._digests[digest] = digest
+
+    def _digest(self, key: str) -> bytes:
+        # Keyed BLAKE2b is a MAC, as safe as HMAC here and several times faster
+        return hashlib.blake2b(key.encode("utf-8"), key=self._salt, digest_size=32).digest()
+
+    def match(self, key: Optional[str]) -> Optional[bytes]:
+        """
+        Find the accepted key matching a presented key
+
+        Args:
+            key: The presented key
+
+        Returns:
+            Optional[bytes]: The salted digest of the accepted key, None if the key is not accepted
+        """
+        if not key:
+            return None
+        digest = self._digest(key)
+        return digest if hmac.compare_digest(self._digests.get(digest, _NO_DIGEST), digest) else None
+
+    def verify(self, key: Optional[str]) -> bool:
+        """
+        Check whether a key is one of the accepted keys
+
+        Args:
+            key: The presented key
+
+        Returns:
+            bool: True if the key is accepted
+        """
+        return self.match(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._digests)
 
 def get_api_key() -> str:
     """
-    Get the API key from environment variables
+    Get the API key from the settings
     
     Returns:
         str: The API key
@@ -16,22 +70,44 @@ def get_api_key() -> str:
     Raises:
         RuntimeError: If the API key is not set
     """
-    api_key = os.getenv("API_KEY")
+    api_key = get_settings().api_key
     if not api_key:
         raise RuntimeError("API_KEY environment variable is not set")
     return api_key
 
-async def verify_api_key(x_api_key: Optional[str] = Header(None)) -> None:
+@settings_cache
+def get_api_key_store() -> ApiKeyStore:
     """
-    Verify that the API key is valid
+    Get the store of the accepted keys: API_KEY, and the keys of API_KEYS during a rotation
+    
+    Returns:
+        ApiKeyStore: The key store, built once per settings version
+    
+    Raises:
+        RuntimeError: If the API key is not set
+    """
+    extra_keys = [key.strip() for key in get_settings().api_keys.split(",") if key.strip()]
+    return ApiKeyStore([get_api_key(), *extra_keys])
+
+async def verify_api_key(request: Request, x_api_key: Optional[str] = Header(None)) -> None:
+    """
+    Verify that the API key is valid, within the `api` rate limit
     
     Args:
+        request: The request, for the client address
         x_api_key: The API key from the request header
     
     Raises:
-        HTTPException: If the API key is invalid or missing
+        HTTPException: If the API key is invalid or missing, or the caller is over the rate limit
     """
-    expected_api_key = get_api_key()
+    digest = get_api_key_store().match(x_api_key)
+    valid = digest is not None
+    
+    # The key is served to every browser by /config.json, so the bucket is per key and
+    # client address; callers without a valid key share one bucket per address, however
+    # many keys they try. Buckets hold the salted digest of the key, never the key itself
+    client = client_address(request)
+    get_rate_limiter().check("api", (digest, client) if valid else client)
     
     # Check if API key is provided
     if not x_api_key:
@@ -41,7 +117,7 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None)) -> None:
         )
     
     # Validate API key
-    if x_api_key != expected_api_key:
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid API key"
@@ -0,0 +1,60 @@
+import json
+import unittest
+
+from starlette.requests import Request
+
+from src.utils.precomputed import etag_matches, json_response, precompute_json
+
+
+def _request(if_none_match: str = None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode("latin-1"))]
+    return Request({"type": "http", "method": "GET", "path": "/config.json", "headers": headers})
+
+
+class PrecomputeJsonTest(unittest.TestCase):
+    def test_renders_compact_json_with_a_strong_etag(self):
+        payload = precompute_json({"name": "café", "values": [1, 2]})
+
+        self.assertEqual(payload.body, '{"name":"café","values":[1,2]}'.encode("utf-8"))
+        self.assertTrue(payload.etag.startswith('"') and payload.etag.endswith('"'))
+        self.assertEqual(precompute_json({"name": "café", "values": [1, 2]}).etag, payload.etag)
+        self.assertNotEqual(precompute_json({"name": "cafe"}).etag, payload.etag)
+
+
+class JsonResponseTest(unittest.TestCase):
+    def setUp(self):
+        self.payload = precompute_json({"apiKey": "key"})
+
+    def test_answers_the_body_with_its_etag(self):
+        response = json_response(_request(), self.payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.body), {"apiKey": "key"})
+        self.assertEqual(response.headers["etag"], self.payload.etag)
+        self.assertEqual(response.headers["cache-control"], "no-cache")
+        self.assertEqual(response.media_type, "application/json")
+
+    def test_revalidation_is_answered_304_without_a_body(self):
+        etag = self.payload.etag
+        for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            with self.subTest(if_none_match=if_none_match):
+                response = json_response(_request(if_none_match), self.payload, cache_control="private, no-cache")
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.body, b"")
+                self.assertEqual(response.headers["etag"], etag)
+                self.assertEqual(response.headers["cache-control"], "private, no-cache")
+
+    def test_a_stale_etag_gets_the_body(self):
+        response = json_response(_request('"stale"'), self.payload)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, self.payload.body)
+
+    def test_etag_matches_uses_the_weak_comparison(self):
+        self.assertTrue(etag_matches('W/"a"', '"a"'))
+        self.assertTrue(etag_matches(' "b" , "a" ', '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+from unittest import mock
+
+from src import settings
+from src.utils.security import ApiKeyStore, get_api_key_store
+
+
+class ApiKeyStoreTest(unittest.TestCase):
+    def test_matches_accepted_keys_only(self):
+        store = ApiKeyStore(["current-key", "previous-key"])
+
+        self.assertEqual(len(store), 2)
+        self.assertTrue(store.verify("current-key"))
+        self.assertTrue(store.verify("previous-key"))
+        for key in ("other-key", "current-ke", "", None):
+            with self.subTest(key=key):
+                self.assertFalse(store.verify(key))
+                self.assertIsNone(store.match(key))
+
+    def test_match_returns_a_digest_per_key(self):
+        store = ApiKeyStore(["current-key", "previous-key"])
+
+        digest = store.match("current-key")
+        self.assertEqual(store.match("current-key"), digest)
+        self.assertNotEqual(store.match("previous-key"), digest)
+
+    def test_keeps_no_plaintext_key(self):
+        store = ApiKeyStore(["current-key"])
+        digest = store.match("current-key")
+
+        self.assertNotIn(b"current-key", digest)
+        self.assertNotIn("current-key", repr(vars(store)))
+        # The salt is per store, a digest says nothing about the key to another process
+        self.assertNotEqual(ApiKeyStore(["current-key"]).match("current-key"), digest)
+
+
+class GetApiKeyStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(settings.reload_settings)
+
+    def _reload(self, **environ):
+        with mock.patch.dict(os.environ, environ), mock.patch.object(settings, "find_dotenv", return_value=os.devnull):
+            self.assertTrue(settings.reload_settings())
+
+    def test_accepts_the_rotation_keys(self):
+        self._reload(API_KEY="new-key", API_KEYS="old-key, older-key,")
+
+        store = get_api_key_store()
+        self.assertEqual(len(store), 3)
+        for key in ("new-key", "old-key", "older-key"):
+            self.assertTrue(store.verify(key))
+
+    def test_is_rebuilt_when_the_settings_are_reloaded(self):
+        self._reload(API_KEY="new-key", API_KEYS="old-key")
+        self.assertTrue(get_api_key_store().verify("old-key"))
+
+        self._reload(API_KEY="new-key", API_KEYS="")
+
+        self.assertFalse(get_api_key_store().verify("old-key"))
+        self.assertTrue(get_api_key_store().verify("new-key"))
+
+    def test_requires_an_api_key(self):
+        self._reload(API_KEY="", API_KEYS="old-key")
+
+        with self.assertRaises(RuntimeError):
+            get_api_key_store()
+
+
+if __name__ == "__main__":
+    unittest.main()
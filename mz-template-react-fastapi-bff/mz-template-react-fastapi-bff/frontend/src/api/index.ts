@@ -28,11 +28,12 @@ let apiKey: string | null = null;
 export const fetchPublicConfig = async (): Promise<PublicConfig> => {
   try {
     console.log('Fetching public config from /config.json...');
+    // Revalidate with the cached ETag: the backend answers 304 while the config is unchanged
     const response = await fetch('/config.json', {
       method: 'GET',
+      cache: 'no-cache',
       headers: {
-        'Accept': 'application/json',
-        'Cache-Control': 'no-cache'
+        'Accept': 'application/json'
       }
     });
     
@@ -78,13 +79,24 @@ export const fetchConfig = async (): Promise<ProtectedConfig> => {
   const key = await getApiKey();
   
   try {
-    const response = await fetch('/api/config', {
+    let response = await fetch('/api/config', {
       headers: {
         'Content-Type': 'application/json',
         'x-api-key': key
       }
     });
     
+    // The key was rotated out: fetch the current one and retry once
+    if (response.status === 403) {
+      apiKey = null;
+      response = await fetch('/api/config', {
+        headers: {
+          'Content-Type': 'application/json',
+          'x-api-key': await getApiKey()
+        }
+      });
+    }
+    
     if (!response.ok) {
       throw new Error(`Failed to fetch protected config: ${response.status} ${response.statusText}`);
     }
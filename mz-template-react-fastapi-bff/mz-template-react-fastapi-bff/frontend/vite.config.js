@@ -1,8 +1,41 @@
 import { defineConfig } from 'vite';
 import react from '@vitejs/plugin-react';
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs';
+import { extname, join, resolve } from 'node:path';
+import { brotliCompressSync, constants, gzipSync } from 'node:zlib';
+const COMPRESSIBLE = new Set(['.html', '.js', '.mjs', '.css', '.json', '.svg', '.txt', '.xml', '.map', '.wasm', '.ico']);
+const MIN_SIZE = 1024;
+// Writes a .br and a .gz next to every text asset of the build, at maximum compression:
+// the backend serves them as they are instead of compressing on every request
+function precompress() {
+    let outDir = 'dist';
+    const walk = (dir) => readdirSync(dir, { withFileTypes: true }).flatMap((entry) => entry.isDirectory() ? walk(join(dir, entry.name)) : [join(dir, entry.name)]);
+    return {
+        name: 'precompress',
+        apply: 'build',
+        configResolved(config) {
+            outDir = resolve(config.root, config.build.outDir);
+        },
+        closeBundle() {
+            for (const file of walk(outDir)) {
+                if (!COMPRESSIBLE.has(extname(file)) || statSync(file).size < MIN_SIZE)
+                    continue;
+                const content = readFileSync(file);
+                const brotli = brotliCompressSync(content, {
+                    params: { [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY, [constants.BROTLI_PARAM_SIZE_HINT]: content.length },
+                });
+                const gzip = gzipSync(content, { level: constants.Z_BEST_COMPRESSION });
+                if (brotli.length < content.length)
+                    writeFileSync(`${file}.br`, brotli);
+                if (gzip.length < content.length)
+                    writeFileSync(`${file}.gz`, gzip);
+            }
+        },
+    };
+}
 // https://vitejs.dev/config/
 export default defineConfig({
-    plugins: [react()],
+    plugins: [react(), precompress()],
     server: {
         fs: {
             allow: ["./src"], // Allows serving files from the project root